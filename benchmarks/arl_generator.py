@@ -0,0 +1,102 @@
+"""
+Seeded generator of synthetic ARL knowledge bases, every dimension scales
+independently
+
+from arl_generator import generate_knowledge
+arl_dict = generate_knowledge(features=500, rules=5000, seed=0)
+"""
+import random
+
+GENERATOR_DEFAULTS = {
+    'features': 200,
+    'classes': 3,
+    'rules': 2000,
+    'depth': 2,
+    'aliases': 3,
+    'conclusions': 200,
+}
+
+
+def generate_expression(rng, depth, operands):
+    """
+    fully nested `&`/`|` expression with 2 ** depth operands
+
+    :param operands: function returning a random operand
+    """
+    if depth == 0:
+        return operands()
+
+    op = rng.choice(['&', '|'])
+    left = generate_expression(rng, depth - 1, operands)
+    right = generate_expression(rng, depth - 1, operands)
+    if depth > 1:
+        return f'({left} {op} {right})'
+
+    return f'{left} {op} {right}'
+
+
+def generate_knowledge(
+    features: int = 200,
+    classes: int = 3,
+    rules: int = 2000,
+    depth: int = 2,
+    aliases: int = 3,
+    conclusions: int = 200,
+    seed: int = 0,
+) -> dict:
+    """
+    :param features: number of numeric features
+    :param classes: range classes per feature, covering min to max
+    :param rules: number of rules
+    :param depth: nesting depth of rule definitions, 2 ** depth references
+    :param aliases: length of the chains of rules referencing the previous
+    rule, 1 for rules on features only
+    :param conclusions: number of conclusions, each with a yes and no class
+    :param seed: random seed, the same arguments give the same knowledge
+    :return: arl_dict for ARLHandler
+    """
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(features):
+        bounds = ['min'] + [10 * k for k in range(1, classes)] + ['max']
+        members = [
+            f'--> c{k} :: {bounds[k]} to {bounds[k + 1]}' for k in range(classes)
+        ]
+        blocks.append('\n'.join([f'feature_{i}'] + members))
+
+    def _feature_ref():
+        return f'feature_{rng.randrange(features)}[c{rng.randrange(classes)}]'
+
+    rule_lines = []
+    for i in range(rules):
+        definition = generate_expression(rng, depth, _feature_ref)
+        if i % aliases > 0:
+            # continue the alias chain of the previous rule
+            definition = f'rule_{i - 1} & ({definition})'
+
+        if i % 10 == 0:
+            definition += f' for >{rng.randrange(1, 60)} minutes'
+
+        rule_lines.append(f'rule_{i} := {definition}')
+
+    def _rule_ref():
+        return f'rule_{rng.randrange(rules)}' if rules > 0 else _feature_ref()
+
+    conclusion_lines = []
+    for i in range(conclusions):
+        yes = generate_expression(rng, depth, _rule_ref)
+        conclusion_lines.append(f'conclusion_{i}[yes] := {yes}')
+        conclusion_lines.append(f'conclusion_{i}[no] := {_rule_ref()}')
+
+    return {
+        'features': '\n\n'.join(blocks),
+        'rules': '\n'.join(rule_lines),
+        'conclusions': '\n'.join(conclusion_lines),
+    }
+
+
+def generate_mapping(features: int = 200) -> dict:
+    """
+    data column of every generated feature, for map_data_variables
+    """
+    return {f'feature_{i}': f'sensor_{i}' for i in range(features)}
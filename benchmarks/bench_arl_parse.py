@@ -0,0 +1,168 @@
+"""
+Parse time and peak memory of the ARL parsers on generated knowledge bases,
+scaling one dimension of the generator at a time. Results are json, save
+them per commit and pass an older file to --compare to catch regressions.
+
+python benchmarks/bench_arl_parse.py --scale rules=1000,5000,20000
+python benchmarks/bench_arl_parse.py --output new.json --compare old.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from aitomatic.dsl.arl_cache import KnowledgeCache
+from aitomatic.dsl.arl_conclusions import ARLConclusions
+from aitomatic.dsl.arl_features import ARLFeatures
+from aitomatic.dsl.arl_handler import ARLHandler
+from aitomatic.dsl.arl_rules import ARLRules
+from arl_generator import GENERATOR_DEFAULTS, generate_knowledge, generate_mapping
+
+
+def get_stages(arl_dict, mapping):
+    """
+    :return: (setup, run) per measured stage, run is timed on the output of
+    setup, if any
+    """
+    feature_dict = ARLFeatures(arl_dict['features']).feature_dict
+    rule_dict = ARLRules(feature_dict, arl_dict['rules']).rule_dict
+    state = ARLHandler(arl_dict).get_parsed_state()
+
+    def get_warm_cache():
+        cache = KnowledgeCache()
+        cache.get_handler(arl_dict)
+        return cache
+
+    return {
+        'features': (None, lambda _: ARLFeatures(arl_dict['features'])),
+        'rules': (None, lambda _: ARLRules(feature_dict, arl_dict['rules'])),
+        'conclusions': (
+            None,
+            lambda _: ARLConclusions(feature_dict, rule_dict, arl_dict['conclusions']),
+        ),
+        'handler': (None, lambda _: ARLHandler(arl_dict)),
+        'map_data_variables': (
+            lambda: ARLHandler.from_parsed_state(state),
+            lambda handler: handler.map_data_variables(mapping),
+        ),
+        'cache_hit': (get_warm_cache, lambda cache: cache.get_handler(arl_dict)),
+    }
+
+
+def measure(setup, run, repeat):
+    """
+    best wall time of repeat runs, and peak traced memory of one more run
+    """
+    times = []
+    for _ in range(repeat):
+        x = setup() if setup is not None else None
+        start = time.perf_counter()
+        run(x)
+        times.append(time.perf_counter() - start)
+
+    x = setup() if setup is not None else None
+    tracemalloc.start()
+    run(x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def get_commit():
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    print the time ratio of every stage and size against baseline
+
+    :return: True if no stage got slower than threshold times the baseline
+    """
+    ok = True
+    old = {(r['size'], r['stage']): r for r in baseline['results']}
+    for r in results['results']:
+        base = old.get((r['size'], r['stage']))
+        if base is None:
+            continue
+
+        ratio = r['seconds'] / base['seconds']
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(
+            f'{r["stage"]:>20} {results["scale"]}={r["size"]:<8} '
+            f'{base["seconds"]:.4f}s -> {r["seconds"]:.4f}s x{ratio:.2f} {flag}',
+            file=sys.stderr,
+        )
+        ok = ok and ratio <= threshold
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--scale',
+        default='rules=500,2000,8000',
+        help='generator dimension and sizes, e.g. features=100,1000',
+    )
+    for name, default in GENERATOR_DEFAULTS.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', default=None, help='comma separated stages')
+    parser.add_argument('--output', default=None, help='write json to this file')
+    parser.add_argument('--compare', default=None, help='baseline json file')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args()
+
+    scale, sizes = args.scale.split('=')
+    if scale not in GENERATOR_DEFAULTS.keys():
+        parser.error(f'--scale must be one of {list(GENERATOR_DEFAULTS.keys())}')
+
+    params = {name: getattr(args, name) for name in GENERATOR_DEFAULTS.keys()}
+    results = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'params': params,
+        'scale': scale,
+        'results': [],
+    }
+    for size in [int(x) for x in sizes.split(',')]:
+        arl_dict = generate_knowledge(**{**params, scale: size}, seed=args.seed)
+        lines = sum(len(text.splitlines()) for text in arl_dict.values())
+        mapping = generate_mapping(params['features'] if scale != 'features' else size)
+        stages = get_stages(arl_dict, mapping)
+        names = args.stages.split(',') if args.stages else list(stages.keys())
+        for stage in names:
+            result = measure(*stages[stage], args.repeat)
+            results['results'].append(
+                {'size': size, 'lines': lines, 'stage': stage, **result}
+            )
+
+    text = json.dumps(results, indent=4)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+    print(text)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Decoding time and memory of prediction responses, eval based decoding vs
+convert_json_to_data
+
+python benchmarks/bench_decode.py --rows 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.web_model import convert_json_to_data
+
+
+def legacy_convert_json_to_data(json_data, types_dict):
+    """
+    decoding as done before convert_json_to_data parsed payloads without eval
+    """
+    out_data = {}
+    for k, v in json_data.items():
+        goal_type = types_dict.get(k, pd.DataFrame)
+        if goal_type == pd.DataFrame or goal_type == pd.Series:
+            out_data[k] = goal_type(eval(v))
+        elif goal_type == np.ndarray:
+            out_data[k] = np.array(v, dtype='O')
+        else:
+            out_data[k] = v
+
+    return out_data
+
+
+def nbytes(x):
+    if isinstance(x, np.ndarray):
+        if x.dtype == 'O':
+            # object arrays hold pointers to python objects
+            return x.nbytes + sum(v.__sizeof__() for v in x)
+
+        return x.nbytes
+
+    return int(x.memory_usage(index=True, deep=True).sum())
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    predictions = pd.DataFrame(
+        {'score': rng.random(args.rows), 'label': rng.integers(0, 2, args.rows)}
+    )
+    responses = {
+        'DataFrame': ({'predictions': predictions.to_json()}, pd.DataFrame),
+        'ndarray': ({'predictions': predictions['score'].tolist()}, np.ndarray),
+    }
+
+    results = {'rows': args.rows}
+    for name, (resp, goal_type) in responses.items():
+        types_dict = {'predictions': goal_type}
+        # responses are decoded from the same parsed body in both cases
+        legacy, legacy_s = timed(legacy_convert_json_to_data, resp, types_dict)
+        new, new_s = timed(convert_json_to_data, resp, types_dict)
+        results[name] = {
+            'legacy_s': legacy_s,
+            'decode_s': new_s,
+            'speedup': legacy_s / new_s,
+            'legacy_bytes': nbytes(legacy['predictions']),
+            'decode_bytes': nbytes(new['predictions']),
+        }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Requests/sec of module level `requests` calls vs the pooled Transport against
+a local stub server
+
+python benchmarks/bench_transport.py --requests 2000 --threads 8
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from aitomatic.api.client import make_request
+from aitomatic.api.transport import Transport
+from stub_server import start_stub_server
+
+
+def run(call, url, n_requests, threads):
+    payload = json.dumps({'input_data': {'a': {'0': 1.0}}})
+
+    def _one(_):
+        call(url, data=payload)
+
+    start = time.perf_counter()
+    if threads == 1:
+        for i in range(n_requests):
+            _one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(_one, range(n_requests)))
+
+    return n_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    server, root = start_stub_server()
+    url = f'{root}/inferencing'
+
+    def baseline(url, **kwargs):
+        resp = requests.post(url, **kwargs)
+        if resp.status_code != 200:
+            raise ConnectionError(f'{resp.status_code}: {resp.content}')
+        return json.loads(resp.content)
+
+    transport = Transport(pool_maxsize=max(args.threads, 1))
+    transport.warm_up([root], connections=args.threads)
+
+    def pooled(url, **kwargs):
+        return make_request('post', url, transport=transport, **kwargs)
+
+    results = {
+        'requests': args.requests,
+        'threads': args.threads,
+        'baseline_rps': run(baseline, url, args.requests, args.threads),
+        'transport_rps': run(pooled, url, args.requests, args.threads),
+    }
+    results['speedup'] = results['transport_rps'] / results['baseline_rps']
+    print(json.dumps(results, indent=4))
+
+    transport.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
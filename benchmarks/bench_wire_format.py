@@ -0,0 +1,71 @@
+"""
+Client CPU per row and request body size of the json, parquet and numpy wire
+formats, with a round trip through the local stub server
+
+python benchmarks/bench_wire_format.py --rows 20000 --cols 50
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.web_model import WebModel
+from stub_server import start_stub_server
+
+
+def measure(model, X, repeat):
+    """
+    client side cost of building the request, and round trip cost (the stub
+    server runs in this process, so its cpu time is included)
+    """
+    input_data = {'X': X}
+    start = time.process_time()
+    for _ in range(repeat):
+        request_kwargs, _ = model.build_prediction_request(input_data)
+    encode_s = (time.process_time() - start) / repeat
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    predictions = model.predict_chunk(input_data)['predictions']
+    round_trip_s = time.perf_counter() - start
+    client_cpu_s = time.process_time() - cpu_start
+
+    assert len(predictions) == len(X)
+    return {
+        'body_bytes': len(request_kwargs['data']),
+        'encode_us_per_row': encode_s / len(X) * 1e6,
+        'round_trip_s': round_trip_s,
+        'round_trip_cpu_s': client_cpu_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--cols', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    server, root = start_stub_server()
+    os.environ['AITOMATIC_ENVIRONMENT'] = 'local'
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.random((args.rows, args.cols)),
+        columns=[f'sensor_{i}' for i in range(args.cols)],
+    )
+
+    results = {'rows': args.rows, 'cols': args.cols}
+    for wire_format in ['json', 'parquet', 'numpy']:
+        model = WebModel('stub model', wire_format=wire_format)
+        model.PREDICTION_ENDPOINT = f'{root}/inferencing'
+        results[wire_format] = measure(model, X, args.repeat)
+
+    print(json.dumps(results, indent=4))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Local stand-in for the Aitomatic model and client APIs, used by the
+benchmarks in this folder
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aitomatic.api import wire_format as wf
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients that support it can keep connections alive
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    # wire formats accepted on /inferencing, others get 415
+    wire_formats = wf.WIRE_FORMATS
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        self.send_body(json.dumps(payload).encode(), 'application/json', status)
+
+    def send_body(self, body: bytes, content_type: str, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self.send_json([{'id': '1', 'name': 'stub model'}])
+        else:
+            self.send_json({'result': {'stats': {}, 'metrics': {}}})
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.path.startswith('/inferencing'):
+            wire_format = wf.get_wire_format(self.headers.get('Content-Type'))
+            if wire_format not in self.wire_formats:
+                self.send_json({'detail': 'unsupported media type'}, status=415)
+            elif wire_format != 'json':
+                df = wf.decode(body, wire_format)
+                predictions = df.iloc[:, :1].rename(columns={df.columns[0]: 'predictions'})
+                content_type = wf.CONTENT_TYPES[wire_format]
+                self.send_body(wf.encode(predictions, wire_format), content_type)
+            else:
+                request_data = json.loads(body)
+                self.send_json(self.predict(request_data['input_data']))
+        else:
+            self.send_json({'id': '1'})
+
+    def predict(self, input_data):
+        """
+        Echo the first column back as the prediction
+        """
+        if isinstance(input_data, dict) and len(input_data) > 0:
+            first = list(input_data.values())[0]
+            predictions = repr({'predictions': first})
+        else:
+            predictions = input_data
+
+        return {'result': {'predictions': predictions}, 'result_file_path': ''}
+
+
+def start_stub_server(handler=StubHandler, port: int = 0):
+    """
+    Start stub server on a background thread, returns (server, root_url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f'http://{host}:{port}'
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import time
+from copy import deepcopy
+from typing import Dict
+
+from aitomatic.api.client import (
+    AsyncProjectManager,
+    async_make_raw_request,
+    async_make_request,
+)
+from aitomatic.api.cache import PredictionCache
+from aitomatic.api.exceptions import PayloadTooLarge, UnsupportedMediaType
+from aitomatic.api.transport import AsyncTransport, aiohttp
+from aitomatic.api.web_model import WebModel
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class AsyncWebModel(WebModel):
+    """
+    asyncio counterpart of WebModel, so one event loop can keep many
+    inference calls in flight without a thread per call.
+    Requires the optional aiohttp dependency, `pip install aitomatic[async]`
+
+    Ex:
+    async with AsyncWebModel('MyModelName') as model:
+        await model.aload()
+        predictions = await model.apredict({'X': MyDataFrame})
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        api_token: str = None,
+        project_name: str = None,
+        chunk_size: int = 1024,
+        transport: AsyncTransport = None,
+        max_concurrency: int = 16,
+        max_retries: int = 2,
+        wire_format: str = 'json',
+        cache: PredictionCache = None,
+        deduplicate: bool = False,
+    ):
+        """
+        Initialize remote model
+
+        :param api_token: Aitomatic API Access Token
+        :param model_name: name of the model being used
+        :param chunk_size: size to chunk inference calls in kb
+        :param transport: (optional) AsyncTransport, share one between models
+        running on the same event loop
+        :param max_concurrency: max number of chunks in flight per
+        abatch_predict call
+        :param max_retries: number of times a failed chunk is retried
+        :param wire_format: inference payload format, see WebModel
+        :param cache: not supported yet, use WebModel
+        :param deduplicate: not supported yet, use WebModel
+        """
+        if cache is not None or deduplicate:
+            raise NotImplementedError(
+                'cache and deduplicate are not supported by AsyncWebModel yet, '
+                'use WebModel'
+            )
+
+        super().__init__(
+            model_name,
+            api_token=api_token,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+            max_retries=max_retries,
+            wire_format=wire_format,
+        )
+        if transport is None:
+            transport = AsyncTransport(limit=max(100, max_concurrency))
+
+        self.atransport = transport
+        if project_name is not None:
+            # resolved asynchronously by AsyncProjectManager when needed
+            self.project_name = project_name
+            self.project_id = None
+
+    async def aload(self, version: str = 'latest') -> 'AsyncWebModel':
+        """
+        load model parameters for usage, see WebModel.load
+
+        :param version: (optional) version of the model to load, defaults to
+        latest
+        """
+        self.model_version = version
+        resp_data = await async_make_request(
+            'get',
+            self.METADATA_ENDPOINT,
+            headers=self.headers,
+            params={
+                'project_name': self.project_name,
+                'model_name': self.model_name,
+                'model_version': version,
+            },
+            transport=self.atransport,
+        )
+        self.stats = resp_data['result']['stats']
+        self.metrics = resp_data['result']['metrics']
+
+        manager = AsyncProjectManager(
+            project_name=self.project_name,
+            api_token=self.api_token,
+            transport=self.atransport,
+        )
+        if self.project_id is not None:
+            manager.project_id = self.project_id
+            manager.init_endpoints()
+
+        self.model_info = await manager.aget_model_info(self.model_name)
+        self.project_id = manager.project_id
+        self.knowledge = await manager.aget_knowledge(
+            self.model_info.structured_knowledge_name
+        )
+        return self
+
+    async def apredict(self, input_data: Dict, max_concurrency: int = None) -> Dict:
+        """
+        Generate prediction from data, see WebModel.predict
+
+        :params input_data: input data for prediction, dictionary with data under key 'X'
+        :params max_concurrency: (optional) max number of chunks in flight for
+        large inputs, defaults to self.max_concurrency
+        :return: a dictionary with key `predictions` containing the predictions
+        """
+        # serializing the sample is cpu bound, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        chunking_needed = await loop.run_in_executor(
+            None, self.is_chunking_needed, input_data[self.data_key]
+        )
+        if chunking_needed:
+            return await self.abatch_predict(input_data, max_concurrency)
+
+        return await self.apredict_chunk(input_data)
+
+    async def abatch_predict(
+        self, input_data: Dict, max_concurrency: int = None
+    ) -> Dict:
+        """
+        Chunks data in input_data['X'] and sends the chunks concurrently,
+        at most max_concurrency at a time
+        """
+        if max_concurrency is None:
+            max_concurrency = self.max_concurrency
+
+        X = input_data[self.data_key]
+        Xother = {k: deepcopy(v) for k, v in input_data.items() if k != self.data_key}
+        # iter_chunks would otherwise serialize the sample on the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.chunk_sizer.seed_bytes_per_row, X, self.serialize_data
+        )
+        # shared by the workers, a chunk is only sliced when a worker is free
+        # so chunk_sizer feedback applies to the chunks still to come
+        chunks = enumerate(self.iter_chunks(X))
+        out = {}
+
+        async def _worker():
+            for i, Xi in chunks:
+                chunk = {self.data_key: Xi, **Xother}
+                resp = await self.apredict_chunk_with_retry(chunk)
+                out[i] = resp[self.output_key]
+
+        workers = [
+            asyncio.ensure_future(_worker()) for _ in range(max(max_concurrency, 1))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        predictions = self.merge_items([out[i] for i in range(len(out))], type(X))
+        return {self.output_key: predictions}
+
+    async def apredict_chunk_with_retry(self, input_data: Dict) -> Dict:
+        attempt = 0
+        while True:
+            try:
+                return await self.apredict_chunk(input_data)
+            except PayloadTooLarge:
+                halves = self.split_chunk(input_data)
+                if halves is None:
+                    raise
+
+                preds = [
+                    (await self.apredict_chunk_with_retry(x))[self.output_key]
+                    for x in halves
+                ]
+                dtype = type(input_data[self.data_key])
+                return {self.output_key: self.merge_items(preds, dtype)}
+            except (ConnectionError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+
+                wait = self.retry_backoff * 2**attempt
+                logger.warning(f'chunk failed ({e}), retrying in {wait}s')
+                await asyncio.sleep(wait)
+                attempt += 1
+
+    async def apredict_chunk(self, input_data: Dict) -> Dict:
+        """
+        Send a single inference request for input_data, without chunking
+        """
+        request_kwargs, types_dict = self.build_prediction_request(input_data)
+        rows = self.count_items(input_data[self.data_key])
+        nbytes = len(request_kwargs['data'])
+        start = time.perf_counter()
+        try:
+            headers, content = await async_make_raw_request(
+                'post',
+                self.PREDICTION_ENDPOINT,
+                transport=self.atransport,
+                **request_kwargs,
+            )
+        except PayloadTooLarge:
+            self.chunk_sizer.observe_payload_error(nbytes)
+            raise
+        except UnsupportedMediaType:
+            if not self.fall_back_to_json(request_kwargs):
+                raise
+
+            return await self.apredict_chunk(input_data)
+
+        latency = time.perf_counter() - start
+        self.chunk_sizer.observe(rows, nbytes, latency)
+        return self.decode_prediction_response(
+            headers.get('Content-Type'), content, types_dict
+        )
+
+    async def aclose(self):
+        await self.atransport.close()
+
+    async def __aenter__(self) -> 'AsyncWebModel':
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
@@ -1,24 +1,35 @@
 import os
+import random
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import pandas as pd
+import requests
 from aitomatic.api.client import get_api_root, ProjectManager
+from aitomatic.api.exceptions import RequestRejected
+from aitomatic.api.transport import Transport
+from aitomatic.api.tuning_utils import get_size
 from aitomatic.api import model_params as mp
 from aitomatic.dsl.arl_handler import ARLHandler
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Callable, Dict, Optional
 from aitomatic.objects.dataset import Dataset
 
 API_TOKEN = os.getenv("AITOMATIC_API_TOKEN")
+# statuses of jobs that have not finished
+PENDING_STATUSES = ["training"]
 
 
 class ModelBuilder:
-    def __init__(self, project_name=None, api_token=None):
+    def __init__(self, project_name=None, api_token=None, transport: Transport = None):
         if api_token is None:
             api_token = os.getenv("AITOMATIC_API_TOKEN")
 
         if project_name is None:
             project_name = os.getenv("AITOMATIC_PROJECT_NAME")
 
-        self.project = ProjectManager(project_name=project_name, api_token=api_token)
+        self.project = ProjectManager(
+            project_name=project_name, api_token=api_token, transport=transport
+        )
+        self.transport = self.project.transport
         self.headers = {
             "accept": "application/json",
             "authorization": api_token,
@@ -49,28 +60,51 @@ class ModelBuilder:
         mapping_data: Any = None,
         metadata: Any = None,
     ):
-        if model_type not in mp.K1ST:
-            raise ValueError(
-                f"Invalid K1st model type {model_type}. " f"Must be in {mp.K1ST}"
-            )
-
         if not self.is_model_name_unique(model_name):
             raise ValueError(
                 f"model_name not unique. "
                 f"model_name must be unique to build new model"
             )
 
-        # if label columns is empty, get from knowledge
-        if not bool(label_columns):
-            if model_type == "ORACLE":
-                knowledge = self.project.get_knowledge(knowledge_name)
-                label_columns = {k: None for k in knowledge.conclusions["conclusions"]}
-            elif model_type == "COLLABORATOR":
-                raise ValueError("Please specify label_columns for COLLABORATOR model")
-            else:
-                raise ValueError(f"Invalid model_type {model_type}")
-
-        payload = {
+        payload = self.get_build_payload(
+            model_type,
+            model_name,
+            knowledge_name,
+            data_name,
+            ml_models=ml_models,
+            label_columns=label_columns,
+            threshold=threshold,
+            membership_error_width=membership_error_width,
+            mapping_data=mapping_data,
+            metadata=metadata,
+        )
+        return self.submit_model(payload)
+
+    def get_build_payload(
+        self,
+        model_type: str,
+        model_name: str,
+        knowledge_name: str,
+        data_name: str,
+        ml_models: List[Any] = [],
+        label_columns: Dict[str, Optional[Any]] = {},
+        threshold: Any = {},
+        membership_error_width: Any = {},
+        mapping_data: Any = None,
+        metadata: Any = None,
+    ) -> dict:
+        """
+        request body of a model build, without checking model_name
+        """
+        if model_type not in mp.K1ST:
+            raise ValueError(
+                f"Invalid K1st model type {model_type}. " f"Must be in {mp.K1ST}"
+            )
+
+        label_columns = self.get_label_columns(
+            model_type, knowledge_name, label_columns
+        )
+        return {
             "model_type": model_type,
             "project": self.project.project_name,
             "model_name": model_name,
@@ -84,7 +118,64 @@ class ModelBuilder:
             "mapping_data": mapping_data,
             "metadata": metadata,
         }
-        resp = self.project.make_request("post", self.MODEL_BUILD, json=payload)
+
+    def get_label_columns(
+        self,
+        model_type: str,
+        knowledge_name: str,
+        label_columns: Dict[str, Optional[Any]] = {},
+    ) -> Dict[str, Optional[Any]]:
+        """
+        label_columns, or when empty the conclusions of the knowledge for
+        ORACLE models
+        """
+        if bool(label_columns):
+            return label_columns
+
+        if model_type == "ORACLE":
+            knowledge = self.project.get_knowledge(knowledge_name)
+            return {k: None for k in knowledge.conclusions["conclusions"]}
+        elif model_type == "COLLABORATOR":
+            raise ValueError("Please specify label_columns for COLLABORATOR model")
+        else:
+            raise ValueError(f"Invalid model_type {model_type}")
+
+    def submit_model(self, payload: dict, retries: int = 0, retry_wait: float = 1):
+        """
+        post a build request made by get_build_payload
+
+        :param retries: attempts after a failed post, waiting retry_wait
+        seconds, doubled every attempt. Only connection errors, timeouts and
+        5xx or 429 responses are retried, other 4xx raise RequestRejected at
+        once. A model created by a post that failed on the way back is found
+        by name instead of posted again.
+        """
+        model_name = payload["model_name"]
+        for attempt in range(retries + 1):
+            try:
+                resp = self.project.make_request(
+                    "post", self.MODEL_BUILD, json=payload
+                )
+                break
+            except RequestRejected:
+                raise
+            except (ConnectionError, requests.RequestException):
+                # the next lookup of model_name downloads the model listing again
+                self.project.index.invalidate("model", name=model_name)
+                if attempt == retries:
+                    raise
+
+            # the failed post may still have created the model, checked outside
+            # the handler so a failed lookup only costs this attempt
+            try:
+                if not self.is_model_name_unique(model_name):
+                    return self.project.get_index_entry("model", model_name)
+            except (ConnectionError, requests.RequestException) as e:
+                print(f"Checking whether {model_name} was created, e =", e)
+
+            time.sleep(retry_wait * 2**attempt)
+
+        self.project.index.invalidate("model", name=model_name)
         return resp
 
     def get_base_model_params(self, model_type: str, knowledge_set_name: str, **kwargs):
@@ -133,13 +224,37 @@ class ModelBuilder:
         mapping_data: Any,
         label_columns: Any,
         metadata: Any,
+        max_workers: int = 8,
+        retries: int = 2,
+        retry_wait: float = 1,
     ) -> pd.DataFrame:
-        model_log = []
-        print("Creating training jobs")
-        for i, item in enumerate(tuning_params):
-            test_params = {**item}
-            model_name = f"{base_name} {i}"
-            resp = self.build_model(
+        """
+        submit one training job per item of tuning_params, named
+        `base_name i`. Names are checked against one model listing before
+        anything is posted and the posts run on at most max_workers threads.
+        Jobs whose post still fails after retries get status error.
+
+        :param retries: see submit_model
+        :return: one row per job with its params, id, model_name, status and
+        submit_seconds, the time its post took with retries
+        """
+        names = (f"{base_name} {i}" for i in range(get_size(tuning_params)))
+        self.project.refresh_index(["model"])
+        taken = [n for n in names if self.project.index.get("model", n) is not None]
+        if len(taken) > 0:
+            raise ValueError(
+                f"model_name not unique: {taken}. "
+                f"model_name must be unique to build new model"
+            )
+
+        # shared by every job, fetched once
+        label_columns = self.get_label_columns(
+            model_type, knowledge_name, label_columns
+        )
+
+        def _submit(model_name, item):
+            # payloads are built by the workers, never all held at once
+            payload = self.get_build_payload(
                 model_type,
                 model_name,
                 knowledge_name,
@@ -149,13 +264,41 @@ class ModelBuilder:
                 metadata=metadata,
                 **item,
             )
-            print(f'Training model {model_name}: {resp["id"]}')
-            test_params["id"] = resp["id"]
-            test_params["model_name"] = model_name
-            model_log.append(test_params)
-        model_df = pd.DataFrame(model_log)
-        model_df["status"] = "training"
-        return model_df
+            start = time.perf_counter()
+            try:
+                resp = self.submit_model(payload, retries, retry_wait)
+                id_, status = resp["id"], "training"
+                print(f"Training model {model_name}: {id_}")
+            except (ConnectionError, requests.RequestException) as e:
+                id_, status = None, "error"
+                print(f"Creating training job {model_name}, e =", e)
+
+            return {
+                **item,
+                "id": id_,
+                "model_name": model_name,
+                "status": status,
+                "submit_seconds": time.perf_counter() - start,
+            }
+
+        print("Creating training jobs")
+        model_log = {}
+        # items are only taken from tuning_params when a worker is free
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for i, item in enumerate(tuning_params):
+                futures[pool.submit(_submit, f"{base_name} {i}", item)] = i
+                if len(futures) < max_workers:
+                    continue
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model_log[futures.pop(future)] = future.result()
+
+            for future, i in futures.items():
+                model_log[i] = future.result()
+
+        return pd.DataFrame([model_log[i] for i in sorted(model_log)])
 
     def check_model_status(self, model_name):
         try:
@@ -165,24 +308,80 @@ class ModelBuilder:
             print("Checking model status, e =", e)
             return "training"
 
-    def wait_for_tuning_to_complete(self, model_df: pd.DataFrame, sleep_time: int = 30):
+    def get_model_statuses(
+        self, model_names: List[str], max_workers: int = 8
+    ) -> Dict[str, str]:
+        """
+        status of every model from one model listing download. Models the
+        listing has no status for are checked one by one with at most
+        max_workers concurrent requests.
+        """
+        statuses = {}
+        try:
+            self.project.refresh_index(["model"])
+            for name in model_names:
+                entry = self.project.index.get("model", name)
+                if entry is not None and entry.get("status"):
+                    statuses[name] = entry["status"].lower()
+        except (ConnectionError, requests.RequestException) as e:
+            print("Checking model status, e =", e)
+
+        missing = [name for name in model_names if name not in statuses.keys()]
+        if len(missing) > 0:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                checked = pool.map(self.check_model_status, missing)
+                statuses.update(zip(missing, checked))
+
+        return statuses
+
+    def wait_for_tuning_to_complete(
+        self,
+        model_df: pd.DataFrame,
+        sleep_time: float = 30,
+        max_sleep_time: float = 300,
+        backoff: float = 2,
+        jitter: float = 0.1,
+        on_complete: Callable[[pd.Series], Any] = None,
+        max_workers: int = 8,
+    ):
+        """
+        poll the status of the models still training until none is left.
+        The wait between polls starts at sleep_time and is multiplied by
+        backoff while no job finishes, up to max_sleep_time.
+
+        :param jitter: fraction of the wait randomly added or removed, so
+        concurrent pollers spread out
+        :param on_complete: (optional) called with the row of every job as
+        soon as it leaves training
+        :param max_workers: see get_model_statuses
+        """
         print("Waiting for training jobs to complete")
+        delay = sleep_time
         while True:
-            for i, row in model_df.iterrows():
-                model_name = row["model_name"]
-                status = self.check_model_status(model_name)
-                model_df.loc[i, "status"] = status
-
-            success_length = len(model_df[model_df["status"] == "success"])
-            error_length = len(model_df[model_df["status"] == "error"])
-            df_length = len(model_df)
+            pending = model_df.index[model_df["status"].isin(PENDING_STATUSES)]
+            names = model_df.loc[pending, "model_name"]
+            statuses = self.get_model_statuses(list(names.unique()), max_workers)
+            model_df.loc[pending, "status"] = names.map(statuses)
+
+            done = pending[~model_df.loc[pending, "status"].isin(PENDING_STATUSES)]
+            if on_complete is not None:
+                for i in done:
+                    on_complete(model_df.loc[i])
+
+            counts = model_df["status"].value_counts()
             print(
-                f"Waiting for training jobs to complete: [{success_length} success, {error_length} error, {df_length} total]"
+                "Waiting for training jobs to complete: ["
+                f"{counts.get('success', 0)} success, {counts.get('error', 0)} error, "
+                f"{len(model_df)} total]"
             )
-            if model_df["status"].isin(["training"]).any():
-                time.sleep(sleep_time)
-            else:
+            if not model_df["status"].isin(PENDING_STATUSES).any():
                 break
+
+            if len(done) > 0:
+                delay = sleep_time
+
+            time.sleep(delay * random.uniform(1 - jitter, 1 + jitter))
+            delay = min(delay * backoff, max_sleep_time)
         return model_df
 
     def get_metadata(seft, data: Dataset, mapping_column: dict):
@@ -0,0 +1,212 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.wire_format import to_frame
+
+# rough per entry overhead of the key, tuple and OrderedDict node in bytes
+ENTRY_OVERHEAD = 200
+SQLITE_MAX_PARAMS = 900
+
+
+def hash_rows(X) -> Tuple[str, np.ndarray]:
+    """
+    Stable, vectorized hash of every row of X
+
+    :return: hash of the schema (column names and dtypes) and one uint64 hash
+    per row. Rows only match within the same schema.
+    """
+    df = to_frame(X)
+    schema = [f'{c}:{t}' for c, t in df.dtypes.items()]
+    schema_hash = pd.util.hash_pandas_object(pd.Index(schema), index=False)
+    schema_key = format(int(np.bitwise_xor.reduce(schema_hash.values)), 'x')
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return schema_key, row_hashes
+
+
+class PredictionCache:
+    """
+    Prediction cache keyed by model name, model version and a content hash of
+    every input row. A memory-bounded LRU tier is backed by an optional SQLite
+    file, so predictions also survive restarts.
+
+    Predictions cached under model_version 'latest' go stale when the model is
+    retrained, pin a version or call clear().
+
+    Ex:
+    cache = PredictionCache(max_bytes=256 * 1024**2, path='predictions.sqlite')
+    model = WebModel('MyModelName', cache=cache)
+    model.predict({'X': window})
+    print(cache.stats())
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024**2, path: str = None):
+        """
+        :param max_bytes: approximate memory budget of the LRU tier
+        :param path: (optional) SQLite file for the on-disk tier
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.columns = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS predictions ('
+                'namespace TEXT, row_hash INTEGER, value TEXT, '
+                'PRIMARY KEY (namespace, row_hash))'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS columns (namespace TEXT PRIMARY KEY, value TEXT)'
+            )
+            for namespace, value in self.db.execute('SELECT * FROM columns'):
+                self.columns[namespace] = json.loads(value)
+
+    @staticmethod
+    def get_namespace(model_name: str, model_version: str, schema_key: str) -> str:
+        return f'{model_name}\x1f{model_version}\x1f{schema_key}'
+
+    def get_many(self, namespace: str, row_hashes: np.ndarray) -> Tuple[np.ndarray, List]:
+        """
+        Look up cached predictions
+
+        :return: boolean mask of hits and the cached prediction row (tuple) for
+        every hit, None for misses
+        """
+        keys = [(namespace, int(h)) for h in row_hashes]
+        values = [None] * len(keys)
+        missing = []
+        with self.lock:
+            for i, key in enumerate(keys):
+                value = self.entries.get(key)
+                if value is None:
+                    missing.append(i)
+                else:
+                    self.entries.move_to_end(key)
+                    values[i] = value
+
+            hits = len(keys) - len(missing)
+            if self.db is not None and len(missing) > 0:
+                found = self.read_disk(namespace, [keys[i][1] for i in missing])
+                still_missing = []
+                for i in missing:
+                    value = found.get(keys[i][1])
+                    if value is None:
+                        still_missing.append(i)
+                    else:
+                        values[i] = value
+                        self.add_entry(keys[i], value)
+
+                self.disk_hits += len(missing) - len(still_missing)
+                missing = still_missing
+
+            self.hits += hits
+            self.misses += len(missing)
+
+        mask = np.ones(len(keys), dtype=bool)
+        mask[missing] = False
+        return mask, values
+
+    def put_many(self, namespace: str, row_hashes: np.ndarray, predictions):
+        """
+        Cache predictions, one row per row hash
+        """
+        df = to_frame(predictions)
+        rows = list(zip(*[df[c].tolist() for c in df.columns]))
+        with self.lock:
+            self.columns[namespace] = list(df.columns)
+            for h, row in zip(row_hashes, rows):
+                self.add_entry((namespace, int(h)), row)
+
+            if self.db is not None:
+                self.write_disk(namespace, row_hashes, rows, list(df.columns))
+
+    def get_columns(self, namespace: str) -> List[str]:
+        return self.columns.get(namespace)
+
+    def add_entry(self, key, value: tuple):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+
+        self.entries[key] = value
+        self.nbytes += ENTRY_OVERHEAD + 16 * len(value)
+        while self.nbytes > self.max_bytes and len(self.entries) > 0:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= ENTRY_OVERHEAD + 16 * len(old)
+
+    def read_disk(self, namespace: str, row_hashes: List[int]) -> dict:
+        found = {}
+        for i in range(0, len(row_hashes), SQLITE_MAX_PARAMS):
+            batch = [to_sqlite_int(h) for h in row_hashes[i : i + SQLITE_MAX_PARAMS]]
+            marks = ','.join('?' * len(batch))
+            query = (
+                f'SELECT row_hash, value FROM predictions '
+                f'WHERE namespace = ? AND row_hash IN ({marks})'
+            )
+            for row_hash, value in self.db.execute(query, [namespace, *batch]):
+                found[from_sqlite_int(row_hash)] = tuple(json.loads(value))
+
+        return found
+
+    def write_disk(self, namespace: str, row_hashes, rows: List[tuple], columns):
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO columns VALUES (?, ?)',
+                (namespace, json.dumps(columns)),
+            )
+            self.db.executemany(
+                'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)',
+                [
+                    (namespace, to_sqlite_int(int(h)), json.dumps(row))
+                    for h, row in zip(row_hashes, rows)
+                ],
+            )
+
+    def stats(self) -> dict:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / total if total else 0.0,
+            'entries': len(self.entries),
+            'bytes': self.nbytes,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.columns.clear()
+            self.nbytes = 0
+            if self.db is not None:
+                with self.db:
+                    self.db.execute('DELETE FROM predictions')
+                    self.db.execute('DELETE FROM columns')
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def to_sqlite_int(h: int) -> int:
+    """
+    SQLite integers are signed 64 bit, store uint64 hashes as int64
+    """
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def from_sqlite_int(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
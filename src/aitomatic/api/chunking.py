@@ -0,0 +1,180 @@
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+
+def count_items(X) -> int:
+    """
+    Count items in dataset
+    """
+    if hasattr(X, 'shape'):
+        return X.shape[0]
+
+    return len(X)
+
+
+def sample_items(X, n: int):
+    """
+    Evenly spaced sample of at most n items of X, same type as X
+    """
+    total = count_items(X)
+    if total <= n:
+        return X
+
+    return take_items(X, np.linspace(0, total - 1, n).astype(int))
+
+
+def take_items(X, idx: np.ndarray):
+    """
+    Items of X at positions idx, same type as X
+    """
+    if isinstance(X, dict):
+        return pd.DataFrame(X).iloc[idx].to_dict()
+    elif isinstance(X, (pd.DataFrame, pd.Series)):
+        return X.iloc[idx]
+    elif isinstance(X, np.ndarray):
+        return X[idx]
+    else:
+        return [X[i] for i in idx]
+
+
+class ChunkSizer:
+    """
+    Picks how many rows go into each inference request so the serialized
+    request body stays under a byte budget.
+
+    Bytes per row are first estimated by serializing a sample of the data,
+    then corrected with the size of every request actually sent. In adaptive
+    mode the byte budget itself is tuned: it grows while throughput (rows/s)
+    improves, falls back to the best size seen when it gets worse, and is
+    capped below any size the server rejected as too large.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        adaptive: bool = False,
+        sample_rows: int = 100,
+        smoothing: float = 0.3,
+        growth: float = 1.25,
+        tolerance: float = 0.1,
+        decay: float = 0.98,
+        min_size: int = 1024,
+    ):
+        """
+        :param chunk_size: byte budget per request
+        :param adaptive: tune the byte budget from observed latency and
+        payload-limit errors
+        :param sample_rows: number of rows serialized to estimate bytes per row
+        :param smoothing: weight of a new observation in the bytes per row
+        estimate
+        :param growth: factor the budget grows by while throughput improves
+        :param tolerance: relative throughput drop that triggers fall back to
+        the best budget seen
+        :param decay: per observation decay of the best throughput seen, so the
+        sizer keeps tracking a changing server
+        :param min_size: smallest byte budget the adaptive mode will use
+        """
+        self.chunk_size = chunk_size
+        self.max_bytes = chunk_size
+        self.adaptive = adaptive
+        self.sample_rows = sample_rows
+        self.smoothing = smoothing
+        self.growth = growth
+        self.tolerance = tolerance
+        self.decay = decay
+        self.min_size = min_size
+        self.bytes_per_row = None
+        self.ceiling = None
+        self.best_throughput = 0
+        self.best_bytes = chunk_size
+        self.lock = threading.Lock()
+
+    def estimate_bytes_per_row(self, X, serialize: Callable[[Any], str]) -> float:
+        """
+        Estimate serialized bytes per row from a sample of X, replaces the
+        running estimate since X may be shaped differently than earlier data
+        """
+        sample = sample_items(X, self.sample_rows)
+        rows = count_items(sample)
+        if rows == 0:
+            return 0
+
+        nbytes = len(serialize(sample))
+        with self.lock:
+            self.bytes_per_row = nbytes / rows
+            return self.bytes_per_row
+
+    def seed_bytes_per_row(self, X, serialize: Callable[[Any], str]) -> float:
+        """
+        Estimate bytes per row from a sample of X only when there is no
+        estimate yet, so corrections from requests already sent are kept
+        """
+        with self.lock:
+            bytes_per_row = self.bytes_per_row
+
+        if bytes_per_row is None:
+            return self.estimate_bytes_per_row(X, serialize)
+
+        return bytes_per_row
+
+    def estimate_size(self, X, serialize: Callable[[Any], str]) -> float:
+        """
+        Estimated size in bytes of X once serialized, see seed_bytes_per_row
+        """
+        return self.seed_bytes_per_row(X, serialize) * count_items(X)
+
+    def rows_per_chunk(self) -> int:
+        with self.lock:
+            if not self.bytes_per_row:
+                return 1
+
+            return max(int(self.max_bytes / self.bytes_per_row), 1)
+
+    def observe(self, rows: int, nbytes: int, latency: float = None):
+        """
+        Record a successful request of rows items and nbytes body size that
+        took latency seconds
+        """
+        if rows == 0:
+            return
+
+        with self.lock:
+            bpr = nbytes / rows
+            if self.bytes_per_row is None:
+                self.bytes_per_row = bpr
+            else:
+                a = self.smoothing
+                self.bytes_per_row = a * bpr + (1 - a) * self.bytes_per_row
+
+            if self.adaptive and latency is not None:
+                self._adapt(rows, nbytes, latency)
+
+    def observe_payload_error(self, nbytes: int):
+        """
+        Record a request of nbytes body size rejected as too large
+        """
+        with self.lock:
+            if self.ceiling is None or nbytes < self.ceiling:
+                self.ceiling = nbytes
+
+            self.max_bytes = min(self.max_bytes, nbytes // 2)
+            self.best_bytes = min(self.best_bytes, self.max_bytes)
+            self.max_bytes = max(self.max_bytes, self.min_size)
+
+    def _adapt(self, rows: int, nbytes: int, latency: float):
+        throughput = rows / max(latency, 1e-6)
+        self.best_throughput *= self.decay
+        if throughput >= self.best_throughput:
+            self.best_throughput = throughput
+            self.best_bytes = max(nbytes, self.min_size)
+            self.max_bytes = self.best_bytes * self.growth
+        elif throughput < self.best_throughput * (1 - self.tolerance):
+            self.max_bytes = self.best_bytes
+
+        if self.ceiling is not None:
+            self.max_bytes = min(self.max_bytes, 0.9 * self.ceiling)
+
+        self.max_bytes = max(int(self.max_bytes), self.min_size)
@@ -1,6 +1,15 @@
 import requests
 import json
 import os
+from typing import List, Mapping, Tuple
+from aitomatic.api.exceptions import (
+    PayloadTooLarge,
+    RequestRejected,
+    UnsupportedMediaType,
+)
+from aitomatic.api.project_index import INDEX_KINDS, ProjectIndex
+from aitomatic.api.transport import AsyncTransport, Transport, get_default_transport
+from aitomatic.dsl.arl_cache import get_default_knowledge_cache
 from aitomatic.dsl.arl_handler import ARLHandler
 from aitomatic.objects.model import Model
 from aitomatic.objects.dataset import Dataset
@@ -30,7 +39,7 @@ def get_api_root(aitomatic_environment=None):
     return model_api_root, client_api_root
 
 
-def get_project_id(project_name: str, api_token: str = None):
+def get_project_request(project_name: str, api_token: str = None):
     if api_token is None:
         api_token = os.getenv('AITOMATIC_API_TOKEN')
 
@@ -42,27 +51,58 @@ def get_project_id(project_name: str, api_token: str = None):
         'accept': 'application/json',
     }
     data = {'project_name': project_name}
-    resp = requests.post(url, headers=headers, json=data)
-    # Handle request errors
-    if resp.status_code != 200:
-        err = f'{resp.status_code}: {resp.content}'
-        raise ConnectionError(err)
+    return url, headers, data
 
-    resp_content = json.loads(resp.content)
+
+def get_project_id(
+    project_name: str, api_token: str = None, transport: Transport = None
+):
+    url, headers, data = get_project_request(project_name, api_token=api_token)
+    resp_content = make_request(
+        'post', url, headers=headers, json=data, transport=transport
+    )
+    id_ = resp_content['id']
+    return id_
+
+
+async def aget_project_id(
+    project_name: str, api_token: str = None, transport: AsyncTransport = None
+):
+    url, headers, data = get_project_request(project_name, api_token=api_token)
+    resp_content = await async_make_request(
+        'post', url, headers=headers, json=data, transport=transport
+    )
     id_ = resp_content['id']
     return id_
 
 
 class ProjectManager:
-    def __init__(self, project_name: str = None, api_token: str = None):
+    def __init__(
+        self,
+        project_name: str = None,
+        api_token: str = None,
+        transport: Transport = None,
+        index_ttl: float = 60,
+    ):
+        """
+        :param index_ttl: seconds the model, data and knowledge listings are
+        used for name lookups before downloading them again, see ProjectIndex
+        """
         if api_token is None:
             api_token = os.getenv('AITOMATIC_API_TOKEN')
 
+        if transport is None:
+            transport = get_default_transport()
+
+        self.transport = transport
+        self.index = ProjectIndex(ttl=index_ttl)
         if project_name is None:
             project_name = os.getenv('AITOMATIC_PROJECT_NAME')
             project_id = os.getenv('AITOMATIC_PROJECT_ID')
         else:
-            project_id = get_project_id(project_name, api_token=api_token)
+            project_id = get_project_id(
+                project_name, api_token=api_token, transport=transport
+            )
 
         self.project_name = project_name
         self.project_id = project_id
@@ -82,6 +122,45 @@ class ProjectManager:
         self.MODEL_BUILD = f'{self.API_ROOT}/models'
         self.DATA_LIST = f'{self.API_ROOT}/{self.project_id}/data'
         self.DATA_DETAIL = lambda id_: f'{self.API_ROOT}/data/' + id_
+        self.LISTS = {
+            'model': self.MODELS_LIST,
+            'data': self.DATA_LIST,
+            'knowledge': self.KNOWLEDGE_LIST,
+        }
+
+    def refresh_index(self, kinds: List[str] = None):
+        """
+        download the listings of kinds into the name index
+
+        :param kinds: (optional) 'model', 'data' and/or 'knowledge', defaults
+        to all
+        """
+        self.resolve_project_id()
+        if kinds is None:
+            kinds = list(INDEX_KINDS.keys())
+
+        for kind in kinds:
+            self.index.update(kind, self.make_request('get', self.LISTS[kind]))
+
+    def resolve_project_id(self):
+        """
+        project id the listing urls are built with, resolved in __init__
+        """
+        return self.project_id
+
+    def get_index_entry(self, kind: str, name: str) -> dict:
+        """
+        listing entry of name, downloading the listing only if the index is
+        stale
+        """
+        if self.index.needs_refresh(kind, name):
+            self.refresh_index([kind])
+
+        entry = self.index.get(kind, name)
+        if entry is None:
+            raise ValueError(f'{INDEX_KINDS[kind]} {name} not found.')
+
+        return entry
 
     def get_model_info(self, model_name: str):
         id_ = self.get_model_id(model_name)
@@ -91,12 +170,7 @@ class ProjectManager:
             return model
 
     def get_model_id(self, model_name: str):
-        model_list = self.make_request('get', self.MODELS_LIST)
-        id_ = [x['id'] for x in model_list if x['name'].lower() == model_name.lower()]
-        if len(id_) == 0:
-            raise ValueError(f'model {model_name} not found.')
-
-        return id_[0]
+        return self.get_index_entry('model', model_name)['id']
 
     def get_data_info(self, data_name: str):
         id_ = self.get_data_id(data_name)
@@ -105,39 +179,26 @@ class ProjectManager:
             return Dataset(resp)
 
     def get_data_id(self, data_name: str):
-        data_list = self.make_request('get', self.DATA_LIST)
-        id_ = [x['id'] for x in data_list if x['name'].lower() == data_name.lower()]
-        if len(id_) == 0:
-            raise ValueError(f'Dataset {data_name} not found.')
-
-        return id_[0]
+        return self.get_index_entry('data', data_name)['id']
 
     def make_request(self, request_type: str, url: str, headers=None, **kwargs):
         if headers is None:
             headers = self.headers
 
+        kwargs.setdefault('transport', self.transport)
         return make_request(request_type, url, headers=headers, **kwargs)
 
     def get_knowledge_info(self, knowledge_set_name: str) -> dict:
         id_ = self.get_knowledge_id(knowledge_set_name)
-        data = make_request('get', self.KNOWLEDGE_DETAIL(id_), headers=self.headers)
+        data = self.make_request('get', self.KNOWLEDGE_DETAIL(id_))
         return data
 
     def get_knowledge(self, knowledge_set_name: str) -> ARLHandler:
         knowledge = self.get_knowledge_info(knowledge_set_name)['structured']
-        return ARLHandler(knowledge)
+        return get_default_knowledge_cache().get_handler(knowledge)
 
     def get_knowledge_id(self, knowledge_set_name: str):
-        knowledges = make_request('get', self.KNOWLEDGE_LIST, headers=self.headers)
-        id_ = [
-            x['id']
-            for x in knowledges
-            if x['name'].lower() == knowledge_set_name.lower()
-        ]
-        if len(id_) == 0:
-            raise ValueError(f'knowledge set {knowledge_set_name} not found.')
-
-        return id_[0]
+        return self.get_index_entry('knowledge', knowledge_set_name)['id']
 
     # TODO: Move to model builder class
 
@@ -156,18 +217,191 @@ class ProjectManager:
         return result
 
 
-def make_request(request_type: str, url: str, **kwargs):
-    func = getattr(requests, request_type)
-    if func is None:
-        raise ValueError(
-            f'Invalid request type {request_type}. ' f'Must be get, post or put'
-        )
-
-    resp = func(url, **kwargs)
-    # Handle request errors
-    if resp.status_code != 200:
-        err = f'{resp.status_code}: {resp.content}'
+def check_response(status_code: int, content: bytes):
+    """
+    Raise the matching ConnectionError for unsuccessful responses
+    """
+    err = f'{status_code}: {content}'
+    if status_code == 413:
+        raise PayloadTooLarge(err)
+    if status_code == 415:
+        raise UnsupportedMediaType(err)
+    # timeouts and rate limits may pass on a later attempt
+    if 400 <= status_code < 500 and status_code not in (408, 429):
+        raise RequestRejected(err)
+    if status_code != 200:
         raise ConnectionError(err)
 
+
+def make_request(request_type: str, url: str, transport: Transport = None, **kwargs):
+    resp = make_raw_request(request_type, url, transport=transport, **kwargs)
     resp_content = json.loads(resp.content)
     return resp_content
+
+
+def make_raw_request(
+    request_type: str, url: str, transport: Transport = None, **kwargs
+) -> requests.Response:
+    """
+    Make request and check the status, without decoding the response body
+    """
+    if transport is None:
+        transport = get_default_transport()
+
+    resp = transport.request(request_type, url, **kwargs)
+    # Handle request errors
+    check_response(resp.status_code, resp.content)
+    return resp
+
+
+async def async_make_request(
+    request_type: str, url: str, transport: AsyncTransport = None, **kwargs
+):
+    _, content = await async_make_raw_request(
+        request_type, url, transport=transport, **kwargs
+    )
+    resp_content = json.loads(content)
+    return resp_content
+
+
+async def async_make_raw_request(
+    request_type: str, url: str, transport: AsyncTransport = None, **kwargs
+) -> Tuple[Mapping[str, str], bytes]:
+    """
+    Make request and check the status, without decoding the response body
+
+    :return: response headers and content
+    """
+    if transport is None:
+        raise ValueError('async_make_request requires an AsyncTransport')
+
+    status, headers, content = await transport.request(request_type, url, **kwargs)
+    # Handle request errors
+    check_response(status, content)
+    return headers, content
+
+
+class AsyncProjectManager(ProjectManager):
+    """
+    ProjectManager with asyncio versions of the model, data and knowledge
+    lookups. The project id is resolved on the first lookup instead of in the
+    constructor.
+
+    Ex:
+    manager = AsyncProjectManager('MyProject', transport=AsyncTransport())
+    model = await manager.aget_model_info('MyModelName')
+    """
+
+    def __init__(
+        self,
+        project_name: str = None,
+        api_token: str = None,
+        transport: AsyncTransport = None,
+        index_ttl: float = 60,
+    ):
+        if api_token is None:
+            api_token = os.getenv('AITOMATIC_API_TOKEN')
+
+        if transport is None:
+            transport = AsyncTransport()
+
+        self.atransport = transport
+        self.index = ProjectIndex(ttl=index_ttl)
+        # sync methods inherited from ProjectManager keep working, they
+        # resolve the project id with a blocking request when it is missing
+        self.transport = get_default_transport()
+        self.api_token = api_token
+        if project_name is None:
+            project_name = os.getenv('AITOMATIC_PROJECT_NAME')
+            project_id = os.getenv('AITOMATIC_PROJECT_ID')
+        else:
+            project_id = None
+
+        self.project_name = project_name
+        self.project_id = project_id
+        self.headers = {
+            'accept': 'application/json',
+            'authorization': api_token,
+            'conent-type': 'application/json',
+        }
+        self.init_endpoints()
+
+    def resolve_project_id(self):
+        if self.project_id is None:
+            self.project_id = get_project_id(
+                self.project_name, api_token=self.api_token, transport=self.transport
+            )
+            self.init_endpoints()
+
+        return self.project_id
+
+    async def aresolve_project_id(self):
+        if self.project_id is None:
+            self.project_id = await aget_project_id(
+                self.project_name, api_token=self.api_token, transport=self.atransport
+            )
+            self.init_endpoints()
+
+        return self.project_id
+
+    async def amake_request(self, request_type: str, url: str, headers=None, **kwargs):
+        if headers is None:
+            headers = self.headers
+
+        kwargs.setdefault('transport', self.atransport)
+        return await async_make_request(request_type, url, headers=headers, **kwargs)
+
+    async def arefresh_index(self, kinds: List[str] = None):
+        """
+        async refresh_index
+        """
+        await self.aresolve_project_id()
+        if kinds is None:
+            kinds = list(INDEX_KINDS.keys())
+
+        for kind in kinds:
+            self.index.update(kind, await self.amake_request('get', self.LISTS[kind]))
+
+    async def aget_index_entry(self, kind: str, name: str) -> dict:
+        """
+        async get_index_entry
+        """
+        if self.index.needs_refresh(kind, name):
+            await self.arefresh_index([kind])
+
+        entry = self.index.get(kind, name)
+        if entry is None:
+            raise ValueError(f'{INDEX_KINDS[kind]} {name} not found.')
+
+        return entry
+
+    async def aget_model_info(self, model_name: str):
+        id_ = await self.aget_model_id(model_name)
+        resp = await self.amake_request('get', self.MODEL_DETAIL(id_))
+        if resp:
+            model = Model(resp)
+            return model
+
+    async def aget_model_id(self, model_name: str):
+        return (await self.aget_index_entry('model', model_name))['id']
+
+    async def aget_data_info(self, data_name: str):
+        id_ = await self.aget_data_id(data_name)
+        resp = await self.amake_request('get', self.DATA_DETAIL(id_))
+        if resp:
+            return Dataset(resp)
+
+    async def aget_data_id(self, data_name: str):
+        return (await self.aget_index_entry('data', data_name))['id']
+
+    async def aget_knowledge_info(self, knowledge_set_name: str) -> dict:
+        id_ = await self.aget_knowledge_id(knowledge_set_name)
+        data = await self.amake_request('get', self.KNOWLEDGE_DETAIL(id_))
+        return data
+
+    async def aget_knowledge(self, knowledge_set_name: str) -> ARLHandler:
+        knowledge = (await self.aget_knowledge_info(knowledge_set_name))['structured']
+        return get_default_knowledge_cache().get_handler(knowledge)
+
+    async def aget_knowledge_id(self, knowledge_set_name: str):
+        return (await self.aget_index_entry('knowledge', knowledge_set_name))['id']
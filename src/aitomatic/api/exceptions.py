@@ -1,2 +1,27 @@
 class MissingEnvironmentVariable(Exception):
     pass
+
+
+class RequestRejected(ConnectionError):
+    """
+    Server rejected the request itself (HTTP 4xx other than 408 and 429),
+    sending it again unchanged fails the same way
+    """
+
+    pass
+
+
+class PayloadTooLarge(RequestRejected):
+    """
+    Request body was rejected by the server as too large (HTTP 413)
+    """
+
+    pass
+
+
+class UnsupportedMediaType(RequestRejected):
+    """
+    Server does not accept the request body format (HTTP 415)
+    """
+
+    pass
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Iterable, List, Optional
+
+# listing kinds and the name used for them in errors
+INDEX_KINDS = {'model': 'model', 'data': 'Dataset', 'knowledge': 'knowledge set'}
+
+
+class ProjectIndex:
+    """
+    Index of a project's model, data and knowledge listings by lower-cased
+    name, so name to id lookups are dict lookups instead of a listing
+    download each. A kind is downloaded again when its listing is older than
+    ttl seconds, after invalidate, or when a name invalidated since the last
+    download is looked up.
+
+    Ex:
+    manager = ProjectManager('MyProject', index_ttl=300)
+    manager.get_model_id('MyModelName')  # downloads the model listing
+    manager.get_model_id('OtherModel')  # no request
+    manager.refresh_index()  # downloads every listing
+    """
+
+    def __init__(self, ttl: float = 60) -> None:
+        """
+        :param ttl: seconds a listing is used for, 0 downloads it on every
+        lookup
+        """
+        self.ttl = ttl
+        self.entries = {kind: {} for kind in INDEX_KINDS.keys()}
+        # monotonic time of the last download of each kind, None if stale
+        self.loaded = {kind: None for kind in INDEX_KINDS.keys()}
+        # names invalidated since the last download of each kind
+        self.pending = {kind: set() for kind in INDEX_KINDS.keys()}
+        self.refreshes = 0
+        self.lookups = 0
+        self.lock = threading.Lock()
+
+    def needs_refresh(self, kind: str, name: str = None) -> bool:
+        """
+        :param name: (optional) name about to be looked up
+        """
+        with self.lock:
+            loaded = self.loaded[kind]
+            if loaded is None or time.monotonic() - loaded >= self.ttl:
+                return True
+
+            return name is not None and name.lower() in self.pending[kind]
+
+    def update(self, kind: str, items: List[dict]):
+        """
+        replace the entries of kind with a downloaded listing, the first item
+        wins for names listed twice
+        """
+        entries = {}
+        for item in items:
+            entries.setdefault(item['name'].lower(), item)
+
+        with self.lock:
+            self.entries[kind] = entries
+            self.loaded[kind] = time.monotonic()
+            self.pending[kind] = set()
+            self.refreshes += 1
+
+    def get(self, kind: str, name: str) -> Optional[dict]:
+        """
+        :return: listing entry, id and summary, of name or None
+        """
+        with self.lock:
+            self.lookups += 1
+            return self.entries[kind].get(name.lower())
+
+    def invalidate(self, kinds: Iterable[str] = None, name: str = None):
+        """
+        mark kinds stale, or with name only that name, so the next lookup
+        downloads the listing again
+
+        :param kinds: (optional) kinds to invalidate, defaults to all
+        """
+        if kinds is None:
+            kinds = INDEX_KINDS.keys()
+        elif isinstance(kinds, str):
+            kinds = [kinds]
+
+        with self.lock:
+            for kind in kinds:
+                if name is None:
+                    self.loaded[kind] = None
+                else:
+                    self.entries[kind].pop(name.lower(), None)
+                    self.pending[kind].add(name.lower())
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'refreshes': self.refreshes,
+                'lookups': self.lookups,
+                'entries': {k: len(v) for k, v in self.entries.items()},
+            }
@@ -0,0 +1,109 @@
+import os
+from typing import Iterable, Iterator, List
+
+import fastparquet
+import pandas as pd
+
+from aitomatic.api.wire_format import to_frame
+
+
+def read_csv_chunks(path: str, chunksize: int = 100000, **kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Lazily read a csv file chunksize rows at a time
+
+    :param kwargs: passed to pandas.read_csv
+    """
+    with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def read_parquet_row_groups(
+    path: str, columns: List[str] = None, **kwargs
+) -> Iterator[pd.DataFrame]:
+    """
+    Lazily read a parquet file one row group at a time, only one row group is
+    held in memory
+
+    :param columns: (optional) columns to load, defaults to all
+    :param kwargs: passed to fastparquet.ParquetFile.iter_row_groups
+    """
+    pf = fastparquet.ParquetFile(path)
+    rows = 0
+    for chunk in pf.iter_row_groups(columns=columns, **kwargs):
+        if isinstance(chunk.index, pd.RangeIndex):
+            # no index stored, number rows across row groups like read_csv
+            chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+
+        rows += len(chunk)
+        yield chunk
+
+
+class ParquetSink:
+    """
+    Append predictions to a parquet file one chunk at a time, each write adds
+    a row group so memory stays flat
+
+    Ex:
+    with ParquetSink('predictions.parquet') as sink:
+        for predictions in model.predict_stream(read_csv_chunks('data.csv')):
+            sink.write(predictions)
+    """
+
+    def __init__(self, path: str, overwrite: bool = True, **kwargs):
+        """
+        :param path: parquet file to write
+        :param overwrite: replace an existing file, otherwise append to it
+        :param kwargs: passed to fastparquet.write
+        """
+        self.path = path
+        self.kwargs = kwargs
+        # rows written by this sink
+        self.rows = 0
+        self.started = not overwrite and os.path.exists(path)
+        # rows already in the file, positional indices continue after them
+        self.offset = 0
+        if self.started:
+            self.offset = fastparquet.ParquetFile(path).count()
+
+    def write(self, predictions):
+        """
+        Append predictions (DataFrame, Series, ndarray or dict) to the file
+        """
+        df = to_frame(predictions)
+        if len(df) == 0:
+            return
+
+        if isinstance(df.index, pd.RangeIndex):
+            # positional index restarts in every chunk, number rows in the file
+            start = self.offset + self.rows
+            df = df.set_axis(pd.RangeIndex(start, start + len(df)))
+
+        fastparquet.write(
+            self.path, df, write_index=True, append=self.started, **self.kwargs
+        )
+        self.started = True
+        self.rows += len(df)
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'ParquetSink':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_parquet_stream(predictions: Iterable, path: str, **kwargs) -> int:
+    """
+    Consume an iterable of predictions, e.g. WebModel.predict_stream, into a
+    parquet file
+
+    :return: number of rows written
+    """
+    with ParquetSink(path, **kwargs) as sink:
+        for chunk in predictions:
+            sink.write(chunk)
+
+    return sink.rows
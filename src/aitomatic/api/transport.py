@@ -0,0 +1,301 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Mapping, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+Timeout = Union[float, Tuple[float, float]]
+
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    '/inferencing': (10, 300),
+}
+REQUEST_TYPES = ['get', 'post', 'put', 'delete', 'head']
+
+
+def get_endpoint_timeout(
+    url: str, timeout: Timeout, endpoint_timeouts: Dict[str, Timeout]
+) -> Timeout:
+    """
+    Timeout for url, based on the longest matching endpoint fragment
+    """
+    matches = [k for k in endpoint_timeouts.keys() if k in url]
+    if len(matches) == 0:
+        return timeout
+
+    return endpoint_timeouts[max(matches, key=len)]
+
+
+def check_request_type(request_type: str):
+    if request_type not in REQUEST_TYPES:
+        raise ValueError(
+            f'Invalid request type {request_type}. Must be in {REQUEST_TYPES}'
+        )
+
+
+class Transport:
+    """
+    Pooled, keep-alive HTTP transport shared by WebModel, ProjectManager and
+    ModelBuilder so repeated calls reuse open TCP/TLS connections
+
+    Ex:
+    transport = Transport(pool_maxsize=32)
+    transport.warm_up(['https://model-api-prod.platform.aitomatic.com'])
+    model = WebModel('MyModelName', transport=transport)
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        max_retries: int = 0,
+        keep_alive: bool = True,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        endpoint_timeouts: Dict[str, Timeout] = None,
+    ):
+        """
+        :param pool_connections: number of hosts to keep connection pools for
+        :param pool_maxsize: max number of open connections kept per host
+        :param max_retries: connection-level retries done by urllib3
+        :param keep_alive: keep connections open between requests
+        :param timeout: default timeout in seconds, or (connect, read) tuple
+        :param endpoint_timeouts: timeouts by url fragment, e.g.
+        {'/inferencing': 300}. The longest fragment found in the url wins
+        """
+        if endpoint_timeouts is None:
+            endpoint_timeouts = DEFAULT_ENDPOINT_TIMEOUTS.copy()
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.endpoint_timeouts = endpoint_timeouts
+        self.session = self.build_session()
+
+    def build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            pool_block=False,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def get_timeout(self, url: str) -> Timeout:
+        return get_endpoint_timeout(url, self.timeout, self.endpoint_timeouts)
+
+    def request(self, request_type: str, url: str, **kwargs) -> requests.Response:
+        """
+        :param kwargs: passed to requests, a `timeout` keyword replaces the
+        transport's timeout for this call, None waits without limit
+        """
+        check_request_type(request_type)
+        kwargs.setdefault('timeout', self.get_timeout(url))
+        return self.session.request(request_type.upper(), url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('get', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('post', url, **kwargs)
+
+    def warm_up(self, urls: Iterable[str], connections: int = None):
+        """
+        Open connections ahead of time so the first real calls skip the
+        TCP/TLS handshake
+
+        :param urls: urls (or api roots) of the hosts to connect to
+        :param connections: number of connections to open per url, defaults to
+        pool_maxsize
+        """
+        if connections is None:
+            connections = self.pool_maxsize
+
+        targets = [url for url in urls if url for _ in range(connections)]
+        if len(targets) == 0:
+            return
+
+        def _head(url):
+            try:
+                self.request('head', url, timeout=self.timeout)
+            except requests.RequestException:
+                # warm up is best effort, real requests surface the error
+                pass
+
+        with ThreadPoolExecutor(max_workers=min(len(targets), 64)) as pool:
+            list(pool.map(_head, targets))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self) -> 'Transport':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class AsyncTransport:
+    """
+    asyncio counterpart of Transport built on an aiohttp connection pool.
+    Requires the optional aiohttp dependency, `pip install aitomatic[async]`
+
+    The aiohttp session is opened lazily on the first request, so it is bound
+    to the event loop that makes it. Use one AsyncTransport per event loop.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keep_alive: bool = True,
+        keepalive_timeout: float = 15,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        endpoint_timeouts: Dict[str, Timeout] = None,
+    ):
+        """
+        :param limit: max number of open connections, 0 for no limit
+        :param limit_per_host: max number of open connections per host, 0 for
+        no limit
+        :param keep_alive: keep connections open between requests
+        :param keepalive_timeout: seconds an idle connection is kept open
+        :param timeout: default timeout in seconds, or (connect, read) tuple
+        :param endpoint_timeouts: timeouts by url fragment, see Transport
+        """
+        if aiohttp is None:
+            raise ImportError(
+                'AsyncTransport requires aiohttp. '
+                'Install it with `pip install aitomatic[async]`'
+            )
+
+        if endpoint_timeouts is None:
+            endpoint_timeouts = DEFAULT_ENDPOINT_TIMEOUTS.copy()
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.endpoint_timeouts = endpoint_timeouts
+        self.session = None
+
+    def build_session(self) -> 'aiohttp.ClientSession':
+        if self.keep_alive:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host, force_close=True
+            )
+
+        return aiohttp.ClientSession(connector=connector)
+
+    def get_timeout(self, url: str) -> 'aiohttp.ClientTimeout':
+        timeout = get_endpoint_timeout(url, self.timeout, self.endpoint_timeouts)
+        return AsyncTransport.to_client_timeout(timeout)
+
+    @staticmethod
+    def to_client_timeout(timeout: Timeout) -> 'aiohttp.ClientTimeout':
+        """
+        aiohttp timeout of seconds or a (connect, read) tuple, None for no limit
+        """
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            return timeout
+
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def request(
+        self, request_type: str, url: str, **kwargs
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        """
+        Make request and read the whole body
+
+        :param kwargs: passed to aiohttp, a `timeout` keyword replaces the
+        transport's timeout for this call, see Transport.request
+        :return: status code, response headers and response content
+        """
+        check_request_type(request_type)
+        if self.session is None or self.session.closed:
+            self.session = self.build_session()
+
+        # drop None values like requests does, aiohttp rejects them
+        for key in ['headers', 'params']:
+            if isinstance(kwargs.get(key), dict):
+                kwargs[key] = {k: v for k, v in kwargs[key].items() if v is not None}
+
+        if 'timeout' in kwargs.keys():
+            kwargs['timeout'] = AsyncTransport.to_client_timeout(kwargs['timeout'])
+        else:
+            kwargs['timeout'] = self.get_timeout(url)
+
+        async with self.session.request(request_type.upper(), url, **kwargs) as resp:
+            content = await resp.read()
+            # copy keeps header lookups case insensitive
+            return resp.status, resp.headers.copy(), content
+
+    async def warm_up(self, urls: Iterable[str], connections: int = 10):
+        """
+        Open connections ahead of time, see Transport.warm_up
+        """
+
+        async def _head(url):
+            try:
+                await self.request('head', url)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # warm up is best effort, real requests surface the error
+                pass
+
+        targets = [url for url in urls if url for _ in range(connections)]
+        await asyncio.gather(*[_head(url) for url in targets])
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> 'AsyncTransport':
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+_default_transport = None
+
+
+def get_default_transport() -> Transport:
+    """
+    Process-wide transport used when none is passed in explicitly
+    """
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = Transport()
+
+    return _default_transport
+
+
+def set_default_transport(transport: Transport):
+    global _default_transport
+    _default_transport = transport
@@ -0,0 +1,381 @@
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Sequence, Union
+
+import pandas as pd
+import requests
+
+from aitomatic.api.build import ModelBuilder, PENDING_STATUSES
+from aitomatic.api.tuning_utils import ParamGrid, get_size
+from aitomatic.api.web_model import WebModel
+
+# metrics key, or function of the metrics dict, models are ranked by
+Metric = Union[str, Callable[[dict], Optional[float]]]
+MODES = ['max', 'min']
+
+
+def set_ml_budget(hyperparam: str = 'n_estimators', cast: Callable = int):
+    """
+    apply_budget for TuningScheduler setting hyperparam of every ML model of a
+    config to the budget, models without that hyperparam are left unchanged
+    """
+
+    def _apply(config: dict, budget: float) -> dict:
+        if 'ml_models' not in config.keys():
+            return config
+
+        ml_models = []
+        for ml_model in config['ml_models']:
+            hyperparams = ml_model.get('hyperparams', {})
+            if hyperparam in hyperparams.keys():
+                hyperparams = {**hyperparams, hyperparam: cast(budget)}
+                ml_model = {**ml_model, 'hyperparams': hyperparams}
+
+            ml_models.append(ml_model)
+
+        return {**config, 'ml_models': ml_models}
+
+    return _apply
+
+
+class TuningBackend(ABC):
+    """
+    Where TuningScheduler trains configs. submit starts one job per config
+    and returns one row per job, in config order, with its model_name and
+    status. wait returns once no job is training and calls on_complete with
+    the row of every job as soon as it finishes. get_metrics reads the
+    metrics of a finished job.
+    """
+
+    @abstractmethod
+    def submit(self, configs: List[dict], base_name: str) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def wait(
+        self, model_df: pd.DataFrame, on_complete: Callable[[pd.Series], None]
+    ) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_metrics(self, model_name: str) -> dict:
+        pass
+
+
+class RemoteTuningBackend(TuningBackend):
+    """
+    Trains on the Aitomatic API with the knowledge, data and mapping of a
+    loaded model
+
+    Ex:
+    backend = RemoteTuningBackend(WebModel('MyModelName').load())
+    """
+
+    def __init__(
+        self,
+        model: WebModel,
+        sleep_time: float = 30,
+        max_sleep_time: float = 300,
+        max_workers: int = 8,
+    ) -> None:
+        """
+        :param sleep_time: see ModelBuilder.wait_for_tuning_to_complete
+        :param max_workers: max concurrent requests to submit jobs and check
+        their status
+        """
+        self.model = model
+        self.builder = ModelBuilder(
+            project_name=model.project_name,
+            api_token=model.api_token,
+            transport=model.transport,
+        )
+        self.sleep_time = sleep_time
+        self.max_sleep_time = max_sleep_time
+        self.max_workers = max_workers
+
+    def submit(self, configs: List[dict], base_name: str) -> pd.DataFrame:
+        return self.model.tune_with_hyperparams(
+            configs,
+            base_name=base_name,
+            model_builder=self.builder,
+            max_workers=self.max_workers,
+        )
+
+    def wait(
+        self, model_df: pd.DataFrame, on_complete: Callable[[pd.Series], None]
+    ) -> pd.DataFrame:
+        return self.builder.wait_for_tuning_to_complete(
+            model_df,
+            self.sleep_time,
+            self.max_sleep_time,
+            on_complete=on_complete,
+            max_workers=self.max_workers,
+        )
+
+    def get_metrics(self, model_name: str) -> dict:
+        return self.model.get_metadata(model_name)['metrics']
+
+
+class SimulatedTuningBackend(TuningBackend):
+    """
+    Trains locally by calling objective with every config, to try schedulers
+    and metrics without the API. Jobs finish in random order and fail with
+    probability failure_rate.
+
+    Ex:
+    backend = SimulatedTuningBackend(lambda config: {'f1': score(config)})
+    """
+
+    def __init__(
+        self,
+        objective: Callable[[dict], dict],
+        failure_rate: float = 0.0,
+        seed: int = None,
+    ) -> None:
+        """
+        :param objective: metrics of a config, with its budget applied
+        """
+        self.objective = objective
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.configs = {}
+        self.metrics = {}
+        self.jobs = 0
+
+    def submit(self, configs: List[dict], base_name: str) -> pd.DataFrame:
+        model_log = []
+        for i, config in enumerate(configs):
+            model_name = f'{base_name} {i}'
+            self.configs[model_name] = config
+            model_log.append(
+                {
+                    **config,
+                    'id': f'simulated-{self.jobs}',
+                    'model_name': model_name,
+                    'status': 'training',
+                    'submit_seconds': 0.0,
+                }
+            )
+            self.jobs += 1
+
+        return pd.DataFrame(model_log)
+
+    def wait(
+        self, model_df: pd.DataFrame, on_complete: Callable[[pd.Series], None]
+    ) -> pd.DataFrame:
+        pending = list(model_df.index[model_df['status'].isin(PENDING_STATUSES)])
+        self.rng.shuffle(pending)
+        for i in pending:
+            model_name = model_df.at[i, 'model_name']
+            if self.rng.random() < self.failure_rate:
+                model_df.at[i, 'status'] = 'error'
+            else:
+                self.metrics[model_name] = self.objective(self.configs[model_name])
+                model_df.at[i, 'status'] = 'success'
+
+            if on_complete is not None:
+                on_complete(model_df.loc[i])
+
+        return model_df
+
+    def get_metrics(self, model_name: str) -> dict:
+        return self.metrics[model_name]
+
+
+class TuningScheduler:
+    """
+    Successive halving and Hyperband over a TuningBackend. A bracket trains
+    its configs at a small budget, ranks the finished models by metric and
+    trains only the best 1/eta of them again at eta times the budget, up to
+    max_budget. Hyperband runs brackets from many configs at small budgets
+    to few configs at max_budget, for when small budgets rank configs
+    poorly. Budgets reach the jobs through apply_budget, e.g. the number of
+    trees of the ML models.
+
+    Ex:
+    scheduler = TuningScheduler(
+        RemoteTuningBackend(WebModel('MyModelName').load()),
+        metric='f1',
+        apply_budget=set_ml_budget('n_estimators'),
+        min_budget=3,
+        max_budget=81,
+    )
+    results = scheduler.hyperband(grid, seed=0)
+    scheduler.get_best()
+    """
+
+    def __init__(
+        self,
+        backend: TuningBackend,
+        metric: Metric,
+        apply_budget: Callable[[dict, float], dict],
+        mode: str = 'max',
+        min_budget: float = 1,
+        max_budget: float = 27,
+        eta: int = 3,
+        name: str = None,
+    ) -> None:
+        """
+        :param metric: key of the metrics dict, or function of it returning
+        the score of a model, None for models that can not be ranked
+        :param apply_budget: config to train at a budget
+        :param mode: max or min, whether higher or lower scores are better
+        :param eta: configs kept per rung are 1/eta of the previous rung,
+        trained at eta times its budget
+        :param name: (optional) prefix of the model names, `name b0 r1 3` is
+        the fourth job of the second rung of the first bracket. Model names
+        must be unique in the project, so it defaults to `tune` and the start
+        time, and a name passed in must change between runs
+        """
+        if mode not in MODES:
+            raise ValueError(f'Invalid mode {mode}. Must be in {MODES}')
+
+        if not 0 < min_budget <= max_budget or eta < 2:
+            raise ValueError(
+                'Budgets must be 0 < min_budget <= max_budget and eta >= 2'
+            )
+
+        self.backend = backend
+        self.metric = metric
+        self.apply_budget = apply_budget
+        self.mode = mode
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.eta = eta
+        self.name = name or f'tune {time.strftime("%Y%m%d-%H%M%S")}'
+        self.brackets = 0
+        # one row per job of every bracket run
+        self.results = pd.DataFrame()
+
+    def get_score(self, metrics: dict) -> float:
+        if callable(self.metric):
+            score = self.metric(metrics)
+        else:
+            score = metrics.get(self.metric)
+
+        return float('nan') if score is None else float(score)
+
+    def get_budgets(self, min_budget: float) -> List[float]:
+        """
+        budgets of the rungs of a bracket, max_budget divided by powers of
+        eta down to at least min_budget
+        """
+        rungs = int(math.log(self.max_budget / min_budget, self.eta) + 1e-9)
+        return [self.max_budget / self.eta**k for k in range(rungs, -1, -1)]
+
+    def run_rung(
+        self, configs: List[dict], budget: float, bracket: int, rung: int
+    ) -> pd.DataFrame:
+        """
+        train configs at budget and score every model as soon as it finishes
+
+        :return: one row per job with bracket, rung, budget and score, NaN
+        for failed jobs
+        """
+        print(f'Bracket {bracket} rung {rung}: {len(configs)} configs at {budget:g}')
+        jobs = [self.apply_budget(config, budget) for config in configs]
+        model_df = self.backend.submit(jobs, f'{self.name} b{bracket} r{rung}')
+        scores = {}
+
+        def _on_complete(row):
+            if row['status'] != 'success':
+                return
+
+            try:
+                metrics = self.backend.get_metrics(row['model_name'])
+                scores[row['model_name']] = self.get_score(metrics)
+            except (ConnectionError, requests.RequestException, KeyError) as e:
+                # the model stays unscored and is pruned
+                print(f'Reading metrics of {row["model_name"]}, e =', e)
+
+        model_df = self.backend.wait(model_df, _on_complete)
+        model_df['bracket'] = bracket
+        model_df['rung'] = rung
+        model_df['budget'] = budget
+        model_df['score'] = model_df['model_name'].map(scores).astype(float)
+        return model_df
+
+    def successive_halving(
+        self, configs: Sequence[dict], min_budget: float = None
+    ) -> pd.DataFrame:
+        """
+        run one bracket: train configs at min_budget, then the best 1/eta of
+        the models of every rung at the next budget, failed and unscored
+        models are pruned
+
+        :param min_budget: (optional) defaults to the scheduler's
+        :return: one row per job of the bracket, also added to self.results
+        """
+        if min_budget is None:
+            min_budget = self.min_budget
+
+        bracket = self.brackets
+        self.brackets += 1
+        configs = list(configs)
+        rungs = []
+        for rung, budget in enumerate(self.get_budgets(min_budget)):
+            if len(configs) == 0:
+                break
+
+            model_df = self.run_rung(configs, budget, bracket, rung)
+            rungs.append(model_df)
+
+            scores = model_df['score'].tolist()
+            ranked = sorted(
+                [i for i, score in enumerate(scores) if not math.isnan(score)],
+                key=lambda i: scores[i],
+                reverse=self.mode == 'max',
+            )
+            configs = [configs[i] for i in ranked[: len(configs) // self.eta]]
+
+        results = pd.concat(rungs, ignore_index=True)
+        self.results = pd.concat([self.results, results], ignore_index=True)
+        return results
+
+    def hyperband(
+        self, grid: Sequence[dict], sample_method: str = 'random', seed: int = None
+    ) -> pd.DataFrame:
+        """
+        run every bracket of Hyperband, each on configs sampled from grid
+
+        :param sample_method: see ParamGrid.sample
+        :param seed: (optional) bracket k samples with seed + k
+        :return: one row per job of every bracket
+        """
+        rungs = len(self.get_budgets(self.min_budget)) - 1
+        results = []
+        for s in range(rungs, -1, -1):
+            n = math.ceil((rungs + 1) / (s + 1) * self.eta**s)
+            bracket_seed = None if seed is None else seed + rungs - s
+            if isinstance(grid, ParamGrid):
+                configs = grid.sample(n, sample_method, bracket_seed)
+            else:
+                indices = random.Random(bracket_seed).sample(
+                    range(get_size(grid)), min(n, get_size(grid))
+                )
+                configs = [grid[i] for i in indices]
+
+            results.append(
+                self.successive_halving(configs, self.max_budget / self.eta**s)
+            )
+
+        return pd.concat(results, ignore_index=True)
+
+    def get_best(self) -> Optional[pd.Series]:
+        """
+        best scored job at the largest budget any job was scored at
+        """
+        if len(self.results) == 0:
+            return None
+
+        scored = self.results.dropna(subset=['score'])
+        if len(scored) == 0:
+            return None
+
+        top = scored[scored['budget'] == scored['budget'].max()]
+        if self.mode == 'max':
+            return top.loc[top['score'].idxmax()]
+
+        return top.loc[top['score'].idxmin()]
@@ -1,6 +1,16 @@
-from itertools import product
+import math
+import random
+import sys
 from copy import deepcopy
 from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Union
+
+try:
+    from scipy.stats import qmc
+except ImportError:
+    qmc = None
+
+SAMPLE_METHODS = ['random', 'lhs', 'halton', 'sobol']
 
 
 def flatten_dict(x, top=None):
@@ -133,11 +143,222 @@ def drop_params_from_dict(params, to_drop):
     return tmp_params
 
 
+def get_primes(n: int) -> List[int]:
+    """
+    first n primes, the bases of the halton sequence
+    """
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p > 0 for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+
+    return primes
+
+
+def radical_inverse(i: int, base: int) -> float:
+    out, scale = 0.0, 1.0 / base
+    while i > 0:
+        i, digit = divmod(i, base)
+        out += digit * scale
+        scale /= base
+
+    return out
+
+
+class ParamGrid:
+    """
+    Cartesian product of parameter ranges that is never materialized:
+    configs are decoded from their index on access, in the order of
+    itertools.product. Ranges can be any sequence, other grids included, so
+    nested products stay lazy and are sampled along every range.
+
+    Ex:
+    grid = ParamGrid({'max_depth': [2, 4, 6], 'eta': [0.1, 0.01]})
+    grid.size, grid[0]  # 6, {'max_depth': 2, 'eta': 0.1}
+    for params in grid: ...
+    subset = grid.sample(100, method='lhs', seed=0)
+    """
+
+    def __init__(
+        self,
+        ranges: Union[Dict[str, Sequence], List[Sequence]],
+        transform: Callable[[Any], Any] = None,
+    ) -> None:
+        """
+        :param ranges: values of every parameter by name, configs are dicts,
+        or a list of value sequences, configs are lists
+        :param transform: (optional) applied to every config on access
+        """
+        if isinstance(ranges, dict):
+            self.keys = list(ranges.keys())
+            self.axes = list(ranges.values())
+        else:
+            self.keys = None
+            self.axes = list(ranges)
+
+        self.transform = transform
+        self.lengths = [len(axis) for axis in self.axes]
+        # configs between two steps of each axis, the last axis changes first
+        self.strides = []
+        self.size = 1
+        for length in reversed(self.lengths):
+            self.strides.insert(0, self.size)
+            self.size *= length
+
+        # unit dimensions used to sample, one per range or nested range
+        self.dims = sum(getattr(axis, 'dims', 1) for axis in self.axes)
+
+    def __len__(self) -> int:
+        # python limits len to sys.maxsize, size has no limit
+        if self.size > sys.maxsize:
+            raise OverflowError(
+                f'ParamGrid of {self.size} configs is too large for len(), use size'
+            )
+
+        return self.size
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(f'ParamGrid index {index} out of range')
+
+        values = []
+        for axis, stride, length in zip(self.axes, self.strides, self.lengths):
+            values.append(axis[index // stride % length])
+
+        item = dict(zip(self.keys, values)) if self.keys is not None else values
+        if self.transform is not None:
+            return self.transform(item)
+
+        return item
+
+    def __iter__(self) -> Iterator:
+        for i in range(self.size):
+            yield self[i]
+
+    def locate(self, point: Sequence[float]) -> int:
+        """
+        index of the config at a point of the unit hypercube of self.dims
+        dimensions, every range is split into equal intervals
+        """
+        index, start = 0, 0
+        for axis, stride, length in zip(self.axes, self.strides, self.lengths):
+            if isinstance(axis, ParamGrid):
+                i = axis.locate(point[start : start + axis.dims])
+                start += axis.dims
+            else:
+                i = min(int(point[start] * length), length - 1)
+                start += 1
+
+            index += i * stride
+
+        return index
+
+    def get_unit_points(self, n: int, method: str, rng: random.Random) -> List:
+        """
+        n points of the unit hypercube
+
+        :param method: random, lhs (latin hypercube: every range is split into
+        n strata with one point each), halton or sobol (low discrepancy
+        sequences, sobol requires scipy)
+        """
+        if method == 'random':
+            return [[rng.random() for _ in range(self.dims)] for _ in range(n)]
+
+        if method == 'lhs':
+            strata = [rng.sample(range(n), n) for _ in range(self.dims)]
+            return [
+                [(strata[d][i] + rng.random()) / n for d in range(self.dims)]
+                for i in range(n)
+            ]
+
+        if method == 'halton':
+            # randomly shifted, so seeds give different sequences
+            bases = get_primes(self.dims)
+            shift = [rng.random() for _ in range(self.dims)]
+            return [
+                [(radical_inverse(i, b) + s) % 1 for b, s in zip(bases, shift)]
+                for i in range(1, n + 1)
+            ]
+
+        if method == 'sobol':
+            if qmc is None:
+                raise ImportError(
+                    'Sobol sampling requires scipy. '
+                    'Install it with `pip install aitomatic[qmc]`'
+                )
+
+            sampler = qmc.Sobol(d=self.dims, seed=rng.randrange(2**32))
+            return sampler.random_base2(max(math.ceil(math.log2(n)), 0))[:n].tolist()
+
+        raise ValueError(
+            f'Invalid sample method {method}. Must be in {SAMPLE_METHODS}'
+        )
+
+    def sample_indices(self, n: int, method: str = 'random', seed: int = None):
+        """
+        indices of n distinct configs, all of them in order if n >= len. Points
+        of the unit hypercube falling on an already chosen config are replaced
+        by random configs.
+
+        :param method: see get_unit_points
+        """
+        if n >= self.size:
+            return list(range(self.size))
+
+        rng = random.Random(seed)
+        if method == 'random' and 2 * n >= self.size:
+            return rng.sample(range(self.size), n)
+
+        indices = []
+        if method != 'random':
+            points = self.get_unit_points(n, method, rng)
+            indices = list(dict.fromkeys(self.locate(point) for point in points))
+
+        chosen = set(indices)
+        while len(indices) < n:
+            i = rng.randrange(self.size)
+            if i not in chosen:
+                chosen.add(i)
+                indices.append(i)
+
+        return indices
+
+    def sample(self, n: int, method: str = 'random', seed: int = None) -> List:
+        """
+        n distinct configs, for a search budget smaller than the grid
+
+        :param method: see get_unit_points
+        :param seed: (optional) the same seed gives the same configs
+        """
+        return [self[i] for i in self.sample_indices(n, method, seed)]
+
+
+def get_size(params: Sequence) -> int:
+    """
+    number of configs of a ParamGrid or any other sequence, without len()
+    failing on grids larger than sys.maxsize
+    """
+    return params.size if isinstance(params, ParamGrid) else len(params)
+
+
 def generate_train_hyperparams(tuning_range: dict):
-    hyperparams = []
-    train_keys = tuning_range.keys()
+    """
+    :return: list of every combination of tuning_range, and its keys, see
+    generate_train_hyperparam_grid for large ranges
+    """
+    return list(generate_train_hyperparam_grid(tuning_range)), tuning_range.keys()
 
-    for params in product(*tuning_range.values()):
-        hyperparams.append(dict(zip(train_keys, params)))
 
-    return hyperparams, train_keys
+def generate_train_hyperparam_grid(tuning_range: dict) -> ParamGrid:
+    """
+    :return: every combination of tuning_range as a lazy ParamGrid, configs
+    are built on access
+    """
+    return ParamGrid(tuning_range)
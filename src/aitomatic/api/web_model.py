@@ -1,18 +1,45 @@
+import ast
+import hashlib
 import os
-import sys
-from typing import Dict, Tuple, Union, List, Any
-from itertools import product
+import re
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import Dict, Tuple, Union, List, Any, Iterable, Iterator, Optional
+from functools import partial
 
 from tqdm import tqdm
 from itertools import chain
-import requests
+from collections import deque
+from copy import deepcopy
 import json
+import requests
 import pandas as pd
 import numpy as np
 import logging
-from aitomatic.api.client import get_api_root, get_project_id, ProjectManager
+from aitomatic.api.client import (
+    get_api_root,
+    get_project_id,
+    make_raw_request,
+    make_request,
+    ProjectManager,
+)
+from aitomatic.api.cache import PredictionCache, hash_rows
+from aitomatic.api.chunking import ChunkSizer, count_items, take_items
+from aitomatic.api.exceptions import PayloadTooLarge, UnsupportedMediaType
+from aitomatic.api import wire_format as wf
+from aitomatic.api.transport import Transport, get_default_transport
 from aitomatic.api.build import ModelBuilder, MLParamBuilder
-from aitomatic.api.tuning_utils import generate_train_hyperparams
+from aitomatic.api.tuning_utils import ParamGrid, generate_train_hyperparam_grid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -36,29 +63,70 @@ class WebModel:
         api_token: str = None,
         project_name: str = None,
         chunk_size: int = 1024,
+        transport: Transport = None,
+        max_concurrency: int = 1,
+        max_retries: int = 2,
+        adaptive_chunking: bool = False,
+        wire_format: str = 'json',
+        cache: PredictionCache = None,
+        deduplicate: bool = False,
     ):
         """
         Initialize remote model
 
         :param api_token: Aitomatic API Access Token
         :param model_name: name of the model being used
-        :param chunk_size: size to chunk inference calls in kb
+        :param chunk_size: size to chunk inference calls in kb, measured on the
+        serialized request body
+        :param transport: (optional) pooled http transport, defaults to the
+        process-wide transport shared with ProjectManager and ModelBuilder
+        :param max_concurrency: max number of chunks sent in parallel when
+        input data is larger than chunk_size
+        :param max_retries: number of times a failed chunk is retried before
+        the whole prediction fails
+        :param adaptive_chunking: tune chunk size from observed latency and
+        payload-limit errors, starting from chunk_size
+        :param wire_format: inference payload format, 'json', 'parquet' or
+        'numpy' (numeric columns only). Binary formats fall back to json when
+        the data or the server does not support them
+        :param cache: (optional) PredictionCache, rows already predicted by
+        this model and version are served from the cache
+        :param deduplicate: send only unique rows and copy their predictions
+        to the repeated rows, for data where many rows repeat
         """
+        if wire_format not in wf.WIRE_FORMATS:
+            raise ValueError(
+                f'Invalid wire_format {wire_format}. Must be in {wf.WIRE_FORMATS}'
+            )
+
         if api_token is None:
             api_token = os.getenv('AITOMATIC_API_TOKEN')
 
+        if transport is None:
+            transport = get_default_transport()
+
+        self.transport = transport
         if project_name is None:
             project_name = os.getenv('AITOMATIC_PROJECT_NAME')
             project_id = os.getenv('AITOMATIC_PROJECT_ID')
         else:
-            project_id = get_project_id(project_name, api_token=api_token)
+            project_id = get_project_id(
+                project_name, api_token=api_token, transport=transport
+            )
 
         self.project_name = project_name
         self.project_id = project_id
         self.model_name = model_name
         self.api_token = api_token
         self.chunk_size = chunk_size * 1024  # convert from kb to bytes
+        self.chunk_sizer = ChunkSizer(self.chunk_size, adaptive=adaptive_chunking)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = 0.5
         self.model_version = 'latest'
+        self.wire_format = wire_format
+        self.cache = cache
+        self.deduplicate = deduplicate
         self.headers = {
             'access-token': self.api_token,
             'Content-Type': 'application/json',
@@ -76,33 +144,146 @@ class WebModel:
         self.KNOWLEDGE_DETAIL = lambda id_: f'{self.CLIENT_API_ROOT}/knowledges/' + id_
         self.DATA_DETAIL = lambda id_: f'{self.CLIENT_API_ROOT}/data/' + id_
 
-    def batch_predict(self, input_data: Dict) -> Dict:
+    def batch_predict(
+        self, input_data: Dict, max_concurrency: int = None, deduplicate: bool = False
+    ) -> Dict:
         """
         Chunks data in input_data['X'] and does prediction in batches
+
+        :param max_concurrency: (optional) max number of chunks in flight,
+        defaults to self.max_concurrency
+        :param deduplicate: (optional) only send unique rows
         """
+        if max_concurrency is None:
+            max_concurrency = self.max_concurrency
+
+        if deduplicate:
+            return self.predict_deduplicated(input_data, max_concurrency=max_concurrency)
+
         # TODO: Make this more versatile to it slices all large data in input
         # data, not just 'X' ... maybe
 
         X = input_data[self.data_key]
         Xother = {k: deepcopy(v) for k, v in input_data.items() if k != self.data_key}
-        size = sys.getsizeof(X)
-        items = self.count_items(X)
-        chunk_max = self.chunk_size
-        spi = size / items
-        N = int(chunk_max / spi) - 1
-        total_batches = int(np.ceil(items / N))
+        self.chunk_sizer.seed_bytes_per_row(X, self.serialize_data)
+        N = self.chunk_sizer.rows_per_chunk()
+        total_batches = int(np.ceil(self.count_items(X) / N))
         logger.info(
             f'data size too large. Running inference in chunks of '
-            f'{chunk_max /1024} kb or {N} data points'
+            f'{self.chunk_sizer.max_bytes / 1024:.0f} kb or about {N} data points'
         )
-        out = []
-        for Xi in tqdm(self.slice_data(X, N), total=total_batches):
-            pred = self.predict({self.data_key: Xi, **Xother})[self.output_key]
-            out.append(pred)
+        chunks = ({self.data_key: Xi, **Xother} for Xi in self.iter_chunks(X))
+        if max_concurrency <= 1:
+            out = []
+            for chunk in tqdm(chunks, total=total_batches):
+                out.append(self.predict_chunk_with_retry(chunk)[self.output_key])
+        else:
+            out = self.fan_out_chunks(chunks, max_concurrency, total_batches)
 
         predictions = self.merge_items(out, type(X))
         return {self.output_key: predictions}
 
+    def iter_chunks(self, X):
+        """
+        Iterate over slices of data, sized by self.chunk_sizer when each slice
+        is taken so corrections from earlier requests apply to later slices
+        :param X: data, pd.DataFrame, pd.Series, np.ndarray, dict or list
+        """
+        to_dict = False
+        if isinstance(X, dict):
+            to_dict = True
+            X = pd.DataFrame(X)
+
+        # no-op once an estimate exists, e.g. seeded by batch_predict
+        self.chunk_sizer.seed_bytes_per_row(X, self.serialize_data)
+        Nj = 0
+        Nmax = self.count_items(X)
+        while Nj < Nmax:
+            Ni = Nj + self.chunk_sizer.rows_per_chunk()
+            tmp = X[Nj:Ni]
+            if to_dict:
+                yield tmp.to_dict()
+            else:
+                yield tmp
+
+            Nj = Ni
+
+    def fan_out_chunks(
+        self, chunks: Iterable[Dict], max_concurrency: int, total: int = None
+    ) -> List:
+        """
+        Send chunks in parallel on a bounded thread pool, returns predictions
+        in the same order as chunks. Chunks are only taken from the iterable
+        when a worker is free.
+        """
+        pool_maxsize = getattr(self.transport, 'pool_maxsize', max_concurrency)
+        if pool_maxsize < max_concurrency:
+            logger.warning(
+                f'transport pool_maxsize {pool_maxsize} is smaller than '
+                f'max_concurrency {max_concurrency}, extra connections will '
+                f'not be reused'
+            )
+
+        out = {}
+        chunks = iter(chunks)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool, tqdm(
+            total=total
+        ) as progress:
+            futures = {}
+            for i, chunk in enumerate(chunks):
+                futures[pool.submit(self.predict_chunk_with_retry, chunk)] = i
+                if len(futures) < max_concurrency:
+                    continue
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    out[futures.pop(future)] = future.result()[self.output_key]
+                    progress.update()
+
+            for future in as_completed(futures):
+                out[futures[future]] = future.result()[self.output_key]
+                progress.update()
+
+        return [out[i] for i in range(len(out))]
+
+    def predict_chunk_with_retry(self, input_data: Dict) -> Dict:
+        """
+        Predict a single chunk, retrying it on its own if the request fails.
+        Chunks rejected as too large are split in half and retried.
+        """
+        attempt = 0
+        while True:
+            try:
+                return self.predict_chunk(input_data)
+            except PayloadTooLarge:
+                halves = self.split_chunk(input_data)
+                if halves is None:
+                    raise
+
+                preds = [self.predict_chunk_with_retry(x)[self.output_key] for x in halves]
+                dtype = type(input_data[self.data_key])
+                return {self.output_key: self.merge_items(preds, dtype)}
+            except (ConnectionError, requests.RequestException) as e:
+                if attempt >= self.max_retries:
+                    raise
+
+                wait_time = self.retry_backoff * 2**attempt
+                logger.warning(f'chunk failed ({e}), retrying in {wait_time}s')
+                time.sleep(wait_time)
+                attempt += 1
+
+    def split_chunk(self, input_data: Dict) -> Optional[List[Dict]]:
+        """
+        Split the data of a chunk into two halves, None if it has one item
+        """
+        X = input_data[self.data_key]
+        items = self.count_items(X)
+        if items <= 1:
+            return None
+
+        half = int(np.ceil(items / 2))
+        return [{**input_data, self.data_key: Xi} for Xi in self.slice_data(X, half)]
+
     def merge_items(self, items, dtype):
         """
         Merge multiple inference outputs
@@ -124,10 +305,7 @@ class WebModel:
         """
         Count items in dataset
         """
-        if hasattr(X, 'shape'):
-            return X.shape[0]
-
-        return len(X)
+        return count_items(X)
 
     def slice_data(self, X, N):
         """
@@ -156,19 +334,246 @@ class WebModel:
             Nj = Ni
             Ni = Ni + N
 
-    def predict(self, input_data: Dict) -> Dict:
+    def predict(
+        self, input_data: Dict, max_concurrency: int = None, deduplicate: bool = None
+    ) -> Dict:
         """
         Logic to generate prediction from data
 
         :params input_data: input data for prediction, dictionary with data under key 'X'
+        :params max_concurrency: (optional) max number of chunks sent in
+        parallel for large inputs, defaults to self.max_concurrency
+        :params deduplicate: (optional) only send unique rows, defaults to
+        self.deduplicate
         :return: a dictionary with key `predictions` containing the predictions
         """
-        if sys.getsizeof(input_data[self.data_key]) > self.chunk_size + 1:
-            return self.batch_predict(input_data)
+        if self.cache is not None:
+            return self.predict_cached(
+                input_data, max_concurrency=max_concurrency, deduplicate=deduplicate
+            )
+
+        return self.predict_uncached(
+            input_data, max_concurrency=max_concurrency, deduplicate=deduplicate
+        )
+
+    def predict_uncached(
+        self, input_data: Dict, max_concurrency: int = None, deduplicate: bool = None
+    ) -> Dict:
+        if deduplicate is None:
+            deduplicate = self.deduplicate
+
+        if deduplicate:
+            return self.predict_deduplicated(input_data, max_concurrency=max_concurrency)
+
+        if self.is_chunking_needed(input_data[self.data_key]):
+            return self.batch_predict(input_data, max_concurrency=max_concurrency)
+
+        return self.predict_chunk(input_data)
+
+    def predict_deduplicated(self, input_data: Dict, max_concurrency: int = None) -> Dict:
+        """
+        Send only the unique rows of input_data['X'] (found by row hash) and
+        scatter their predictions back to every original row. Inputs whose
+        rows can not be hashed, e.g. lists, are sent whole.
+        """
+        X = input_data[self.data_key]
+        if not isinstance(X, wf.FRAME_TYPES):
+            return self.predict_uncached(
+                input_data, max_concurrency=max_concurrency, deduplicate=False
+            )
+
+        items = self.count_items(X)
+        _, row_hashes = hash_rows(X)
+        _, first_idx, inverse = np.unique(
+            row_hashes, return_index=True, return_inverse=True
+        )
+        if len(first_idx) == items:
+            return self.predict_uncached(
+                input_data, max_concurrency=max_concurrency, deduplicate=False
+            )
+
+        # send unique rows in order of first appearance
+        order = np.argsort(first_idx)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        logger.info(f'sending {len(order)} unique rows of {items}')
+
+        X_unique = take_items(X, first_idx[order])
+        resp = self.predict_uncached(
+            {**input_data, self.data_key: X_unique},
+            max_concurrency=max_concurrency,
+            deduplicate=False,
+        )
+        predictions = wf.to_frame(resp[self.output_key]).iloc[rank[inverse.ravel()]]
+        if isinstance(X, (pd.DataFrame, pd.Series)):
+            predictions.index = X.index
+        else:
+            predictions = predictions.reset_index(drop=True)
+
+        return {self.output_key: wf.from_frame(predictions, type(X))}
+
+    def predict_cached(
+        self, input_data: Dict, max_concurrency: int = None, deduplicate: bool = None
+    ) -> Dict:
+        """
+        Predict through self.cache: only rows without a cached prediction are
+        sent to the inference endpoint, and results are returned in the
+        original row order. Inputs whose rows can not be hashed, e.g. lists,
+        are predicted without the cache.
+        """
+        X = input_data[self.data_key]
+        if not isinstance(X, wf.FRAME_TYPES):
+            return self.predict_uncached(
+                input_data, max_concurrency=max_concurrency, deduplicate=deduplicate
+            )
+
+        Xother = {k: v for k, v in input_data.items() if k != self.data_key}
+        schema_key, row_hashes = hash_rows(X)
+        if len(Xother) > 0:
+            # other inputs can change predictions, so they are part of the key
+            other = json.dumps(Xother, sort_keys=True, cls=NpEncoder, default=str)
+            schema_key = f'{schema_key}:{hashlib.sha1(other.encode()).hexdigest()}'
+
+        namespace = self.cache.get_namespace(
+            self.model_name, self.model_version, schema_key
+        )
+        hit_mask, rows = self.cache.get_many(namespace, row_hashes)
+        miss_idx = np.flatnonzero(~hit_mask)
+        if len(miss_idx) > 0:
+            X_miss = take_items(X, miss_idx)
+            resp = self.predict_uncached(
+                {self.data_key: X_miss, **Xother},
+                max_concurrency=max_concurrency,
+                deduplicate=deduplicate,
+            )
+            miss_preds = wf.to_frame(resp[self.output_key])
+            self.cache.put_many(namespace, row_hashes[miss_idx], miss_preds)
+            miss_rows = list(zip(*[miss_preds[c].tolist() for c in miss_preds.columns]))
+            for i, row in zip(miss_idx, miss_rows):
+                rows[i] = row
+
+        index = X.index if isinstance(X, (pd.DataFrame, pd.Series)) else None
+        columns = self.cache.get_columns(namespace)
+        predictions = pd.DataFrame.from_records(rows, columns=columns, index=index)
+        return {self.output_key: wf.from_frame(predictions, type(X))}
+
+    def predict_stream(self, chunks: Iterable, max_in_flight: int = None) -> Iterator:
+        """
+        Generate predictions chunk by chunk from an iterable of data, e.g.
+        read_csv_chunks or read_parquet_row_groups from aitomatic.api.streaming.
+        At most max_in_flight chunks are read ahead and in flight, and no more
+        are read until the caller consumes a result, so memory stays flat for
+        data larger than RAM.
+
+        :param chunks: iterable of data ('X') or of input_data dicts
+        :param max_in_flight: (optional) max number of chunks in flight,
+        defaults to self.max_concurrency
+        :return: iterator of predictions, one per chunk and in input order
+        """
+        if max_in_flight is None:
+            max_in_flight = self.max_concurrency
+
+        max_in_flight = max(max_in_flight, 1)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            try:
+                for chunk in chunks:
+                    if not (isinstance(chunk, dict) and self.data_key in chunk):
+                        chunk = {self.data_key: chunk}
+
+                    pending.append(pool.submit(self.predict, chunk, 1))
+                    if len(pending) >= max_in_flight:
+                        yield pending.popleft().result()[self.output_key]
+
+                while pending:
+                    yield pending.popleft().result()[self.output_key]
+            finally:
+                # caller stopped early, drop chunks that have not started
+                for future in pending:
+                    future.cancel()
+
+    def is_chunking_needed(self, X) -> bool:
+        """
+        Check if X serializes to more than the current chunk size. The first
+        call seeds the bytes per row estimate used to size chunks, later calls
+        use the estimate corrected by the requests sent.
+        """
+        size = self.chunk_sizer.estimate_size(X, self.serialize_data)
+        return size > self.chunk_sizer.max_bytes + 1
+
+    def serialize_data(self, X) -> Union[str, bytes]:
+        """
+        Serialize data the way it is sent in inference requests
+        """
+        if self.wire_format != 'json':
+            try:
+                return wf.encode(X, self.wire_format)
+            except ValueError:
+                pass
+
+        # converted as the data of a request, so lists are supported too
+        json_data, _ = convert_data_to_json({self.data_key: X})
+        return json.dumps(json_data[self.data_key], cls=NpEncoder)
+
+    def predict_chunk(self, input_data: Dict) -> Dict:
+        """
+        Send a single inference request for input_data, without chunking
+        """
+        request_kwargs, types_dict = self.build_prediction_request(input_data)
+        rows = self.count_items(input_data[self.data_key])
+        nbytes = len(request_kwargs['data'])
+
+        # Make web request
+        start = time.perf_counter()
+        try:
+            resp = make_raw_request(
+                'post',
+                self.PREDICTION_ENDPOINT,
+                transport=self.transport,
+                **request_kwargs,
+            )
+        except PayloadTooLarge:
+            self.chunk_sizer.observe_payload_error(nbytes)
+            raise
+        except UnsupportedMediaType:
+            if not self.fall_back_to_json(request_kwargs):
+                raise
+
+            return self.predict_chunk(input_data)
+
+        latency = time.perf_counter() - start
+        self.chunk_sizer.observe(rows, nbytes, latency)
+        return self.decode_prediction_response(
+            resp.headers.get('Content-Type'), resp.content, types_dict
+        )
+
+    def build_prediction_request(self, input_data: Dict) -> Tuple[Dict, Dict]:
+        """
+        Serialize input_data into the inference request, in self.wire_format
+        when the data supports it and json otherwise
+
+        :return: keyword arguments for the request (data, headers and params)
+        and the types_dict needed to decode the response
+        """
+        X = input_data[self.data_key]
+        if self.wire_format != 'json':
+            try:
+                body = wf.encode(X, self.wire_format)
+            except ValueError as e:
+                logger.debug(f'{self.wire_format} encoding failed ({e}), using json')
+            else:
+                headers = {**self.headers, **wf.get_headers(self.wire_format)}
+                params = {
+                    'project_name': self.project_name,
+                    'model_name': self.model_name,
+                    'model_version': self.model_version,
+                }
+                request_kwargs = {'data': body, 'headers': headers, 'params': params}
+                return request_kwargs, {self.output_key: type(X)}
 
         # Convert data to JSON safe dict
         # json_data, types_dict = convert_data_to_json(input_data)
-        json_data, types_dict = convert_data_to_json(input_data[self.data_key])
+        json_data, types_dict = convert_data_to_json(X)
 
         # TODO: change API input to take dict with {'input_data': {'X': data}}
         # so that A) models can take additional dict parameters if needed and
@@ -176,7 +581,7 @@ class WebModel:
         # user the same input type that they put in
 
         # TODO: remove this, after resolving API input format
-        types_dict[self.output_key] = type(input_data[self.data_key])
+        types_dict[self.output_key] = type(X)
 
         # Create web request dicts
         request_data = {
@@ -188,18 +593,38 @@ class WebModel:
 
         # Convert data to json str (NpEncoder allows numpy array conversion)
         request_data = json.dumps(request_data, cls=NpEncoder)
+        return {'data': request_data, 'headers': self.headers}, types_dict
 
-        # Make web request
-        resp = requests.post(
-            self.PREDICTION_ENDPOINT, headers=self.headers, data=request_data
+    def fall_back_to_json(self, request_kwargs: Dict) -> bool:
+        """
+        Switch to json after the server rejected a binary request body
+
+        :return: False if the rejected request was already json
+        """
+        content_type = request_kwargs['headers'].get('Content-Type')
+        if wf.get_wire_format(content_type) == 'json':
+            return False
+
+        logger.warning(
+            f'server does not accept {self.wire_format} payloads, '
+            f'falling back to json'
         )
+        self.wire_format = 'json'
+        return True
 
-        # Handle request errors
-        if resp.status_code != 200:
-            err = f'{resp.status_code}: {resp.content}'
-            raise ConnectionError(err)
+    def decode_prediction_response(
+        self, content_type: str, content: bytes, types_dict: Dict
+    ) -> Dict:
+        """
+        Convert inference response back to the types of the input data
+        """
+        resp_format = wf.get_wire_format(content_type)
+        if resp_format != 'json':
+            df = wf.decode(content, resp_format)
+            goal_type = types_dict.get(self.output_key, pd.DataFrame)
+            return {self.output_key: wf.from_frame(df, goal_type)}
 
-        resp_content = json.loads(resp.content)
+        resp_content = json.loads(content)
         # resp_data = resp_content['result']
         resp_data = resp_content
         result_file_path = resp_content['result_file_path']
@@ -234,27 +659,14 @@ class WebModel:
         # TODO: Make API call to get model stats & metrics, uncomment below
         # when API implemented
 
-        resp = requests.get(
-            self.METADATA_ENDPOINT,
-            headers=self.headers,
-            params={
-                'project_name': self.project_name,
-                'model_name': self.model_name,
-                'model_version': version,
-            },
-        )
-
-        # Handle request errors
-        if resp.status_code != 200:
-            err = f'{resp.status_code}: {resp.content}'
-            raise ConnectionError(err)
-
-        resp_data = json.loads(resp.content)
-        self.stats = resp_data['result']['stats']
-        self.metrics = resp_data['result']['metrics']
+        metadata = self.get_metadata(version=version)
+        self.stats = metadata['stats']
+        self.metrics = metadata['metrics']
 
         manager = ProjectManager(
-            project_name=self.project_name, api_token=self.api_token
+            project_name=self.project_name,
+            api_token=self.api_token,
+            transport=self.transport,
         )
         self.model_info = manager.get_model_info(self.model_name)
         self.knowledge = manager.get_knowledge(
@@ -262,24 +674,59 @@ class WebModel:
         )
         return self
 
+    def get_metadata(self, model_name: str = None, version: str = 'latest') -> dict:
+        """
+        stats and metrics of a model of the project
+
+        :param model_name: (optional) defaults to this model
+        """
+        if model_name is None:
+            model_name = self.model_name
+
+        resp_data = make_request(
+            'get',
+            self.METADATA_ENDPOINT,
+            headers=self.headers,
+            params={
+                'project_name': self.project_name,
+                'model_name': model_name,
+                'model_version': version,
+            },
+            transport=self.transport,
+        )
+        return resp_data['result']
+
     def generate_ml_model_params(
         self, current_ml_model_params: List[Dict], model_params: Dict
-    ) -> Dict:
+    ) -> List[List]:
         """
         Generate model parameters for ML model
         Based on current ml model params, it will generate list of ML models (combination)
+        see generate_ml_model_param_grid for large ranges
+        """
+        grid = self.generate_ml_model_param_grid(current_ml_model_params, model_params)
+        for params in model_params.values():
+            params['tuning_ranges'] = list(params['tuning_ranges'])
+
+        return list(grid)
+
+    def generate_ml_model_param_grid(
+        self, current_ml_model_params: List[Dict], model_params: Dict
+    ) -> ParamGrid:
+        """
+        generate_ml_model_params as a lazy ParamGrid of lists, the ML models
+        of a combination are built on access
         """
 
         ml_params_builder = MLParamBuilder()
 
-        # generate combination of model_params
+        # generate combination of model_params, built on access
 
         for key in model_params.keys():
-            model_ranges, _ = generate_train_hyperparams(model_params[key])
-            model_params[key]['tuning_ranges'] = [
-                ml_params_builder.build_with_type(model_type=key, **model)
-                for model in model_ranges
-            ]
+            model_params[key]['tuning_ranges'] = ParamGrid(
+                model_params[key],
+                transform=partial(_build_ml_param, ml_params_builder, key),
+            )
 
         ranges = []
         for ml_model in current_ml_model_params:
@@ -288,12 +735,22 @@ class WebModel:
                 ranges.append([ml_model])
                 continue
             ranges.append(model_params[ml_model.get('type')]['tuning_ranges'])
-        return [list(item) for item in list(product(*ranges))]
+        return ParamGrid(ranges)
 
     def tune_with_hyperparams(
-        self, tuning_params: List[Any], base_name: str = None, data_name: str = None
+        self,
+        tuning_params: List[Any],
+        base_name: str = None,
+        data_name: str = None,
+        model_builder: ModelBuilder = None,
+        **kwargs,
     ):
-        model_builder = ModelBuilder()
+        """
+        :param model_builder: (optional) builder to submit with
+        :param kwargs: passed to ModelBuilder.tune_model_with_hyperparams
+        """
+        if model_builder is None:
+            model_builder = ModelBuilder(transport=self.transport)
         if not base_name:
             base_name = self.model_name
         model_df = model_builder.tune_model_with_hyperparams(
@@ -306,6 +763,7 @@ class WebModel:
             mapping_data=self.model_info.schema_mapping,
             label_columns=self.model_info.label_columns_mapping,
             metadata=self.model_info.metadata,
+            **kwargs,
         )
 
         return model_df
@@ -317,22 +775,26 @@ class WebModel:
             'model_version': self.model_version,
             'metrics': self.metrics,
         }
-        resp = requests.post(self.METRICS_ENDPOINT, headers=self.headers, json=payload)
-
-        if resp.status_code != 200:
-            err = f'{resp.status_code}: {resp.content}'
-            raise ConnectionError(err)
+        make_request(
+            'post',
+            self.METRICS_ENDPOINT,
+            headers=self.headers,
+            json=payload,
+            transport=self.transport,
+        )
 
     def log_metrics(self, key, value):
         self.metrics[key] = value
         self._save_metrics()
 
     @staticmethod
-    def get_model_names(api_token=None, project_name=None):
+    def get_model_names(api_token=None, project_name=None, transport=None):
         if project_name is None:
             project_id = os.getenv('AITOMATIC_PROJECT_ID')
         else:
-            project_id = get_project_id(project_name, api_token=api_token)
+            project_id = get_project_id(
+                project_name, api_token=api_token, transport=transport
+            )
 
         if api_token is None:
             api_token = os.getenv('AITOMATIC_API_TOKEN')
@@ -345,14 +807,9 @@ class WebModel:
             'Content-Type': 'application/json',
             'accept': 'application/json',
         }
-        resp = requests.get(url, headers=headers)
-
-        # Handle request errors
-        if resp.status_code != 200:
-            err = f'{resp.status_code}: {resp.content}'
-            raise ConnectionError(err)
-
-        resp_content = json.loads(resp.content)
+        resp_content = make_request(
+            'get', url, headers=headers, transport=transport
+        )
         return [x['name'] for x in resp_content]
 
 
@@ -397,7 +854,8 @@ def convert_json_to_data(json_data: Dict, types_dict: Dict) -> Dict:
     """
     converts json data input pandas Dataframe or pandas Series or numpy array
     depending on the types_dict generated when converting the input_data into
-    json
+    json. Payloads are parsed without eval and numeric values are decoded into
+    typed numpy columns
     """
     out_data = {}
     if isinstance(json_data, str):
@@ -405,16 +863,134 @@ def convert_json_to_data(json_data: Dict, types_dict: Dict) -> Dict:
 
     for k, v in json_data.items():
         goal_type = types_dict.get(k, pd.DataFrame)
-        if goal_type == pd.DataFrame or goal_type == pd.Series:
-            out_data[k] = goal_type(eval(v))
+        if goal_type == pd.DataFrame:
+            out_data[k] = decode_frame(parse_payload(v))
+        elif goal_type == pd.Series:
+            out_data[k] = decode_series(parse_payload(v))
         elif goal_type == np.ndarray:
-            out_data[k] = np.array(v, dtype='O')
+            out_data[k] = decode_values(parse_payload(v))
         else:
             out_data[k] = v
 
     return out_data
 
 
+NON_FINITE_FMT = re.compile(r'(?<![\w.\'"])(-?)(nan|inf)(?![\w\'"])')
+
+
+def parse_payload(v: Any) -> Any:
+    """
+    Parse a payload string sent as JSON or as a python literal (including
+    nan and inf) without eval. Non-strings are returned as is
+    """
+    if not isinstance(v, str):
+        return v
+
+    if orjson is not None:
+        # optional, about twice as fast on large payloads but rejects NaN
+        try:
+            return orjson.loads(v)
+        except ValueError:
+            pass
+
+    try:
+        return json.loads(v)
+    except ValueError:
+        pass
+
+    try:
+        return ast.literal_eval(v)
+    except (ValueError, SyntaxError):
+        # nan/inf are names, not literals: nan -> None, inf -> overflowing float
+        fixed = NON_FINITE_FMT.sub(
+            lambda m: 'None' if m.group(2) == 'nan' else f'{m.group(1)}1e999', v
+        )
+        return ast.literal_eval(fixed)
+
+
+def decode_values(values: List) -> np.ndarray:
+    """
+    Convert a list of values into the narrowest numpy array: numeric types are
+    kept typed (None becomes nan), anything else becomes an object array
+    """
+    try:
+        arr = np.asarray(values)
+    except ValueError:
+        # ragged nested lists
+        arr = np.empty(len(values), dtype='O')
+        arr[:] = values
+        return arr
+
+    if arr.dtype.kind in 'biufcmM':
+        return arr
+
+    if arr.dtype.kind == 'O':
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+
+    # strings, or numbers mixed with strings that numpy cast to strings
+    return np.array(values, dtype='O')
+
+
+def decode_index(keys: List) -> pd.Index:
+    """
+    Index from JSON object keys, integer-like keys become an integer index
+    """
+    arr = np.asarray(keys)
+    if arr.dtype.kind in 'US':
+        try:
+            arr = arr.astype(np.int64)
+        except ValueError:
+            arr = np.array(keys, dtype='O')
+
+    return pd.Index(arr)
+
+
+def decode_series(data: Any, name: Any = None) -> pd.Series:
+    if isinstance(data, dict):
+        values = list(data.values())
+        if len(values) == 1 and isinstance(values[0], (dict, list)):
+            # single column frame payload, e.g. {'predictions': {...}}
+            return decode_series(values[0], name=list(data.keys())[0])
+
+        index = decode_index(list(data.keys()))
+        return pd.Series(decode_values(values), index=index, name=name)
+
+    return pd.Series(decode_values(data), name=name)
+
+
+def decode_frame(data: Any) -> pd.DataFrame:
+    """
+    DataFrame from the column-oriented ({column: {index: value}}) payload made by
+    DataFrame.to_json, or from {column: [values]} or a list of values/records
+    """
+    if isinstance(data, list):
+        if len(data) > 0 and isinstance(data[0], dict):
+            return pd.DataFrame.from_records(data)
+
+        return pd.DataFrame(decode_values(data))
+
+    if not isinstance(data, dict) or len(data) == 0:
+        return pd.DataFrame(data)
+
+    columns = list(data.values())
+    if all(isinstance(c, list) for c in columns):
+        return pd.DataFrame({k: decode_values(v) for k, v in data.items()})
+
+    if not all(isinstance(c, dict) for c in columns):
+        return decode_series(data).to_frame()
+
+    keys = list(columns[0].keys())
+    if not all(list(c.keys()) == keys for c in columns[1:]):
+        # columns are not aligned, let pandas match up the index
+        return pd.DataFrame(data).infer_objects()
+
+    out = {k: decode_values(list(c.values())) for k, c in data.items()}
+    return pd.DataFrame(out, index=decode_index(keys))
+
+
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, np.integer):
@@ -426,6 +1002,10 @@ class NpEncoder(json.JSONEncoder):
         return super(NpEncoder, self).default(obj)
 
 
+def _build_ml_param(builder: MLParamBuilder, model_type: str, params: dict) -> dict:
+    return builder.build_with_type(model_type=model_type, **params)
+
+
 def tune_model(
     project_name: str,
     base_model: str,
@@ -434,22 +1014,34 @@ def tune_model(
     output_model_df_path,
     wait_for_tuning_to_complete=bool,
     prefix: str = "finetune",
+    max_models: int = None,
+    sample_method: str = 'random',
+    seed: int = None,
 ):
+    """
+    :param max_models: (optional) number of configs sampled from the grid
+    with sample_method and seed, see ParamGrid.sample. Defaults to every
+    config of the grid
+    """
     model = WebModel(model_name=base_model, project_name=project_name)
     model.load()
 
     # build ml tuning ranges
-    ml_ranges = model.generate_ml_model_params(
+    ml_ranges = model.generate_ml_model_param_grid(
         model.model_info.ml_models, ml_tuning_params
     )
 
     # build conclusion threshold tuning ranges
-    conclusion_threshold_ranges, _ = generate_train_hyperparams(conclusion_tuning_range)
+    conclusion_threshold_ranges = generate_train_hyperparam_grid(
+        conclusion_tuning_range
+    )
 
     TUNING_RANGES = {'threshold': conclusion_threshold_ranges, 'ml_models': ml_ranges}
-    tuning_params, _ = generate_train_hyperparams(TUNING_RANGES)
+    tuning_params = generate_train_hyperparam_grid(TUNING_RANGES)
+    if max_models is not None:
+        tuning_params = tuning_params.sample(max_models, sample_method, seed)
 
-    builder = ModelBuilder()
+    builder = ModelBuilder(transport=model.transport)
     base_name = f'{prefix} - {base_model}'
     model_df = model.tune_with_hyperparams(tuning_params, base_name=base_name)
     try:
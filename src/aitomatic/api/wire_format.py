@@ -0,0 +1,160 @@
+"""
+Binary, columnar encodings of inference payloads.
+
+'parquet' sends the data as a Parquet file (written with fastparquet through
+pandas). 'numpy' sends a small JSON header followed by one contiguous
+little-endian buffer per column:
+
+    <uint32 header length><header json><column 0 bytes><column 1 bytes>...
+
+where the header is {'nrows': n, 'columns': [{'name': c, 'dtype': '<f8'}, ...]}
+and a column named INDEX_COLUMN, if present, holds the index. 'numpy' only
+supports numeric and boolean columns.
+"""
+import io
+import json
+import struct
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+WIRE_FORMATS = ['json', 'parquet', 'numpy']
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'parquet': 'application/vnd.apache.parquet',
+    'numpy': 'application/x-numpy-columns',
+}
+INDEX_COLUMN = '__index__'
+# input types to_frame converts, others such as lists are only sent as json
+FRAME_TYPES = (pd.DataFrame, pd.Series, np.ndarray, dict)
+
+
+def get_wire_format(content_type: str) -> str:
+    """
+    Wire format for a Content-Type header value, defaults to json
+    """
+    if content_type is None:
+        return 'json'
+
+    mime = content_type.split(';')[0].strip().lower()
+    for wire_format, value in CONTENT_TYPES.items():
+        if mime == value:
+            return wire_format
+
+    return 'json'
+
+
+def to_frame(X) -> pd.DataFrame:
+    """
+    Convert supported input types to a DataFrame with string column names
+    """
+    if isinstance(X, pd.DataFrame):
+        df = X
+    elif isinstance(X, pd.Series):
+        df = X.to_frame(name=X.name if X.name is not None else 0)
+    elif isinstance(X, np.ndarray):
+        df = pd.DataFrame(X.reshape(len(X), -1))
+    elif isinstance(X, dict):
+        df = pd.DataFrame(X)
+    else:
+        raise ValueError(f'Data type {type(X)} not supported by binary wire formats')
+
+    if not all(isinstance(c, str) for c in df.columns):
+        df = df.rename(columns=str)
+
+    return df
+
+
+def from_frame(df: pd.DataFrame, goal_type: type):
+    """
+    Convert decoded DataFrame back to the type the user passed in
+    """
+    if goal_type == pd.Series:
+        return df.iloc[:, 0]
+    elif goal_type == np.ndarray:
+        values = df.to_numpy()
+        return values[:, 0] if values.shape[1] == 1 else values
+    elif goal_type == dict:
+        return df.to_dict()
+    elif goal_type == list:
+        return df.iloc[:, 0].tolist()
+
+    return df
+
+
+def encode_parquet(X) -> bytes:
+    return to_frame(X).to_parquet(None, engine='fastparquet')
+
+
+def decode_parquet(content: bytes) -> pd.DataFrame:
+    df = pd.read_parquet(io.BytesIO(content), engine='fastparquet')
+    if df.index.name == 'index':
+        # fastparquet names unnamed indexes 'index' when writing
+        df.index.name = None
+
+    return df
+
+
+def encode_numpy(X) -> bytes:
+    df = to_frame(X)
+    columns = []
+    buffers = []
+    items = list(df.items())
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+        items.append((INDEX_COLUMN, df.index))
+
+    for name, values in items:
+        values = np.asarray(values)
+        if values.dtype.kind not in 'biuf':
+            raise ValueError(
+                f'Column {name} has dtype {values.dtype}, numpy wire format '
+                f'only supports numeric columns'
+            )
+
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        columns.append({'name': name, 'dtype': values.dtype.str})
+        buffers.append(values.tobytes())
+
+    header = json.dumps({'nrows': len(df), 'columns': columns}).encode()
+    return b''.join([struct.pack('<I', len(header)), header, *buffers])
+
+
+def decode_numpy(content: bytes) -> pd.DataFrame:
+    (header_len,) = struct.unpack_from('<I', content, 0)
+    header = json.loads(content[4 : 4 + header_len])
+    nrows = header['nrows']
+    offset = 4 + header_len
+    data = {}
+    for col in header['columns']:
+        dtype = np.dtype(col['dtype'])
+        data[col['name']] = np.frombuffer(content, dtype, nrows, offset)
+        offset += dtype.itemsize * nrows
+
+    index = data.pop(INDEX_COLUMN, None)
+    return pd.DataFrame(data, index=index)
+
+
+ENCODERS = {'parquet': encode_parquet, 'numpy': encode_numpy}
+DECODERS = {'parquet': decode_parquet, 'numpy': decode_numpy}
+
+
+def encode(X, wire_format: str) -> bytes:
+    return ENCODERS[wire_format](X)
+
+
+def decode(content: bytes, wire_format: str) -> pd.DataFrame:
+    return DECODERS[wire_format](content)
+
+
+def get_headers(wire_format: str) -> Dict[str, str]:
+    """
+    Request headers announcing wire_format for the body and asking for the
+    same format back, with json as the fallback
+    """
+    content_type = CONTENT_TYPES[wire_format]
+    accept = content_type
+    if wire_format != 'json':
+        accept = f'{content_type}, {CONTENT_TYPES["json"]};q=0.5'
+
+    return {'Content-Type': content_type, 'accept': accept}
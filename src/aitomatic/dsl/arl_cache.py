@@ -0,0 +1,143 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from .arl_handler import ARLHandler
+
+# part of every key, bump when the parsed form changes
+PARSER_VERSION = 1
+
+
+class KnowledgeCache:
+    """
+    Parsed knowledge keyed by a hash of the knowledge sections, so loading
+    the same knowledge again skips parsing. An LRU tier in memory is backed
+    by an optional SQLite file holding the parsed dicts as JSON.
+
+    Handlers returned share the parsed dicts of the cached entry, so a hit
+    costs a hash of the knowledge, not a copy. The parsed dicts are never
+    changed in place: editing a handler through arl_dict, arl_str,
+    map_data_variables or copy builds new dicts, so the cache and other
+    handlers keep theirs. Treat features, rules and conclusions as read-only,
+    or take copy.deepcopy(handler) before changing them in place.
+
+    Ex:
+    cache = KnowledgeCache(path='knowledge.sqlite')
+    set_default_knowledge_cache(cache)
+    ProjectManager(project_name).get_knowledge(knowledge_name)
+    """
+
+    def __init__(self, max_entries: int = 128, path: str = None):
+        """
+        :param max_entries: number of parsed knowledge sets kept in memory
+        :param path: (optional) SQLite file for the on-disk tier
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS knowledge '
+                '(key TEXT PRIMARY KEY, value TEXT)'
+            )
+
+    @staticmethod
+    def get_key(arl_dict: dict) -> str:
+        digest = hashlib.sha256(str(PARSER_VERSION).encode())
+        for k in ARLHandler.SECTIONS:
+            content = arl_dict.get(k, '').encode()
+            # length prefixed, so text can not move between sections
+            digest.update(len(content).to_bytes(8, 'little'))
+            digest.update(content)
+
+        return digest.hexdigest()
+
+    def get_handler(self, arl_dict: dict) -> ARLHandler:
+        """
+        ARLHandler for arl_dict, parsed only on a cache miss
+        """
+        key = KnowledgeCache.get_key(arl_dict)
+        with self.lock:
+            state = self.entries.get(key)
+            if state is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return ARLHandler.from_parsed_state(state)
+
+            if self.db is not None:
+                row = self.db.execute(
+                    'SELECT value FROM knowledge WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    state = json.loads(row[0])
+                    self.add_entry(key, state)
+                    self.disk_hits += 1
+                    return ARLHandler.from_parsed_state(state)
+
+            self.misses += 1
+
+        handler = ARLHandler(arl_dict)
+        state = handler.get_parsed_state()
+        with self.lock:
+            self.add_entry(key, state)
+            if self.db is not None:
+                with self.db:
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO knowledge VALUES (?, ?)',
+                        (key, json.dumps(state)),
+                    )
+
+        return handler
+
+    def add_entry(self, key: str, state: dict):
+        self.entries[key] = state
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                with self.db:
+                    self.db.execute('DELETE FROM knowledge')
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+_default_knowledge_cache = None
+
+
+def get_default_knowledge_cache() -> KnowledgeCache:
+    """
+    Process-wide knowledge cache used by ProjectManager.get_knowledge
+    """
+    global _default_knowledge_cache
+    if _default_knowledge_cache is None:
+        _default_knowledge_cache = KnowledgeCache()
+
+    return _default_knowledge_cache
+
+
+def set_default_knowledge_cache(cache: KnowledgeCache):
+    global _default_knowledge_cache
+    _default_knowledge_cache = cache
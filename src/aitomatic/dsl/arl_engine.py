@@ -0,0 +1,165 @@
+from typing import Callable, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .arl_handler import ARLHandler
+
+
+class ARLEngine:
+    """
+    Evaluates parsed ARL knowledge locally, over a whole DataFrame at once.
+    Each feature class referenced by the knowledge becomes one boolean column
+    (class ranges include their min and exclude their max, `is` classes match
+    exactly and take precedence), the handler's compiled rules and
+    conclusions combine them. Features are classified with one searchsorted
+    per column, see FeatureIndex.
+
+    Time conditions (`for >5 minutes`) are ignored, every row is evaluated
+    on its own, see ARLStreamEvaluator for time-qualified knowledge. A rule
+    defined more than once is evaluated one definition at a time, each one
+    referencing the rule sees the value of the definition before it.
+
+    Ex:
+    engine = ARLEngine(ARLHandler(knowledge))
+    conclusions = engine.evaluate(df)  # one bool column per `name[class]`
+    """
+
+    # functions for `&` and `|`, None for the bitwise operators
+    OPERATORS = None
+
+    def __init__(self, arl: ARLHandler) -> None:
+        self.features = arl.features['features']
+        self.feature_index = arl.feature_index
+        rules = arl.rule_expressions
+        self.rules = {name: rules[name] for name in arl.graph.order}
+        # earlier definitions of redefined rules, evaluated before the last
+        self.redefined = arl.graph.redefined
+        self.conclusions = arl.conclusion_expressions
+        self.time_conditions = {
+            name: rule['time_condition'] for name, rule in arl.rules['rules'].items()
+        }
+        self.time_conditions.update(
+            {
+                f'{name}[{cls}]': conc['time_condition']
+                for name, classes in arl.conclusions['conclusions'].items()
+                for cls, conc in classes.items()
+            }
+        )
+
+    @staticmethod
+    def class_mask(values: np.ndarray, cls_def: dict) -> np.ndarray:
+        """
+        boolean membership of values in one feature class
+        """
+        if 'is' in cls_def.keys():
+            return values == cls_def['is']
+
+        lo = -np.inf if cls_def['min'] == 'min' else cls_def['min']
+        hi = np.inf if cls_def['max'] == 'max' else cls_def['max']
+        upper = values <= hi if hi == np.inf else values < hi
+        return (values >= lo) & upper
+
+    def get_classes(self, X: pd.DataFrame, feature: str, cls: str) -> dict:
+        """
+        classes of feature, checked to define cls with numbers and to be a
+        column of X
+        """
+        classes = self.features.get(feature)
+        if classes is None or cls not in classes.keys():
+            raise ValueError(f'Feature class {feature}[{cls}] is not defined')
+
+        if feature not in self.feature_index.keys():
+            raise ValueError(
+                f'Feature {feature} has class bounds that are not numbers, map '
+                f'its undefined variables before evaluating it'
+            )
+
+        if feature not in X.columns:
+            raise KeyError(f'Feature {feature} not found in data columns')
+
+        return classes
+
+    def get_membership(
+        self, X: pd.DataFrame, feature: str, cls: str, cache: dict
+    ) -> np.ndarray:
+        """
+        :param cache: per feature results of this evaluate call, e.g. class
+        codes, updated in place
+        """
+        classes = self.get_classes(X, feature, cls)
+        index = self.feature_index[feature]
+        if not index.disjoint:
+            values = X[feature].to_numpy(dtype=float)
+            return ARLEngine.class_mask(values, classes[cls])
+
+        if feature not in cache.keys():
+            cache[feature] = index.classify(X[feature].to_numpy(dtype=float))
+
+        return cache[feature] == index.codes[cls]
+
+    def evaluate(
+        self, X: Union[pd.DataFrame, dict], include_rules: bool = False
+    ) -> pd.DataFrame:
+        """
+        evaluate all conclusions for every row of X
+
+        :param X: data with one column per feature
+        :param include_rules: also return one column per rule
+        :return: DataFrame with X's index and one bool column per conclusion
+        class, named `name[class]`
+        """
+        return self.evaluate_frame(X, include_rules, self.get_membership)
+
+    def evaluate_frame(
+        self,
+        X: Union[pd.DataFrame, dict],
+        include_rules: bool,
+        get_membership: Callable[..., np.ndarray],
+    ) -> pd.DataFrame:
+        """
+        evaluate, with the feature class memberships of get_membership, called
+        like self.get_membership
+        """
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X)
+
+        memberships = {}
+        cache = {}
+        rules = {}
+
+        def _lookup(ref: Tuple[str, str]) -> np.ndarray:
+            name, cls = ref
+            if cls is None:
+                if name not in rules.keys():
+                    raise ValueError(f'Rule {name} is not defined')
+
+                return rules[name]
+
+            if ref not in memberships.keys():
+                memberships[ref] = get_membership(X, name, cls, cache)
+
+            return memberships[ref]
+
+        # rules come after the rules they reference, see ARLGraph
+        for name, expr in self.rules.items():
+            for earlier in self.redefined.get(name, []):
+                rules[name] = earlier.evaluate(_lookup, self.OPERATORS)
+
+            values = expr.evaluate(_lookup, self.OPERATORS)
+            rules[name] = self.apply_time_condition(name, values)
+
+        result = {}
+        for name, expr in self.conclusions.items():
+            values = expr.evaluate(_lookup, self.OPERATORS)
+            result[name] = self.apply_time_condition(name, values)
+        if include_rules:
+            result.update(rules)
+
+        return pd.DataFrame(result, index=X.index)
+
+    def apply_time_condition(self, name: str, values: np.ndarray) -> np.ndarray:
+        """
+        hook for the time condition of rule or conclusion name, ignored here
+        """
+        return values
@@ -0,0 +1,199 @@
+import operator
+from typing import Callable, List, Sequence, Tuple
+
+from .arl_lexer import AND, OR, ARLLexer
+
+# function of every operator token, keyed like ARLLexer tokens
+OPERATORS = {AND: operator.and_, OR: operator.or_}
+
+
+class ARLExpression:
+    """
+    Rule or conclusion definition checked once and built into a tree of
+    `&`/`|` closures on first use. Every feature class (`feature[class]`)
+    and rule alias in the definition is a reference, evaluating the
+    expression only applies the operators to the values passed in for the
+    references.
+
+    Ex:
+    expr = ARLExpression('hot & (pressure[high] | pressure[low])')
+    expr.refs  # [('hot', None), ('pressure', 'high'), ('pressure', 'low')]
+    expr([hot, pressure_high, pressure_low])
+    """
+
+    __slots__ = ('definition', 'refs', '_tree', 'funcs')
+
+    def __init__(self, definition: str) -> None:
+        self.definition = definition
+        self.refs = ARLExpression.check(
+            ARLLexer.tokenize_definition(definition), definition
+        )
+        self._tree = None
+        # closure trees by operators, built on first use, see get_func
+        self.funcs = {}
+
+    @staticmethod
+    def check(tokens: list, definition: str) -> List[Tuple[str, str]]:
+        """
+        check operands and `&`/`|` alternate and parentheses are balanced
+
+        :return: (feature, class) of every reference, class is None for rule
+        aliases
+        :raises SyntaxError: on an unexpected token
+        """
+        refs = []
+        depth = 0
+        operand = True
+        for op, ref, cls, error in tokens:
+            if ref and operand:
+                refs.append((ref, cls or None))
+                operand = False
+            elif op == '(' and operand:
+                depth += 1
+            elif op == ')' and not operand and depth > 0:
+                depth -= 1
+            elif (op == AND or op == OR) and not operand:
+                operand = True
+            else:
+                raise SyntaxError(f'Unexpected {op or ref or error} in "{definition}"')
+
+        if operand or depth > 0:
+            raise SyntaxError(f'Unexpected end of "{definition}"')
+
+        return refs
+
+    def rename(self, definition: str, names: dict) -> 'ARLExpression':
+        """
+        expression with renamed features, sharing the operator tree and
+        closures of this one
+
+        :param definition: renamed definition, see ARLLexer.rename_refs
+        :param names: new name by feature name
+        """
+        out = ARLExpression.__new__(ARLExpression)
+        out.definition = definition
+        out.refs = [
+            (ref if cls is None else names.get(ref, ref), cls) for ref, cls in self.refs
+        ]
+        out._tree = self._tree
+        out.funcs = self.funcs
+        return out
+
+    @property
+    def tree(self):
+        """
+        tree of `&` and `|` operations on reference indices, built on first
+        use. `&` binds tighter than `|`, as in python.
+
+        :return: index into refs or a tuple (operator, left, right)
+        """
+        if self._tree is None:
+            self._tree = ARLExpression.parse(
+                ARLLexer.tokenize_definition(self.definition)
+            )
+
+        return self._tree
+
+    @staticmethod
+    def parse(tokens: list):
+        """
+        :param tokens: checked definition tokens, see check
+        """
+        tokens = [(op, ref) for op, ref, _, _ in tokens] + [('', '')]
+        pos = 0
+        n_refs = 0
+
+        def _operand():
+            nonlocal pos, n_refs
+            op, ref = tokens[pos]
+            pos += 1
+            if ref:
+                n_refs += 1
+                return n_refs - 1
+
+            # opening parenthesis
+            node = _operation(OR)
+            pos += 1
+            return node
+
+        def _operation(op: str):
+            nonlocal pos
+            # `|` operates on `&` operations, `&` on operands
+            operand = _operand if op == AND else lambda: _operation(AND)
+            node = operand()
+            while tokens[pos][0] == op:
+                pos += 1
+                node = (op, node, operand())
+
+            return node
+
+        return _operation(OR)
+
+    @staticmethod
+    def build(node, operators: dict = None) -> Callable[[Sequence], object]:
+        """
+        :param node: tree or subtree from parse
+        :param operators: (optional) function by operator token, AND and OR,
+        defaults to `&` and `|`
+        """
+        if operators is None:
+            operators = OPERATORS
+
+        if isinstance(node, int):
+            return lambda values: values[node]
+
+        op = operators[node[0]]
+        left = ARLExpression.build(node[1], operators)
+        right = ARLExpression.build(node[2], operators)
+        return lambda values: op(left(values), right(values))
+
+    def get_func(self, operators: dict = None) -> Callable[[Sequence], object]:
+        """
+        closure tree of the expression, built on first use
+
+        :param operators: (optional) see build, e.g. fuzzy t-norms
+        """
+        if operators is None:
+            operators = OPERATORS
+
+        key = (operators[AND], operators[OR])
+        func = self.funcs.get(key)
+        if func is None:
+            func = ARLExpression.build(self.tree, operators)
+            self.funcs[key] = func
+
+        return func
+
+    def __call__(self, values: Sequence):
+        """
+        :param values: value of every reference, in the order of self.refs
+        """
+        return self.get_func()(values)
+
+    def evaluate(
+        self, lookup: Callable[[Tuple[str, str]], object], operators: dict = None
+    ):
+        """
+        evaluate with lookup(ref) giving the value of every reference
+
+        :param operators: (optional) see build
+        """
+        return self.get_func(operators)([lookup(ref) for ref in self.refs])
+
+
+def get_expression(definition: str, expressions: dict = None) -> ARLExpression:
+    """
+    compile definition, reusing the compiled form in expressions if present
+
+    :param expressions: (optional) cache of compiled definitions, updated in
+    place
+    """
+    if expressions is None:
+        return ARLExpression(definition)
+
+    expr = expressions.get(definition)
+    if expr is None:
+        expr = ARLExpression(definition)
+        expressions[definition] = expr
+
+    return expr
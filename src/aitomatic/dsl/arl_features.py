@@ -1,7 +1,8 @@
 import re
 import numpy as np
 
-from typing import Union
+from typing import Dict, List, Union
+from .arl_lexer import ARLLexer
 from .utils import str_to_value
 
 
@@ -20,29 +21,25 @@ class ARLFeatures:
 
     @staticmethod
     def parse_feature_str_to_dict(feature_str: str) -> dict:
-        # remove commented out lines
-        feature_str = '\n'.join(
-            [line for line in feature_str.splitlines() if not line.startswith('%')]
-        )
-
-        pieces = feature_str.split(ARLFeatures.SEPERATOR)
-        line_num = 0
         result = {'undefined': [], 'features': {}}
-
-        for piece in pieces:
-            try:
-                seg_dict, undefined = ARLFeatures.parse_feature_segment(piece.strip())
-            except SyntaxError as e:
-                line_no = int(e.msg.split('line')[-1].strip())
-                err_line = line_num + line_no
-                raise SyntaxError(f'Syntax Error in Features line {err_line}') from e
-
-            result['features'].update(seg_dict)
-            result['undefined'].extend(undefined)
-            line_num = line_num + len(piece.splitlines()) + 1
-
-        # remove duplicates
-        result['undefined'] = list(set(result['undefined']))
+        undefined = set()
+        # classes of the feature block being read, None between blocks
+        classes = None
+        for token in ARLLexer.tokenize(feature_str, 'features'):
+            kind, m = token.kind, token.match
+            if kind == 'member' and classes is not None:
+                cls, cls_def, cls_undefined = ARLFeatures.parse_member(m)
+                classes[cls] = cls_def
+                undefined.update(cls_undefined)
+            elif kind == 'feature' and classes is None:
+                classes = {}
+                result['features'][m.group('feature')] = classes
+            elif kind == 'blank':
+                classes = None
+            elif kind != 'comment':
+                raise SyntaxError(f'Syntax Error in Features line {token.line}')
+
+        result['undefined'] = list(undefined)
         return result
 
     @staticmethod
@@ -68,75 +65,25 @@ class ARLFeatures:
         return '\n'.join(result)
 
     @staticmethod
-    def parse_feature_segment(segment: str):
-        # Check that first line is feature name and rest of lines are membership classes
-        feature_name_fmt = '^(?P<feature_name>[\w \.\-]+)$'
-        feature_group_fmt = '--> (?P<group>[\w -]+) :: (?P<def>.+)'
-
-        lines = segment.split('\n')
-        feature_name_line = lines.pop(0).strip()
-        # ignore commented out feature
-        if feature_name_line.startswith('%'):
-            return {}, {}
-
-        feat_check = re.match(feature_name_fmt, feature_name_line)
-        if feat_check is None:
-            raise SyntaxError('Invalid Feature Name on line 1')
-
-        # ignore commented lines
-        lines = [line for line in lines if not line.startswith('%')]
-        groups = [re.match(feature_group_fmt, line) for line in lines]
-        if None in groups:
-            idx = groups.index(None) + 2
-            raise SyntaxError(f'Invalid membership definition on line {idx}')
-
-        feature_name_line = feat_check.groupdict()['feature_name']
-        result = {}
-        result[feature_name_line] = {}
+    def parse_member(member: re.Match):
+        """
+        :param member: `member` token match, see ARLLexer
+        :return: class name, class definition and its undefined variables
+        """
+        keys = ['is'] if member.group('is') is not None else ['min', 'max']
+        cls_def = {}
         undefined = []
+        for k in keys:
+            v = member.group(k)
+            if v in ARLFeatures.RESERVED_WORDS and k != 'is':
+                cls_def[k] = v
+                continue
 
-        for i, grp in enumerate(groups):
-            tokens = grp.groupdict()
-            grp = tokens['group'].strip()
-            grp_def = tokens['def'].strip()
-            try:
-                line_def = ARLFeatures.parse_feature_group_definition(grp_def)
-            except Exception as e:
-                raise SyntaxError(f'Invalid membership definition on line {i+2}') from e
-
-            result[feature_name_line][grp] = line_def
-            undefined.extend(line_def.pop('undefined'))
-
-        return result, undefined
-
-    @staticmethod
-    def parse_feature_group_definition(grp_def: str):
-        result = {}
-        result['undefined'] = []
-
-        if ' to ' in grp_def:
-            format = '(?P<min>.+) to (?P<max>.+)'
-            tokens = re.match(format, grp_def).groupdict()
-            for k, v in tokens.items():
-                if v in ARLFeatures.RESERVED_WORDS:
-                    result[k] = v
-                else:
-                    x, undefined = str_to_value(v)
-                    result[k] = x
-                    if undefined:
-                        result['undefined'].append(x)
-
-            return result
-        elif grp_def.startswith('is'):
-            v = grp_def.split('is')[1].strip()
-            x, undefined = str_to_value(v)
-            result['is'] = x
-            if undefined:
-                result['undefined'].append(x)
-        else:
-            raise SyntaxError('Definition does not have an allowed form')
+            cls_def[k], is_undefined = str_to_value(v)
+            if is_undefined:
+                undefined.append(cls_def[k])
 
-        return result
+        return member.group('class').strip(), cls_def, undefined
 
     @property
     def feature_str(self):
@@ -269,3 +216,113 @@ class ARLFeatures:
             result[name] = tmp
 
         return result
+
+    @staticmethod
+    def build_feature_index(feature_dict: dict) -> Dict[str, 'FeatureIndex']:
+        """
+        interval index of every parsed feature with numeric classes, see
+        FeatureIndex. Features with undefined variables are left out.
+        """
+        return {
+            feature: FeatureIndex(classes)
+            for feature, classes in feature_dict['features'].items()
+            if FeatureIndex.is_numeric(classes)
+        }
+
+
+class FeatureIndex:
+    """
+    Sorted class boundaries of one numeric feature, so a whole column is
+    classified with np.searchsorted instead of a comparison per class.
+
+    Range classes include their min and exclude their max, except a max of
+    'max'. A value equal to an `is` class belongs to that class only. Values
+    in no class, and NaN, get code -1.
+
+    Ex:
+    index = FeatureIndex(features['features']['temperature'])
+    codes = index.classify(df['temperature'].to_numpy())
+    index.labels[codes[0]]
+    """
+
+    MAX_COMPARE_BOUNDARIES = 32
+
+    @staticmethod
+    def is_numeric(classes: dict) -> bool:
+        """
+        whether every class bound is a number, or min and max for ranges
+        """
+        for cls_def in classes.values():
+            for k, v in cls_def.items():
+                if isinstance(v, str) and (k == 'is' or v not in ('min', 'max')):
+                    return False
+
+        return True
+
+    def __init__(self, classes: dict) -> None:
+        exact = []
+        ranges = []
+        repl = {'min': -np.inf, 'max': np.inf}
+        for label, cls_def in classes.items():
+            if 'is' in cls_def.keys():
+                exact.append((cls_def['is'], label))
+            else:
+                lo = repl.get(cls_def['min'], cls_def['min'])
+                hi = repl.get(cls_def['max'], cls_def['max'])
+                ranges.append((lo, hi, label))
+
+        exact.sort(key=lambda x: x[0])
+        ranges.sort(key=lambda x: (x[0], x[1]))
+        # codes are positions in labels: ranges in sorted order, then `is`
+        # classes, so a range position is its code without a lookup
+        self.labels: List[str] = [x[2] for x in ranges] + [x[1] for x in exact]
+        self.codes = {label: i for i, label in enumerate(self.labels)}
+        self.dtype = np.int8 if len(self.labels) < 128 else np.int32
+        self.lower = np.array([x[0] for x in ranges], dtype=float)
+        self.upper = np.array([x[1] for x in ranges], dtype=float)
+        self.exact_values = np.array([x[0] for x in exact], dtype=float)
+        self.exact_codes = np.arange(len(ranges), len(self.labels), dtype=self.dtype)
+        # overlapping ranges can't be resolved to a single class per value
+        self.disjoint = bool(np.all(self.lower[1:] >= self.upper[:-1]))
+        self.contiguous = bool(np.all(self.lower[1:] == self.upper[:-1]))
+
+    def classify(self, values: np.ndarray) -> np.ndarray:
+        """
+        :return: position in self.labels of the class of every value, -1 if
+        the value is in no class
+        """
+        values = np.asarray(values, dtype=float)
+        if len(self.lower) == 0:
+            codes = np.full(values.shape, -1, dtype=self.dtype)
+        else:
+            if len(self.lower) <= FeatureIndex.MAX_COMPARE_BOUNDARIES:
+                # a few vectorized comparisons beat searchsorted on unsorted data
+                codes = np.zeros(values.shape, dtype=np.int8)
+                for lo in self.lower[1:]:
+                    codes += (values >= lo).view(np.int8)
+            else:
+                codes = np.searchsorted(self.lower, values, side='right') - 1
+                codes = np.maximum(codes, 0).astype(self.dtype)
+
+            # also rejects NaN
+            found = values >= self.lower[0]
+            if self.contiguous:
+                hi = self.upper[-1]
+                found &= values <= hi if hi == np.inf else values < hi
+            else:
+                hi = self.upper[codes]
+                found &= (values < hi) | ((hi == np.inf) & (values == np.inf))
+
+            codes = np.where(found, codes.astype(self.dtype, copy=False), -1)
+            codes = codes.astype(self.dtype, copy=False)
+
+        if 0 < len(self.exact_values) <= FeatureIndex.MAX_COMPARE_BOUNDARIES:
+            for value, code in zip(self.exact_values, self.exact_codes):
+                np.putmask(codes, values == value, code)
+        elif len(self.exact_values) > 0:
+            pos = np.searchsorted(self.exact_values, values)
+            pos = np.minimum(pos, len(self.exact_values) - 1)
+            found = self.exact_values[pos] == values
+            codes[found] = self.exact_codes[pos[found]]
+
+        return codes
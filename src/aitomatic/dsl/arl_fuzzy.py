@@ -0,0 +1,153 @@
+from functools import partial
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from .arl_engine import ARLEngine
+from .arl_handler import ARLHandler
+from .arl_lexer import AND, OR
+
+TNORMS = {
+    'min': {AND: np.minimum, OR: np.maximum},
+    'product': {AND: np.multiply, OR: lambda a, b: a + b - a * b},
+}
+
+
+def class_degrees(values: np.ndarray, cls_def: dict, width: float) -> np.ndarray:
+    """
+    trapezoidal membership degree of values in one feature class, as float32
+
+    The degree ramps linearly from 0 to 1 over width, centered on every finite
+    class edge, so two neighbouring classes with the same width are 0.5 each
+    on their shared edge. `is` classes are triangles of half-width width.
+    A width of 0 gives the crisp class, NaN has degree 0.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if 'is' in cls_def.keys():
+        if width <= 0:
+            degrees = (values == cls_def['is']).astype(np.float32)
+        else:
+            distance = np.abs(values - np.float32(cls_def['is']))
+            degrees = 1 - distance / np.float32(width)
+            np.clip(degrees, 0, 1, out=degrees)
+    else:
+        degrees = np.ones(values.shape, dtype=np.float32)
+        if cls_def['min'] != 'min':
+            rise = ramp(values - np.float32(cls_def['min']), width, inclusive=True)
+            np.minimum(degrees, rise, out=degrees)
+        if cls_def['max'] != 'max':
+            fall = ramp(np.float32(cls_def['max']) - values, width, inclusive=False)
+            np.minimum(degrees, fall, out=degrees)
+
+    degrees[np.isnan(values)] = 0
+    return degrees
+
+
+def ramp(distance: np.ndarray, width: float, inclusive: bool) -> np.ndarray:
+    """
+    0 to 1 over width, 0.5 at distance 0
+
+    :param inclusive: for width 0, whether distance 0 is 1 or 0
+    """
+    if width <= 0:
+        crisp = distance >= 0 if inclusive else distance > 0
+        return crisp.astype(np.float32)
+
+    out = distance / np.float32(width) + np.float32(0.5)
+    return np.clip(out, 0, 1, out=out)
+
+
+def feature_degrees(
+    values: np.ndarray, classes: dict, widths: Dict[str, float] = None
+) -> np.ndarray:
+    """
+    membership degrees of values in every class of one feature
+
+    :param widths: (optional) membership error width by class, 0 if missing
+    :return: float32 matrix with one row per value and one column per class,
+    in the order of classes
+    """
+    widths = widths or {}
+    out = np.empty((len(values), len(classes)), dtype=np.float32)
+    for i, (cls, cls_def) in enumerate(classes.items()):
+        out[:, i] = class_degrees(values, cls_def, widths.get(cls, 0))
+
+    return out
+
+
+class FuzzyARLEngine(ARLEngine):
+    """
+    ARLEngine returning fuzzy degrees instead of booleans. Feature classes
+    are trapezoids widened by membership_error_width, the widths used by
+    the fuzzy model (see FuzzyParams), and `&`/`|` are a t-norm and its
+    t-conorm, min/max by default.
+
+    Ex:
+    engine = FuzzyARLEngine(knowledge)
+    for widths in candidates:
+        degrees = engine.evaluate(df, membership_error_width=widths)
+    """
+
+    def __init__(
+        self,
+        arl: ARLHandler,
+        membership_error_width: Dict[str, Dict[str, float]] = None,
+        tnorm: str = 'min',
+    ) -> None:
+        """
+        :param membership_error_width: (optional) width by feature and class,
+        {feature: {class: width}}, classes without a width are crisp
+        :param tnorm: 'min' (min/max) or 'product' (product/probabilistic sum)
+        """
+        super().__init__(arl)
+        if tnorm not in TNORMS.keys():
+            raise ValueError(f'tnorm must be one of {list(TNORMS.keys())}')
+
+        self.OPERATORS = TNORMS[tnorm]
+        self.membership_error_width = membership_error_width or {}
+
+    def get_membership(
+        self,
+        X: pd.DataFrame,
+        feature: str,
+        cls: str,
+        cache: dict,
+        membership_error_width: Dict[str, Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """
+        :param membership_error_width: (optional) widths to use, defaults to
+        the widths the engine was created with
+        """
+        if membership_error_width is None:
+            membership_error_width = self.membership_error_width
+
+        classes = self.get_classes(X, feature, cls)
+        if feature not in cache.keys():
+            cache[feature] = feature_degrees(
+                X[feature].to_numpy(dtype=float),
+                classes,
+                membership_error_width.get(feature),
+            )
+
+        return cache[feature][:, list(classes.keys()).index(cls)]
+
+    def evaluate(
+        self,
+        X: pd.DataFrame,
+        include_rules: bool = False,
+        membership_error_width: Dict[str, Dict[str, float]] = None,
+    ) -> pd.DataFrame:
+        """
+        membership degree of every row in every conclusion class
+
+        :param membership_error_width: (optional) widths for this call only,
+        defaults to the widths the engine was created with
+        :return: DataFrame with X's index and one float32 column per
+        conclusion class, named `name[class]`
+        """
+        # widths are passed down, so concurrent calls never share them
+        get_membership = partial(
+            self.get_membership, membership_error_width=membership_error_width
+        )
+        return self.evaluate_frame(X, include_rules, get_membership)
@@ -0,0 +1,127 @@
+import heapq
+from typing import Dict, List, Set, Tuple
+
+from .arl_expression import ARLExpression
+
+
+class ARLGraph:
+    """
+    Dependency DAG of parsed knowledge: rules depend on the feature classes
+    and rules they reference, conclusions on feature classes and rules.
+    The transitive dependencies of every rule are computed once, in
+    topological order, so slicing any number of conclusions is one pass.
+
+    Ex:
+    graph = handler.graph
+    features, rules = graph.get_dependencies('alarm')
+    """
+
+    def __init__(
+        self,
+        rules: Dict[str, ARLExpression],
+        conclusions: Dict[str, Dict[str, ARLExpression]],
+        redefined: Dict[str, List[ARLExpression]] = None,
+    ) -> None:
+        """
+        :param rules: compiled definition by rule name
+        :param conclusions: compiled definition by conclusion name and class
+        :param redefined: (optional) earlier definitions of rules defined more
+        than once, in line order. A rule depends on the references of all its
+        definitions, a reference to itself is to its earlier definition.
+        """
+        self.redefined = redefined if redefined is not None else {}
+        self.rule_features = {}
+        self.rule_deps = {}
+        for name, expr in rules.items():
+            features, deps = ARLGraph.split_refs(expr, rules)
+            for earlier in self.redefined.get(name, []):
+                f, d = ARLGraph.split_refs(earlier, rules)
+                features.update(f)
+                deps.update(d)
+
+            deps.discard(name)
+            self.rule_features[name], self.rule_deps[name] = features, deps
+
+        self.conclusion_features = {}
+        self.conclusion_deps = {}
+        for name, classes in conclusions.items():
+            features, deps = set(), set()
+            for expr in classes.values():
+                f, d = ARLGraph.split_refs(expr, rules)
+                features.update(f)
+                deps.update(d)
+
+            self.conclusion_features[name] = features
+            self.conclusion_deps[name] = deps
+
+        self.order = ARLGraph.topological_order(self.rule_deps)
+        self.position = {name: i for i, name in enumerate(self.order)}
+
+        # all features and rules a rule needs, filled in dependency order
+        self.rule_closure = {}
+        for name in self.order:
+            features = set(self.rule_features[name])
+            deps = set(self.rule_deps[name])
+            for dep in self.rule_deps[name]:
+                dep_features, dep_rules = self.rule_closure[dep]
+                features.update(dep_features)
+                deps.update(dep_rules)
+
+            self.rule_closure[name] = (features, deps)
+
+    @staticmethod
+    def split_refs(expr: ARLExpression, rules: dict) -> Tuple[Set[str], Set[str]]:
+        """
+        :return: features and defined rules referenced by expr, references to
+        undefined rules are left to the parsers' missing report
+        """
+        features = {ft for ft, cls in expr.refs if cls is not None}
+        deps = {ft for ft, cls in expr.refs if cls is None and ft in rules}
+        return features, deps
+
+    @staticmethod
+    def topological_order(deps: Dict[str, Set[str]]) -> List[str]:
+        """
+        rules ordered so every rule comes after the rules it references, ties
+        keep definition order
+        """
+        index = {name: i for i, name in enumerate(deps.keys())}
+        remaining = {name: len(d) for name, d in deps.items()}
+        dependents = {name: [] for name in deps.keys()}
+        for name, d in deps.items():
+            for dep in d:
+                dependents[dep].append(name)
+
+        ready = [index[name] for name, n in remaining.items() if n == 0]
+        heapq.heapify(ready)
+        names = list(deps.keys())
+        order = []
+        while ready:
+            name = names[heapq.heappop(ready)]
+            order.append(name)
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, index[dependent])
+
+        if len(order) < len(deps):
+            cycle = [name for name in deps.keys() if remaining[name] > 0]
+            raise ValueError(f'Circular rule dependency between {cycle}')
+
+        return order
+
+    def get_dependencies(self, conclusion: str) -> Tuple[Set[str], List[str]]:
+        """
+        :return: features and rules, in evaluation order, conclusion needs
+        """
+        if conclusion not in self.conclusion_deps.keys():
+            raise ValueError(f'Conclusion {conclusion} not found')
+
+        features = set(self.conclusion_features[conclusion])
+        deps = set(self.conclusion_deps[conclusion])
+        for dep in self.conclusion_deps[conclusion]:
+            dep_features, dep_rules = self.rule_closure[dep]
+            features.update(dep_features)
+            deps.update(dep_rules)
+
+        return features, sorted(deps, key=self.position.get)
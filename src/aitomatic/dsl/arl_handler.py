@@ -1,20 +1,29 @@
-import re
+from typing import Dict, List
 
-from .arl_features import ARLFeatures
+from .arl_expression import ARLExpression, get_expression
+from .arl_features import ARLFeatures, FeatureIndex
+from .arl_graph import ARLGraph
+from .arl_lexer import ARLLexer
+from .arl_mapping import ARLMapping
 from .arl_rules import ARLRules
 from .arl_conclusions import ARLConclusions
-from .utils import get_str_order
 
 
 class ARLHandler:
     SECTIONS = ['features', 'rules', 'conclusions', 'undefined_variables']
+    # parsed sections, each depends on the ones before it
+    PARSED_SECTIONS = ['features', 'rules', 'conclusions']
 
     def __init__(self, arl_dict: dict, mapping_data: dict = None) -> None:
+        # compiled rule and conclusion definitions, keyed by definition
+        self.expressions = {}
+        # parsed rule and conclusion lines, keyed by line
+        self.parsed_lines = {'rules': {}, 'conclusions': {}}
+        # section text as of the last successful parse
+        self.parsed_sections = {}
         self.arl_dict = arl_dict
         if mapping_data is not None:
             self.map_data_variables(mapping_data)
-        else:
-            self.parse_handler_sections()
 
     @staticmethod
     def convert_arl_dict_to_str(arl_dict: dict) -> str:
@@ -27,8 +36,7 @@ class ARLHandler:
     @staticmethod
     def convert_arl_str_to_dict(arl_str: str) -> dict:
         result = {}
-        arl_format = r'^\[(?P<section>[\w -]+)\][ ]*\n?'
-        pieces = re.split(arl_format, arl_str, 0, re.MULTILINE)[1:]
+        pieces = ARLLexer.split_sections(arl_str)
         for i, txt in enumerate(pieces):
             if txt in ARLHandler.SECTIONS and i + 1 < len(pieces):
                 result[txt.strip()] = pieces[i + 1].strip()
@@ -64,43 +72,323 @@ class ARLHandler:
         value = {k: v for k, v in value.items() if k in self.SECTIONS}
         self._arl_dict = value
         self._arl_str = ARLHandler.convert_arl_dict_to_str(value)
-        self.parse_handler_sections()
+        changed = [
+            k for k in self.PARSED_SECTIONS if self.parsed_sections.get(k) != value[k]
+        ]
+        if len(changed) > 0:
+            self.parse_handler_sections(changed)
 
     def map_data_variables(self, mapping_data: dict):
         """
         change feature names to data columns names based on passed mapping
         data_mapping should have format {feature_name : data_column_name, ...}
+
+        Feature headers, `feature[class]` references in rules and conclusions
+        and undefined variables in class bounds are renamed, see ARLMapping.
+        The parsed knowledge is renamed along with the text instead of being
+        parsed again, compiled definitions keep their operator trees.
+        """
+        mapping = ARLMapping(mapping_data)
+        state = None
+        if all(
+            self.parsed_sections.get(k) == self.arl_dict[k]
+            for k in self.PARSED_SECTIONS
+        ):
+            state = mapping.map_parsed_state(self.get_parsed_state())
+
+        if state is None:
+            # the parsed form is not current or cannot be renamed as it is
+            self.arl_dict = mapping.map_arl_dict(self.arl_dict)
+            return
+
+        self._arl_dict = state['arl_dict']
+        self._arl_str = ARLHandler.convert_arl_dict_to_str(self._arl_dict)
+        self.parsed_sections = {k: self._arl_dict[k] for k in self.PARSED_SECTIONS}
+        self.features = state['features']
+        self.rules = state['rules']
+        self.conclusions = state['conclusions']
+        self.expressions = mapping.map_expressions(self.expressions)
+        self.parsed_lines = {'rules': {}, 'conclusions': {}}
+        if self._feature_index is not None:
+            self._feature_index = {
+                mapping.names.get(k, k): v for k, v in self._feature_index.items()
+            }
+
+        self._graph = None
+
+    def parse_handler_sections(self, sections: List[str] = None):
+        """
+        parse sections of arl_dict, and re-check the sections that depend on
+        them if their parsed form changed. Rules and conclusions only parse
+        the lines that changed.
+
+        :param sections: (optional) sections to parse, defaults to all
         """
-        repl_order = get_str_order(mapping_data.keys())
-        arl_str = self.arl_str
-        for key in repl_order:
-            arl_str = arl_str.replace(key, mapping_data[key])
+        if sections is None:
+            sections = self.PARSED_SECTIONS
 
-        self.arl_str = arl_str
+        dirty = set(sections)
+        # caches that start empty only hold what this parse used
+        stale = len(self.expressions) > 0
+        self._graph = None
+        for i, section in enumerate(self.PARSED_SECTIONS):
+            if section not in dirty:
+                continue
+
+            try:
+                self.parse_section(section, dirty)
+            except Exception:
+                # this section and the ones after it are parsed again on the
+                # next edit, even if their text does not change
+                for later in self.PARSED_SECTIONS[i:]:
+                    self.parsed_sections.pop(later, None)
+
+                raise
+
+            self.parsed_sections[section] = self.arl_dict[section]
+
+        if stale:
+            self.prune_caches()
+
+    def parse_section(self, section: str, dirty: set):
+        """
+        parse one section of arl_dict, adding the sections that depend on it
+        to dirty if its parsed form changed
+        """
+        if section == 'features':
+            features = ARLFeatures(self.arl_dict['features']).feature_dict
+            if features != getattr(self, 'features', None):
+                self.features = features
+                self._feature_index = None
+                dirty.update(['rules', 'conclusions'])
+        elif section == 'rules':
+            rules = ARLRules(
+                self.features,
+                self.arl_dict['rules'],
+                self.expressions,
+                self.parsed_lines['rules'],
+            ).rule_dict
+            if rules != getattr(self, 'rules', None):
+                self.rules = rules
+                dirty.add('conclusions')
+        else:
+            self.conclusions = ARLConclusions(
+                self.features,
+                self.rules,
+                self.arl_dict['conclusions'],
+                self.expressions,
+                self.parsed_lines['conclusions'],
+            ).conclusion_dict
 
-    def parse_handler_sections(self):
-        self.features = ARLFeatures(self.arl_dict['features']).feature_dict
-        self.rules = ARLRules(self.features, self.arl_dict['rules']).rule_dict
-        self.conclusions = ARLConclusions(
-            self.features, self.rules, self.arl_dict['conclusions']
-        ).conclusion_dict
+    def prune_caches(self):
+        """
+        drop parsed lines and compiled definitions no longer in the knowledge
+        """
+        for section, cache in self.parsed_lines.items():
+            if len(cache) > 0:
+                lines = set(self.arl_dict[section].splitlines())
+                self.parsed_lines[section] = {
+                    k: v for k, v in cache.items() if k in lines
+                }
+
+        used = {rule['raw_definition'] for rule in self.rules['rules'].values()}
+        for classes in self.conclusions['conclusions'].values():
+            used.update(conc['raw_definition'] for conc in classes.values())
+
+        self.expressions = {k: v for k, v in self.expressions.items() if k in used}
+
+    @property
+    def feature_index(self) -> Dict[str, FeatureIndex]:
+        """
+        interval index of every feature, built on first use
+        """
+        if self._feature_index is None:
+            self._feature_index = ARLFeatures.build_feature_index(self.features)
+
+        return self._feature_index
+
+    @property
+    def rule_expressions(self) -> Dict[str, ARLExpression]:
+        """
+        compiled definition of every rule, in definition order
+        """
+        return {
+            name: get_expression(rule['raw_definition'], self.expressions)
+            for name, rule in self.rules['rules'].items()
+        }
+
+    @property
+    def conclusion_expressions(self) -> Dict[str, ARLExpression]:
+        """
+        compiled definition of every conclusion class, keyed `name[class]`
+        """
+        return {
+            f'{name}[{cls}]': get_expression(conc['raw_definition'], self.expressions)
+            for name, classes in self.conclusions['conclusions'].items()
+            for cls, conc in classes.items()
+        }
 
     def get_arl_for_conclusion(self, conclusion: str) -> 'ARLHandler':
         '''
         returns an ARLHandler with the arl parsed down to only the chosen
-        conclusion
+        conclusion and the features and rules it needs
+        '''
+        return self.split_conclusions([conclusion])[conclusion]
+
+    def split_conclusions(
+        self, conclusions: List[str] = None
+    ) -> Dict[str, 'ARLHandler']:
+        '''
+        get_arl_for_conclusion for several conclusions at once, sharing one
+        pass over the dependency graph and the section text
+
+        :param conclusions: (optional) conclusion names, defaults to all
         '''
-        if conclusion not in self.conclusions['conclusions']:
-            raise ValueError(f'Conclusion {conclusion} not found')
+        if conclusions is None:
+            conclusions = list(self.conclusions['conclusions'].keys())
+
+        for conclusion in conclusions:
+            if conclusion not in self.conclusions['conclusions']:
+                raise ValueError(f'Conclusion {conclusion} not found')
+
+        lines = {}
+        for section in ['rules', 'conclusions']:
+            lines[section] = {}
+            for line in self.arl_dict[section].splitlines():
+                head, sep, _ = line.partition(' := ')
+                if sep and not line.startswith('%'):
+                    name = head.split('[')[0].strip()
+                    lines[section].setdefault(name, []).append(line)
+
+        result = {}
+        for conclusion in conclusions:
+            features, rules = self.graph.get_dependencies(conclusion)
+            feature_dict = {
+                'undefined': self.features['undefined'],
+                'features': {
+                    k: v for k, v in self.features['features'].items() if k in features
+                },
+            }
+            rule_lines = [line for name in rules for line in lines['rules'][name]]
+            result[conclusion] = self.copy(
+                feature_dict=feature_dict,
+                features=ARLFeatures.parse_feature_dict_to_str(feature_dict),
+                rules='\n'.join(rule_lines),
+                conclusions='\n'.join(lines['conclusions'][conclusion]),
+            )
+
+        return result
+
+    @property
+    def graph(self) -> ARLGraph:
+        '''
+        dependency graph of rules and conclusions, built on first use
+        '''
+        if self._graph is None:
+            conclusions = {
+                name: {
+                    cls: get_expression(conc['raw_definition'], self.expressions)
+                    for cls, conc in classes.items()
+                }
+                for name, classes in self.conclusions['conclusions'].items()
+            }
+            self._graph = ARLGraph(
+                self.rule_expressions, conclusions, self.get_redefined_rules()
+            )
+
+        return self._graph
+
+    def get_redefined_rules(self) -> Dict[str, List[ARLExpression]]:
+        """
+        earlier definitions of rules defined more than once, in line order,
+        the parsed rules only keep the last one
+        """
+        lines = [
+            line
+            for line in self.arl_dict['rules'].splitlines()
+            if ' := ' in line and not line.startswith('%')
+        ]
+        if len(lines) == len(self.rules['rules']):
+            return {}
+
+        definitions = {}
+        for i, line in enumerate(lines, 1):
+            m = ARLLexer.tokenize_line(line, i, 'rules').match
+            expr = get_expression(m.group('def').strip(), self.expressions)
+            definitions.setdefault(m.group('var_name').strip(), []).append(expr)
+
+        return {k: v[:-1] for k, v in definitions.items() if len(v) > 1}
+
+    def get_parsed_state(self) -> dict:
+        """
+        sections and their parsed form, everything needed to rebuild the
+        handler without parsing, see from_parsed_state
+        """
+        return {
+            'arl_dict': self.arl_dict,
+            'features': self.features,
+            'rules': self.rules,
+            'conclusions': self.conclusions,
+        }
+
+    @staticmethod
+    def from_parsed_state(state: dict) -> 'ARLHandler':
+        """
+        ARLHandler from get_parsed_state output, without parsing. The parsed
+        dicts are shared, not copied.
+        """
+        out = ARLHandler.__new__(ARLHandler)
+        out.expressions = {}
+        out.parsed_lines = {'rules': {}, 'conclusions': {}}
+        out._arl_dict = dict(state['arl_dict'])
+        out._arl_str = ARLHandler.convert_arl_dict_to_str(out._arl_dict)
+        out.parsed_sections = {k: out._arl_dict[k] for k in out.PARSED_SECTIONS}
+        out.features = state['features']
+        out._feature_index = None
+        out._graph = None
+        out.rules = state['rules']
+        out.conclusions = state['conclusions']
+        return out
+
+    def copy(self, feature_dict: dict = None, **sections) -> 'ARLHandler':
+        """
+        copy of the handler with some sections replaced, only the replaced
+        sections and the ones depending on them are parsed again
+
+        :param feature_dict: (optional) parsed form of the new features
+        section, skips parsing it
+        :param sections: new text by section name
+        """
+        sections = {k: v.strip() for k, v in sections.items()}
+        out = ARLHandler.__new__(ARLHandler)
+        out.expressions = {}
+        out.parsed_lines = {}
+        for section, cache in self.parsed_lines.items():
+            if section in sections.keys():
+                lines = sections[section].splitlines()
+                cache = {line: cache[line] for line in lines if line in cache}
+
+            out.parsed_lines[section] = dict(cache)
 
-        out = {}
-        conc_str = ARLConclusions(
-            self.features, self.rules, self.arl_dict['conclusions']
-        ).conclusion_str
+        out.parsed_sections = dict(self.parsed_sections)
+        out.features = self.features
+        out._feature_index = self._feature_index
+        if feature_dict is not None:
+            out.features = feature_dict
+            out.parsed_sections['features'] = sections['features']
+            if self._feature_index is not None:
+                out._feature_index = {
+                    k: self._feature_index[k]
+                    for k in feature_dict['features'].keys()
+                    if k in self._feature_index.keys()
+                }
 
-        for line in conc_str.splitlines():
-            if line.startswith(conclusion):
-                new_arl = self.arl_str.replace(conc_str, line)
-                return ARLHandler(ARLHandler.convert_arl_str_to_dict(new_arl))
+        out._graph = None
+        out.rules = self.rules
+        out.conclusions = self.conclusions
+        out.arl_dict = {**self.arl_dict, **sections}
+        if feature_dict is not None and 'rules' not in sections.keys():
+            # features changed without a parse, re-check the dependents
+            out.parse_handler_sections(['rules'])
 
-        raise ValueError(f'Unable to parse out conclusion {conclusion}')
+        return out
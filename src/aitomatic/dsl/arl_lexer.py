@@ -0,0 +1,120 @@
+import re
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+# section header of an ARL string, `[rules]`
+SECTION_FMT = re.compile(r'^\[(?P<section>[\w -]+)\][ ]*\n?', re.MULTILINE)
+# optional time qualifier closing a rule or conclusion line, `for >5 minutes`
+TIME_FMT = (
+    r'(?: for (?P<time_sign>[><=])(?P<time_val>\d+\.?\d*) (?P<time_unit>\w+))?'
+)
+# every kind of line of a section as one alternation, the name of the matched
+# group is the token kind
+GRAMMAR = {
+    'features': re.compile(
+        r'(?P<comment>%.*)'
+        r'|(?P<blank>\s*$)'
+        r'|(?P<member>--> (?P<class>[\w -]+) :: \s*'
+        r'(?:(?P<min>.+) to (?P<max>.+?)|is\s*(?P<is>.+?))\s*$)'
+        r'|\s*(?P<feature>[\w \.\-]+?)\s*$'
+        r'|(?P<error>)'
+    ),
+    'rules': re.compile(
+        r'(?P<comment>%.*)'
+        r'|(?P<definition>\s*(?P<var_name>[\w \-]+)'
+        r'(?:\[(?P<class>[\w -]+)\])? := (?P<def>[\w \.\-&|\(\)\[\]]+)'
+        + TIME_FMT
+        + r'\s*$)'
+        r'|(?P<error>)'
+    ),
+    'conclusions': re.compile(
+        r'(?P<comment>%.*)'
+        r'|(?P<definition>\s*(?P<var_name>[\w \.\-]+)'
+        r'(?:\[(?P<class>[\w -]+)\])? := (?P<def>[\w \-&|\(\)\[\]]+)'
+        + TIME_FMT
+        + r'\s*$)'
+        r'|(?P<error>)'
+    ),
+}
+# operator tokens of a definition
+AND = '&'
+OR = '|'
+# one token of a rule or conclusion definition: operator, parenthesis or a
+# reference to a rule alias or `feature[class]`
+DEFINITION_FMT = re.compile(
+    r'\s*(?:(?P<op>[&|()])'
+    r'|(?P<ref>[\w\.\-]+(?: +[\w\.\-]+)*)(?:\s*\[\s*(?P<class>[\w -]+?)\s*\])?'
+    r'|(?P<error>.))\s*'
+)
+
+# feature of a `feature[class]` reference in a definition, as DEFINITION_FMT
+# reads it
+FEATURE_REF_FMT = re.compile(r'[\w\.\-]+(?: +[\w\.\-]+)*(?=\s*\[)')
+
+class Token(NamedTuple):
+    kind: str
+    # 1-based line in the section
+    line: int
+    match: re.Match
+
+
+class ARLLexer:
+    """
+    Tokenizer for the whole ARL grammar, compiled once at import. Sections
+    are split with SECTION_FMT, every line of a section is matched once
+    against the grammar of its section and definitions are split into
+    operator and reference tokens, so the parsers never build patterns or
+    rescan text.
+
+    Ex:
+    for token in ARLLexer.tokenize(rule_str, 'rules'):
+        token.kind, token.line, token.match.group('def')
+    """
+
+    @staticmethod
+    def split_sections(arl_str: str) -> List[str]:
+        """
+        :return: alternating section names and section text
+        """
+        return SECTION_FMT.split(arl_str)[1:]
+
+    @staticmethod
+    def tokenize(text: str, section: str) -> Iterator[Token]:
+        """
+        one token per line of text, comments included
+
+        :param section: features, rules or conclusions
+        """
+        match = GRAMMAR[section].match
+        for i, line in enumerate(text.splitlines()):
+            m = match(line)
+            yield Token(m.lastgroup, i + 1, m)
+
+    @staticmethod
+    def tokenize_line(line: str, line_num: int, section: str) -> Token:
+        """
+        token of a single line, for parsers that skip lines they already know
+        """
+        m = GRAMMAR[section].match(line)
+        return Token(m.lastgroup, line_num, m)
+
+    @staticmethod
+    def tokenize_definition(definition: str) -> List[Tuple[str, str, str, str]]:
+        """
+        tokens of a rule or conclusion definition, as (operator, reference,
+        class, error) with empty strings for the parts that do not apply:
+        `&`, `|` and parentheses are operators, rule aliases references
+        without class and any other character an error
+        """
+        return DEFINITION_FMT.findall(definition)
+
+    @staticmethod
+    def rename_refs(definition: str, names: Dict[str, str]) -> str:
+        """
+        definition with the feature of every `feature[class]` reference
+        renamed, rule aliases and the text around references are kept
+
+        :param names: new name by feature name, features not in it are kept
+        """
+        return FEATURE_REF_FMT.sub(
+            lambda m: names.get(m.group(), m.group()), definition
+        )
@@ -0,0 +1,264 @@
+from typing import Optional
+
+from .arl_features import ARLFeatures
+from .arl_lexer import GRAMMAR, ARLLexer
+from .arl_rules import correct_definition
+from .utils import str_to_value
+
+
+class ARLMapping:
+    """
+    Renames features and undefined variables of knowledge to data column
+    names. Feature headers, `feature[class]` references and undefined
+    variables in class bounds are renamed token by token in the section text,
+    and the parsed features, rules and conclusions are renamed to match, so
+    the mapped knowledge is not parsed again.
+
+    Ex:
+    mapping = ARLMapping({'temperature': 'TEMP', 'thr': 'THR'})
+    state = mapping.map_parsed_state(handler.get_parsed_state())
+    if state is None:
+        arl_dict = mapping.map_arl_dict(handler.arl_dict)
+    """
+
+    def __init__(self, mapping_data: dict) -> None:
+        self.names = {k.strip(): v for k, v in mapping_data.items()}
+        # mapped definitions, keyed by definition
+        self.definitions = {}
+        # string literals of class bounds that are also mapped names
+        self.literals = set()
+
+    def map_definition(self, definition: str) -> str:
+        """
+        definition with renamed feature references, see ARLLexer.rename_refs
+        """
+        out = self.definitions.get(definition)
+        if out is None:
+            out = ARLLexer.rename_refs(definition, self.names)
+            self.definitions[definition] = out
+
+        return out
+
+    def map_section(self, text: str, section: str) -> str:
+        """
+        section text with renamed features and undefined variables, lines
+        that do not parse are kept as they are
+
+        :param section: features, rules or conclusions
+        """
+        lines = []
+        for token in ARLLexer.tokenize(text, section):
+            line = token.match.string
+            if token.kind == 'feature':
+                spans = [token.match.span('feature')]
+            elif token.kind == 'member':
+                spans = self.get_variable_spans(token.match)
+            elif token.kind == 'definition':
+                start, end = token.match.span('def')
+                definition = self.map_definition(line[start:end])
+                line = f'{line[:start]}{definition}{line[end:]}'
+                spans = []
+            else:
+                spans = []
+
+            for start, end in reversed(spans):
+                name = self.names.get(line[start:end])
+                if name is not None:
+                    line = f'{line[:start]}{name}{line[end:]}'
+
+            lines.append(line)
+
+        return '\n'.join(lines)
+
+    def get_variable_spans(self, member) -> list:
+        """
+        spans of the undefined variables in the bounds of a `member` token,
+        see ARLFeatures.parse_member
+        """
+        spans = []
+        for k in ['min', 'max', 'is']:
+            v = member.group(k)
+            if v is None or (v in ARLFeatures.RESERVED_WORDS and k != 'is'):
+                continue
+
+            value, is_undefined = str_to_value(v)
+            if is_undefined:
+                spans.append(member.span(k))
+            elif isinstance(value, str) and value in self.names:
+                self.literals.add(value)
+
+        return spans
+
+    def map_arl_dict(self, arl_dict: dict) -> dict:
+        """
+        arl_dict with every parsed section mapped, see map_section
+        """
+        return {
+            k: self.map_section(v, k) if k in GRAMMAR else v
+            for k, v in arl_dict.items()
+        }
+
+    @staticmethod
+    def is_name(name: str) -> bool:
+        """
+        whether name reads back unchanged as a feature header and as a
+        feature reference in rules and conclusions
+        """
+        header = GRAMMAR['features'].match(name)
+        if header.lastgroup != 'feature' or header.group('feature') != name:
+            return False
+
+        if ARLLexer.tokenize_definition(f'{name}[x]') != [('', name, 'x', '')]:
+            return False
+
+        rule = GRAMMAR['rules'].match(f'x := {name}[x]')
+        conclusion = GRAMMAR['conclusions'].match(f'x[x] := {name}[x]')
+        return rule.lastgroup == 'definition' and conclusion.lastgroup == 'definition'
+
+    @staticmethod
+    def is_variable(name: str) -> bool:
+        """
+        whether name reads back unchanged as an undefined variable in the
+        bounds of a class
+        """
+        prefix = ARLFeatures.MEMBER_PREFIX
+        member = GRAMMAR['features'].match(f'{prefix}x :: {name} to {name}')
+        if member.lastgroup != 'member' or member.group('min', 'max') != (name, name):
+            return False
+
+        member = GRAMMAR['features'].match(f'{prefix}x :: is {name}')
+        if member.lastgroup != 'member' or member.group('is') != name:
+            return False
+
+        return str_to_value(name)[1] and name not in ARLFeatures.RESERVED_WORDS
+
+    def map_feature_dict(self, feature_dict: dict) -> Optional[dict]:
+        """
+        parsed features with renamed features and undefined variables
+
+        :return: None if the renamed features would parse differently, when
+        names collide or a variable is mapped to a number
+        """
+        features = feature_dict['features']
+        names = {k: self.names.get(k, k) for k in features.keys()}
+        if len(set(names.values())) < len(names):
+            return None
+
+        for k in features.keys():
+            if k in self.names and not ARLMapping.is_name(self.names[k]):
+                return None
+
+        undefined = feature_dict['undefined']
+        values = {v: self.names[v] for v in undefined if v in self.names}
+        if len(self.literals.intersection(values)) > 0:
+            return None
+
+        for v in values.values():
+            if not ARLMapping.is_variable(v):
+                return None
+
+        result = {}
+        for feature, classes in features.items():
+            result[names[feature]] = {
+                cls: {
+                    k: values.get(v, v)
+                    if isinstance(v, str)
+                    and (k == 'is' or v not in ARLFeatures.RESERVED_WORDS)
+                    else v
+                    for k, v in cls_def.items()
+                }
+                for cls, cls_def in classes.items()
+            }
+
+        return {
+            'undefined': list(dict.fromkeys(values.get(v, v) for v in undefined)),
+            'features': result,
+        }
+
+    def map_missing(self, missing: dict, feature_dict: dict) -> Optional[dict]:
+        """
+        missing references of parsed rules or conclusions, renamed
+
+        :param feature_dict: mapped features, see map_feature_dict
+        :return: None if a missing feature is renamed to a defined one
+        """
+        features = []
+        for entry in missing['features']:
+            name = self.names.get(entry['feature'], entry['feature'])
+            if name in feature_dict['features'] or (
+                name != entry['feature'] and not ARLMapping.is_name(name)
+            ):
+                return None
+
+            features.append({**entry, 'feature': name})
+
+        classes = [
+            {**entry, 'feature': self.names.get(entry['feature'], entry['feature'])}
+            for entry in missing['classes']
+        ]
+        return {'features': features, 'classes': classes, 'rules': missing['rules']}
+
+    def map_definition_dict(self, definition: dict) -> dict:
+        """
+        parsed rule or conclusion class with renamed feature references
+        """
+        raw = self.map_definition(definition['raw_definition'])
+        return {
+            **definition,
+            'raw_definition': raw,
+            'corrected_definition': correct_definition(raw),
+        }
+
+    def map_parsed_state(self, state: dict) -> Optional[dict]:
+        """
+        :param state: sections and their parsed form, see
+        ARLHandler.get_parsed_state
+        :return: state of the mapped knowledge, None if renaming the parsed
+        form would not give the parse of the mapped text
+        """
+        arl_dict = self.map_arl_dict(state['arl_dict'])
+        features = self.map_feature_dict(state['features'])
+        if features is None:
+            return None
+
+        rules_missing = self.map_missing(state['rules']['missing'], features)
+        conclusions_missing = self.map_missing(
+            state['conclusions']['missing'], features
+        )
+        if rules_missing is None or conclusions_missing is None:
+            return None
+
+        rules = {
+            'rules': {
+                name: self.map_definition_dict(rule)
+                for name, rule in state['rules']['rules'].items()
+            },
+            'missing': rules_missing,
+        }
+        conclusions = {
+            'conclusions': {
+                name: {
+                    cls: self.map_definition_dict(conc) for cls, conc in classes.items()
+                }
+                for name, classes in state['conclusions']['conclusions'].items()
+            },
+            'missing': conclusions_missing,
+        }
+        return {
+            'arl_dict': arl_dict,
+            'features': features,
+            'rules': rules,
+            'conclusions': conclusions,
+        }
+
+    def map_expressions(self, expressions: dict) -> dict:
+        """
+        compiled definitions keyed by their mapped definition, see
+        ARLExpression.rename
+        """
+        result = {}
+        for definition, expr in expressions.items():
+            mapped = self.map_definition(definition)
+            result[mapped] = expr.rename(mapped, self.names)
+
+        return result
@@ -1,77 +1,96 @@
 import re
 
+from .arl_expression import get_expression
+from .arl_lexer import ARLLexer
+
+TIME_CONDITION_KEYS = ('sign', 'value', 'unit')
+# class of a feature reference, `[class]`
+CLASS_REF_FMT = re.compile(r'\[\s*([\w -]+?)\s*\]')
+
+
+def correct_definition(definition: str) -> str:
+    """
+    definition with quoted feature classes, `feature["class"]`
+    """
+    if '[ ' not in definition and ' ]' not in definition:
+        return definition.replace('[', '["').replace(']', '"]')
+
+    return CLASS_REF_FMT.sub(lambda m: f'["{m.group(1)}"]', definition)
+
 
 class ARLRules:
-    def __init__(self, feature_dict: dict, rules: str) -> None:
+    def __init__(
+        self,
+        feature_dict: dict,
+        rules: str,
+        expressions: dict = None,
+        parsed_lines: dict = None,
+    ) -> None:
         self.feature_dict = feature_dict
+        self.expressions = expressions
+        self.parsed_lines = parsed_lines
         self.rule_str = rules
 
     @staticmethod
-    def parse_rule_str_to_dict(rule_str: str, feature_dict: dict) -> dict:
-        fmt = (
-            '^(?P<var_name>[\w \-]+)(\[(?P<class>[\w -]+)\])? := '
-            '(?P<def>[\w \.\-&|\(\)\[\]]+)($| for (?P<time_sign>[><=])'
-            '(?P<time_val>\d+\.?\d*) (?P<time_unit>\w+))'
-        )
-        var_fmt = ' ?(?P<feature>[\w \.\-]+)(\[(?P<class>[\w -]+)\])? ?'
-
+    def parse_rule_str_to_dict(
+        rule_str: str,
+        feature_dict: dict,
+        expressions: dict = None,
+        parsed_lines: dict = None,
+    ) -> dict:
+        """
+        :param expressions: (optional) cache of compiled rule definitions,
+        see get_expression
+        :param parsed_lines: (optional) cache of parsed lines, updated in place,
+        so unchanged lines are only checked against features and rules
+        """
+        features = feature_dict['features']
         missing_features = []
         missing_classes = []
         missing_rules = []
         defined_rules = set()
         parsed_rules = {}
-        for i, line in enumerate(rule_str.splitlines()):
-            if line.startswith('%'):
-                # handle commented out lines
-                continue
-
-            tmp = re.match(fmt, line.strip())
-            if tmp is None:
-                raise SyntaxError(f'Syntax Error in Rules line {i+1}')
-
-            tmp = tmp.groupdict()
-            var_name = tmp['var_name'].strip()
-            var_def = tmp['def'].strip()
-            time_condition = {
-                'sign': tmp.get('time_sign'),
-                'value': tmp.get('time_val'),
-                'unit': tmp.get('time_unit'),
-            }
-
-            ev_line = var_def
-            fixed_line = var_def
-            for m in re.finditer(var_fmt, var_def):
-                tmp = m.groupdict()
-                if tmp.get('class') is not None:
-                    ft = tmp['feature'].strip()
-                    cls = tmp['class'].strip()
-                    if ft not in feature_dict['features'].keys():
-                        missing_features.append((ft, i + 1))
-                    elif cls not in feature_dict['features'][ft].keys():
-                        missing_classes.append((ft, cls, i + 1))
-
-                    ev_line = ev_line.replace(f'{ft}[{cls}]', 'True')
-                    fixed_line = fixed_line.replace(f'{ft}[{cls}]', f'{ft}["{cls}"]')
-                else:
-                    alias = tmp['feature'].strip()
-                    if alias == '':
-                        continue
-
-                    if alias not in defined_rules:
-                        missing_rules.append((alias, i + 1))
-
-                    ev_line = ev_line.replace(alias, 'True')
-
-            try:
-                eval(ev_line)
-            except:
-                raise SyntaxError(f'Syntax Error in Rules line {i+1}')
+        for i, line in enumerate(rule_str.splitlines(), 1):
+            parsed = parsed_lines.get(line) if parsed_lines is not None else None
+            if parsed is None:
+                token = ARLLexer.tokenize_line(line, i, 'rules')
+                m = token.match
+                if token.kind == 'comment':
+                    continue
+                elif token.kind == 'error':
+                    raise SyntaxError(f'Syntax Error in Rules line {i}')
+
+                var_def = m.group('def').strip()
+                try:
+                    expr = get_expression(var_def, expressions)
+                except SyntaxError:
+                    raise SyntaxError(f'Syntax Error in Rules line {i}')
+
+                fixed_line = correct_definition(var_def)
+                var_name = m.group('var_name').strip()
+                time_condition = m.group('time_sign', 'time_val', 'time_unit')
+                parsed = (var_name, var_def, fixed_line, time_condition, expr)
+                if parsed_lines is not None:
+                    parsed_lines[line] = parsed
+
+            var_name, var_def, fixed_line, time_condition, expr = parsed
+            if expressions is not None:
+                expressions.setdefault(var_def, expr)
+
+            for ft, cls in expr.refs:
+                if cls is not None:
+                    if ft not in features:
+                        missing_features.append((ft, i))
+                    elif cls not in features[ft]:
+                        missing_classes.append((ft, cls, i))
+                elif ft not in defined_rules:
+                    missing_rules.append((ft, i))
 
             defined_rules.add(var_name)
             parsed_rules[var_name] = {
                 'raw_definition': var_def,
                 'corrected_definition': fixed_line,
-                'time_condition': time_condition,
+                'time_condition': dict(zip(TIME_CONDITION_KEYS, time_condition)),
             }
 
         missing = {
@@ -92,7 +111,7 @@ class ARLRules:
     def rule_str(self, value: str):
         self._rule_str = value
         self._rule_dict = ARLRules.parse_rule_str_to_dict(
-            self._rule_str, self.feature_dict
+            self._rule_str, self.feature_dict, self.expressions, self.parsed_lines
         )
 
     @property
@@ -0,0 +1,174 @@
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .arl_engine import ARLEngine
+from .arl_handler import ARLHandler
+
+TIME_UNITS = {
+    'ms': 0.001,
+    's': 1,
+    'sec': 1,
+    'second': 1,
+    'seconds': 1,
+    'min': 60,
+    'minute': 60,
+    'minutes': 60,
+    'h': 3600,
+    'hr': 3600,
+    'hour': 3600,
+    'hours': 3600,
+    'd': 86400,
+    'day': 86400,
+    'days': 86400,
+    'week': 604800,
+    'weeks': 604800,
+}
+# run start of an asset whose condition is currently false
+NOT_ACTIVE = np.iinfo(np.int64).min
+
+
+def parse_time_condition(time_condition: dict) -> Tuple[str, int]:
+    """
+    :return: sign and duration in nanoseconds of a parsed time condition
+    """
+    unit = time_condition['unit'].lower()
+    if unit not in TIME_UNITS.keys():
+        raise ValueError(f'Unknown time unit {time_condition["unit"]}')
+
+    seconds = float(time_condition['value']) * TIME_UNITS[unit]
+    return time_condition['sign'], int(seconds * 1e9)
+
+
+class ARLStreamEvaluator(ARLEngine):
+    """
+    Stateful ARLEngine for time-qualified knowledge, fed one micro-batch of
+    timestamped records at a time. For every rule and conclusion with a time
+    condition only the start of the current run of consecutive true records
+    is kept per asset, so memory does not grow with history.
+
+    `for >5 minutes` is true once the definition has held for more than 5
+    minutes, `for =5 minutes` once it has held for at least 5 minutes and
+    `for <5 minutes` during the first 5 minutes of every run. Records of an
+    asset must arrive in time order across batches.
+
+    Ex:
+    evaluator = ARLStreamEvaluator(knowledge, time_column='ts', asset_column='pump')
+    for batch in batches:
+        conclusions = evaluator.evaluate(batch)
+    """
+
+    def __init__(
+        self, arl: ARLHandler, time_column: str = None, asset_column: str = None
+    ) -> None:
+        """
+        :param arl: parsed knowledge
+        :param time_column: (optional) column with the record timestamps,
+        defaults to the DatetimeIndex of each batch
+        :param asset_column: (optional) column identifying the asset of each
+        record, durations are tracked per asset
+        """
+        super().__init__(arl)
+        self.time_column = time_column
+        self.asset_column = asset_column
+        self.durations = {
+            name: parse_time_condition(tc)
+            for name, tc in self.time_conditions.items()
+            if tc['sign'] is not None
+        }
+        # run start in ns by asset, only for assets whose condition is true
+        self.state = {name: {} for name in self.durations.keys()}
+        self.batch = None
+
+    def get_timestamps(self, X: pd.DataFrame) -> np.ndarray:
+        if self.time_column is not None:
+            ts = pd.DatetimeIndex(pd.to_datetime(X[self.time_column]))
+        elif isinstance(X.index, pd.DatetimeIndex):
+            ts = X.index
+        else:
+            raise ValueError('Records need a DatetimeIndex or a time_column')
+
+        if ts.tz is not None:
+            ts = ts.tz_convert(None)
+
+        # as_unit needs pandas 2, astype works from 1.5
+        return ts.astype('datetime64[ns]').asi8
+
+    def evaluate(
+        self, X: Union[pd.DataFrame, dict], include_rules: bool = False
+    ) -> pd.DataFrame:
+        """
+        evaluate the next micro-batch of records, see ARLEngine.evaluate
+
+        :return: DataFrame with X's index and one bool column per conclusion
+        class, true where the conclusion and its time condition hold
+        """
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X)
+
+        if self.asset_column is not None:
+            codes, assets = pd.factorize(X[self.asset_column], use_na_sentinel=False)
+        else:
+            codes, assets = np.zeros(len(X), dtype=np.int64), [None]
+
+        t = self.get_timestamps(X)
+        order = np.lexsort((t, codes))
+        codes = codes[order]
+        first = np.ones(len(X), dtype=bool)
+        first[1:] = codes[1:] != codes[:-1]
+        self.batch = (order, t[order], codes, first, list(assets))
+        try:
+            return super().evaluate(X, include_rules=include_rules)
+        finally:
+            self.batch = None
+
+    def apply_time_condition(self, name: str, values: np.ndarray) -> np.ndarray:
+        if name not in self.durations.keys() or len(values) == 0:
+            return values
+
+        sign, duration = self.durations[name]
+        order, t, codes, first, assets = self.batch
+        state = self.state[name]
+        active = np.asarray(values, dtype=bool)[order]
+
+        carry = np.array([state.get(a, NOT_ACTIVE) for a in assets], dtype=np.int64)
+        carry = carry[codes]
+        prev = np.empty_like(active)
+        prev[1:] = active[:-1]
+        prev[first] = carry[first] != NOT_ACTIVE
+
+        # a run starts where the condition turns true, or continues from the
+        # previous batch on the first record of an asset
+        anchor = active & (first | ~prev)
+        anchor_start = np.where(first & prev, carry, t)
+        idx = np.where(anchor, np.arange(len(active)), 0)
+        np.maximum.accumulate(idx, out=idx)
+        start = anchor_start[idx]
+
+        held = t - start
+        if sign == '>':
+            met = held > duration
+        elif sign == '<':
+            met = held < duration
+        else:
+            met = held >= duration
+
+        last = np.ones(len(active), dtype=bool)
+        last[:-1] = first[1:]
+        for pos in np.flatnonzero(last):
+            asset = assets[codes[pos]]
+            if active[pos]:
+                state[asset] = int(start[pos])
+            else:
+                state.pop(asset, None)
+
+        result = np.empty_like(active)
+        result[order] = active & met
+        return result
+
+    def reset(self):
+        """
+        forget all run state
+        """
+        self.state = {name: {} for name in self.durations.keys()}
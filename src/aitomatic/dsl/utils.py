@@ -1,6 +1,8 @@
 import re
 from typing import List
 
+FLOAT_FMT = re.compile(r"^\-?\d+\.?\d*$")
+
 
 def str_to_var(x: str):
     """
@@ -14,15 +16,13 @@ def str_to_value(x: str):
     convert numeric types to numbers and string literals to strings
     """
     undefined = False
-    float_fmt = "^\-?\d+\.?\d*$"
-    str_literal_fmt = '^".+"$'
     if x.startswith('"') and x.endswith('"'):
         # if is string literal
         y = eval(x)
     elif x.isnumeric():
         # if is int
         y = int(x)
-    elif re.match(float_fmt, x) is not None:
+    elif FLOAT_FMT.match(x) is not None:
         # if is float
         y = float(x)
     else:
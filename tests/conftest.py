@@ -0,0 +1,26 @@
+import pytest
+
+ARL = {
+    'features': """temperature
+--> low :: min to 10
+--> high :: 30 to max
+
+pressure
+--> low :: min to 2
+--> normal :: 2 to 5
+--> high :: 5 to max
+
+mode
+--> on :: is 1""",
+    'rules': """hot := temperature[high]
+hot_press := hot & pressure[high]
+cold := temperature[low] | pressure[low] for >5 minutes""",
+    'conclusions': """alarm[yes] := hot_press | (temperature[high] & pressure[normal])
+alarm[no] := cold
+failure[yes] := mode[on] & cold""",
+}
+
+
+@pytest.fixture
+def arl():
+    return dict(ARL)
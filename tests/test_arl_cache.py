@@ -0,0 +1,41 @@
+from aitomatic.dsl.arl_cache import KnowledgeCache
+from aitomatic.dsl.arl_handler import ARLHandler
+
+
+def test_hit_skips_parsing(arl):
+    cache = KnowledgeCache()
+    first = cache.get_handler(arl)
+    second = cache.get_handler(arl)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.rules == first.rules == ARLHandler(arl).rules
+
+
+def test_edits_do_not_change_cached_entry(arl):
+    cache = KnowledgeCache()
+    first = cache.get_handler(arl)
+    second = cache.get_handler(arl)
+    # hits share the parsed state instead of copying it
+    assert second.rules is first.rules
+
+    second.arl_dict = {**arl, 'rules': arl['rules'].replace('high', 'low')}
+    second.map_data_variables({'temperature': 'TEMP'})
+    third = cache.get_handler(arl)
+    assert third.rules == first.rules == ARLHandler(arl).rules
+    assert third.features == ARLHandler(arl).features
+    assert second.rules != third.rules
+
+
+def test_key_depends_on_every_section(arl):
+    key = KnowledgeCache.get_key(arl)
+    assert KnowledgeCache.get_key(dict(arl)) == key
+    moved = {**arl, 'rules': '', 'conclusions': arl['rules'] + arl['conclusions']}
+    assert KnowledgeCache.get_key(moved) != key
+
+
+def test_disk_tier(arl, tmp_path):
+    path = str(tmp_path / 'knowledge.sqlite')
+    KnowledgeCache(path=path).get_handler(arl)
+    cache = KnowledgeCache(path=path)
+    handler = cache.get_handler(arl)
+    assert cache.disk_hits == 1
+    assert handler.rules == ARLHandler(arl).rules
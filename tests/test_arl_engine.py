@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aitomatic.dsl.arl_engine import ARLEngine
+from aitomatic.dsl.arl_features import FeatureIndex
+from aitomatic.dsl.arl_fuzzy import FuzzyARLEngine
+from aitomatic.dsl.arl_handler import ARLHandler
+
+UNDEFINED = {
+    'features': """temperature
+--> low :: min to 10
+--> high :: 10 to max
+
+flow
+--> low :: min to thr
+--> high :: thr to max""",
+    'rules': 'cold := temperature[low]',
+    'conclusions': 'alarm[yes] := cold',
+}
+
+
+def test_classify_ranges_and_exact_values():
+    index = FeatureIndex(
+        {'low': {'min': 'min', 'max': 2}, 'mid': {'min': 2, 'max': 5}, 'two': {'is': 2}}
+    )
+    codes = index.classify(np.array([1, 2, 3, 5, np.nan, -np.inf]))
+    labels = [index.labels[c] if c >= 0 else None for c in codes]
+    assert labels == ['low', 'two', 'mid', None, None, 'low']
+
+
+def test_evaluate(arl):
+    X = pd.DataFrame(
+        {'temperature': [35, 20, 5], 'pressure': [6, 3, 1], 'mode': [0, 0, 1]},
+        index=list('abc'),
+    )
+    out = ARLEngine(ARLHandler(arl)).evaluate(X, include_rules=True)
+    assert out.index.tolist() == list('abc')
+    assert out['alarm[yes]'].tolist() == [True, False, False]
+    assert out['failure[yes]'].tolist() == [False, False, True]
+    assert out['hot_press'].tolist() == [True, False, False]
+
+
+@pytest.mark.parametrize('engine', [ARLEngine, FuzzyARLEngine])
+def test_unreferenced_undefined_variables(engine):
+    X = pd.DataFrame({'temperature': [5, 20], 'flow': [1, 2]})
+    out = engine(ARLHandler(UNDEFINED)).evaluate(X)
+    assert out['alarm[yes]'].astype(bool).tolist() == [True, False]
+
+
+@pytest.mark.parametrize('engine', [ARLEngine, FuzzyARLEngine])
+def test_referenced_undefined_variables_raise(engine):
+    arl = {**UNDEFINED, 'conclusions': 'alarm[yes] := flow[low]'}
+    X = pd.DataFrame({'temperature': [5, 20], 'flow': [1, 2]})
+    with pytest.raises(ValueError, match='flow'):
+        engine(ARLHandler(arl)).evaluate(X)
@@ -0,0 +1,26 @@
+import pytest
+
+from aitomatic.dsl.arl_expression import ARLExpression
+from aitomatic.dsl.arl_lexer import AND, OR
+
+
+def test_expression_refs_and_precedence():
+    expr = ARLExpression('a & (b[x] | c[y]) | d')
+    assert expr.refs == [('a', None), ('b', 'x'), ('c', 'y'), ('d', None)]
+    assert expr.tree == (OR, (AND, 0, (OR, 1, 2)), 3)
+    assert expr([True, False, False, True])
+    assert not expr([True, False, False, False])
+    # & binds tighter than |
+    assert ARLExpression('a | b & c')([True, False, False])
+
+
+def test_expression_custom_operators():
+    expr = ARLExpression('a & b | c')
+    func = expr.get_func({AND: min, OR: max})
+    assert func([0.2, 0.7, 0.1]) == 0.2
+
+
+@pytest.mark.parametrize('definition', ['a &', '& a', '(a | b', 'a b)', 'a $ b', ''])
+def test_expression_syntax_errors(definition):
+    with pytest.raises(SyntaxError):
+        ARLExpression(definition)
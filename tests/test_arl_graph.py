@@ -0,0 +1,86 @@
+import pytest
+
+from aitomatic.dsl.arl_engine import ARLEngine
+from aitomatic.dsl.arl_expression import ARLExpression
+from aitomatic.dsl.arl_graph import ARLGraph
+from aitomatic.dsl.arl_handler import ARLHandler
+
+
+def test_topological_order():
+    # ready rules are taken in definition order
+    deps = {'c': {'b'}, 'a': set(), 'b': {'a'}, 'd': set()}
+    assert ARLGraph.topological_order(deps) == ['a', 'b', 'c', 'd']
+    assert ARLGraph.topological_order({'x': set(), 'w': set()}) == ['x', 'w']
+
+
+def test_circular_rules_raise():
+    deps = {'a': {'c'}, 'b': {'a'}, 'c': {'b'}, 'd': set()}
+    with pytest.raises(ValueError, match='Circular'):
+        ARLGraph.topological_order(deps)
+
+
+def test_dependencies_are_transitive():
+    rules = {
+        'hot': ARLExpression('temperature[high]'),
+        'hot_press': ARLExpression('hot & pressure[high]'),
+        'cold': ARLExpression('temperature[low]'),
+        'unused': ARLExpression('speed[fast]'),
+    }
+    conclusions = {'alarm': {'yes': ARLExpression('hot_press | mode[on]')}}
+    graph = ARLGraph(rules, conclusions)
+    features, deps = graph.get_dependencies('alarm')
+    assert features == {'temperature', 'pressure', 'mode'}
+    assert deps == ['hot', 'hot_press']
+
+
+def test_unknown_conclusion_raises():
+    graph = ARLGraph({}, {})
+    with pytest.raises(ValueError):
+        graph.get_dependencies('alarm')
+
+
+def test_handler_graph(arl):
+    graph = ARLHandler(arl).graph
+    assert graph.order == ['hot', 'hot_press', 'cold']
+    assert graph.get_dependencies('failure') == (
+        {'temperature', 'pressure', 'mode'},
+        ['cold'],
+    )
+
+
+def test_arl_for_conclusion_keeps_dependencies(arl):
+    sliced = ARLHandler(arl).get_arl_for_conclusion('failure')
+    assert list(sliced.rules['rules']) == ['cold']
+    assert list(sliced.conclusions['conclusions']) == ['failure']
+
+
+def test_redefined_rule_is_not_circular(arl):
+    arl['rules'] += '\nhot := hot & pressure[low]'
+    arl['conclusions'] += '\nwarning[yes] := hot'
+    handler = ARLHandler(arl)
+    assert handler.graph.order == ['hot', 'hot_press', 'cold']
+    assert handler.graph.get_dependencies('warning') == (
+        {'temperature', 'pressure'},
+        ['hot'],
+    )
+
+    sliced = handler.get_arl_for_conclusion('warning')
+    assert sliced.arl_dict['rules'] == (
+        'hot := temperature[high]\nhot := hot & pressure[low]'
+    )
+    assert sliced.rules['missing']['features'] == []
+
+    X = {'temperature': [40, 40, 0], 'pressure': [1, 3, 1], 'mode': [1, 1, 1]}
+    result = ARLEngine(handler).evaluate(X)
+    assert result['warning[yes]'].tolist() == [True, False, False]
+    assert ARLEngine(sliced).evaluate(X).equals(result[['warning[yes]']])
+
+
+def test_rule_referencing_itself_is_not_circular(arl):
+    arl['rules'] += '\nwarm := warm & mode[on]'
+    handler = ARLHandler(arl)
+    assert handler.rules['missing']['rules'] == [{'rule': 'warm', 'line': 4}]
+    assert handler.graph.order == ['hot', 'hot_press', 'cold', 'warm']
+    engine = ARLEngine(handler)
+    with pytest.raises(ValueError, match='Rule warm is not defined'):
+        engine.evaluate({'temperature': [0], 'pressure': [0], 'mode': [1]})
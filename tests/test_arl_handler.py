@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from aitomatic.dsl.arl_handler import ARLHandler
+
+
+def parsed(handler):
+    return handler.features, handler.rules, handler.conclusions
+
+
+EDITS = {
+    'features': [
+        lambda t: t.replace('--> high ::', '--> hi ::', 1),
+        lambda t: t.replace('--> hi ::', '--> high ::'),
+        lambda t: t + '\n\nflow\n--> on :: is 1',
+        lambda t: t.replace('--> low :: min to 10', '--> low :: min to 12'),
+        lambda t: t + '\n--> ::',
+    ],
+    'rules': [
+        lambda t: t + '\nbad := &',
+        lambda t: '\n'.join(x for x in t.splitlines() if not x.startswith('bad')),
+        lambda t: t + '\nwarm := temperature[hi]',
+        lambda t: t.replace('hot_press := hot &', 'hot_press := cold &'),
+        lambda t: t.replace('cold := temperature[low]', 'cold := temperature[hi]'),
+    ],
+    'conclusions': [
+        lambda t: t + '\nx[yes] := (',
+        lambda t: '\n'.join(x for x in t.splitlines() if not x.startswith('x[')),
+        lambda t: t + '\nwarm_c[yes] := warm',
+        lambda t: t.replace('alarm[no] := cold', 'alarm[no] := hot'),
+    ],
+}
+
+
+def test_edit_matches_fresh_parse(arl):
+    handler = ARLHandler(arl)
+    handler.arl_dict = {**arl, 'rules': arl['rules'] + '\nwarm := temperature[low]'}
+    assert parsed(handler) == parsed(ARLHandler(handler.arl_dict))
+    assert 'warm' in handler.rules['rules']
+
+
+def test_feature_edit_reparses_dependent_sections(arl):
+    handler = ARLHandler(arl)
+    handler.arl_dict = {**arl, 'features': arl['features'].replace('high', 'hi')}
+    fresh = ARLHandler(handler.arl_dict)
+    assert parsed(handler) == parsed(fresh)
+    assert handler.rules['missing']['classes'] != []
+
+
+def test_failed_edit_is_not_kept(arl):
+    handler = ARLHandler(arl)
+    features = arl['features'].replace('--> high ::', '--> hi ::')
+    with pytest.raises(SyntaxError):
+        handler.arl_dict = {
+            **arl,
+            'features': features,
+            'rules': arl['rules'] + '\nbad := &',
+        }
+
+    # only the rules are fixed, the features edit must still be applied
+    handler.arl_dict = {**handler.arl_dict, 'rules': arl['rules']}
+    assert parsed(handler) == parsed(ARLHandler(handler.arl_dict))
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_edits_match_fresh_parse(arl, seed):
+    rng = random.Random(seed)
+    handler = ARLHandler(arl)
+    current = dict(handler.arl_dict)
+    for _ in range(30):
+        edited = dict(current)
+        for section in rng.sample(list(EDITS), rng.randint(1, 2)):
+            edited[section] = rng.choice(EDITS[section])(edited[section])
+
+        try:
+            fresh = ARLHandler(edited)
+        except SyntaxError:
+            fresh = None
+
+        try:
+            handler.arl_dict = edited
+        except SyntaxError:
+            assert fresh is None
+        else:
+            assert fresh is not None
+            assert parsed(handler) == parsed(fresh)
+
+        current = edited
+
+
+def test_copy_reparses_replaced_sections(arl):
+    handler = ARLHandler(arl)
+    rules = arl['rules'].replace('pressure[high]', 'pressure[normal]')
+    copy = handler.copy(rules=rules)
+    assert parsed(copy) == parsed(ARLHandler({**arl, 'rules': rules}))
+    assert parsed(handler) == parsed(ARLHandler(arl))
@@ -0,0 +1,50 @@
+from aitomatic.dsl.arl_lexer import AND, OR, ARLLexer
+
+
+def test_split_sections():
+    arl_str = '[features]\nx\n[rules]\nr := x[a]\n'
+    assert ARLLexer.split_sections(arl_str) == [
+        'features',
+        'x\n',
+        'rules',
+        'r := x[a]\n',
+    ]
+
+
+def test_feature_tokens(arl):
+    tokens = list(ARLLexer.tokenize(arl['features'], 'features'))
+    assert [t.kind for t in tokens[:4]] == ['feature', 'member', 'member', 'blank']
+    assert [t.line for t in tokens[:2]] == [1, 2]
+    member = tokens[1].match
+    assert (member.group('class'), member.group('min'), member.group('max')) == (
+        'low',
+        'min',
+        '10',
+    )
+    assert tokens[-1].match.group('is') == '1'
+
+
+def test_rule_tokens():
+    text = 'cold := temperature[low] for >5 minutes\n% note\nbad = x'
+    tokens = list(ARLLexer.tokenize(text, 'rules'))
+    assert [t.kind for t in tokens] == ['definition', 'comment', 'error']
+    m = tokens[0].match
+    assert m.group('var_name') == 'cold'
+    assert m.group('def') == 'temperature[low]'
+    assert (m.group('time_sign'), m.group('time_val'), m.group('time_unit')) == (
+        '>',
+        '5',
+        'minutes',
+    )
+    token = ARLLexer.tokenize_line('bad = x', 3, 'rules')
+    assert (token.kind, token.line) == ('error', 3)
+
+
+def test_definition_tokens():
+    assert ARLLexer.tokenize_definition('a & b [ x ] | $') == [
+        ('', 'a', '', ''),
+        (AND, '', '', ''),
+        ('', 'b', 'x', ''),
+        (OR, '', '', ''),
+        ('', '', '', '$'),
+    ]
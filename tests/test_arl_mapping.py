@@ -0,0 +1,91 @@
+import pytest
+
+from aitomatic.dsl.arl_handler import ARLHandler
+from aitomatic.dsl.arl_mapping import ARLMapping
+
+
+def parsed(handler):
+    features = dict(handler.features, undefined=sorted(handler.features['undefined']))
+    return handler.arl_dict, features, handler.rules, handler.conclusions
+
+
+def refs(handler):
+    return {k: v.refs for k, v in handler.rule_expressions.items()}, {
+        k: v.refs for k, v in handler.conclusion_expressions.items()
+    }
+
+
+def with_variables(arl):
+    features = arl['features'].replace(':: 30 to max', ':: thr to max')
+    return {**arl, 'features': features + '\n--> off :: is thr'}
+
+
+@pytest.mark.parametrize(
+    'mapping',
+    [
+        {'temperature': 'TEMP', 'pressure': 'PRESS'},
+        {'temperature ': 'temp_c', 'mode': 'op mode', 'hot': 'HOT'},
+        {'thr': 'THR', 'temperature': 'TEMP'},
+        {'thr': 'limit.high', 'unknown': 'x'},
+    ],
+)
+def test_mapping_matches_parse_of_mapped_text(arl, mapping):
+    arl = with_variables(arl)
+    handler = ARLHandler(arl)
+    handler.map_data_variables(mapping)
+    fresh = ARLHandler(handler.arl_dict)
+    assert parsed(handler) == parsed(fresh)
+    assert refs(handler) == refs(fresh)
+
+
+def test_mapping_renames_parsed_form(arl):
+    handler = ARLHandler(with_variables(arl))
+    state = ARLMapping({'temperature': 'TEMP', 'thr': 'THR'}).map_parsed_state(
+        handler.get_parsed_state()
+    )
+    assert state is not None
+    assert state['features']['features']['TEMP']['high'] == {'min': 'THR', 'max': 'max'}
+    assert state['features']['undefined'] == ['THR']
+    assert state['rules']['rules']['hot']['raw_definition'] == 'TEMP[high]'
+    assert 'mode[on] & cold' in state['arl_dict']['conclusions']
+
+
+def test_mapping_range_variables(arl):
+    features = arl['features'].replace('--> low :: min to 10', '--> low :: min to thr')
+    handler = ARLHandler({**arl, 'features': features}, {'thr': 'THR'})
+    assert '--> low :: min to THR' in handler.arl_dict['features']
+    assert handler.features['features']['temperature']['low']['max'] == 'THR'
+    assert handler.features['undefined'] == ['THR']
+
+
+def test_mapping_keeps_aliases_and_longer_names(arl):
+    arl = {**arl, 'rules': arl['rules'] + '\nmode_hot := hot & mode[on]'}
+    handler = ARLHandler(arl, {'mode': 'MODE', 'hot': 'HOT'})
+    assert handler.rules['rules']['mode_hot']['raw_definition'] == 'hot & MODE[on]'
+    assert handler.rules['rules']['hot']['raw_definition'] == 'temperature[high]'
+
+
+@pytest.mark.parametrize(
+    'mapping',
+    [
+        # values become numbers, classes are completed again
+        {'thr': '20'},
+        # renamed onto another feature
+        {'temperature': 'pressure'},
+        # missing feature renamed onto a defined one
+        {'flow': 'mode'},
+    ],
+)
+def test_mapping_falls_back_to_parsing(arl, mapping):
+    arl = with_variables(arl)
+    arl['rules'] += '\nflowing := flow[on]'
+    handler = ARLHandler(arl)
+    assert ARLMapping(mapping).map_parsed_state(handler.get_parsed_state()) is None
+    handler.map_data_variables(mapping)
+    assert parsed(handler) == parsed(ARLHandler(handler.arl_dict))
+
+
+def test_mapping_invalid_name_raises(arl):
+    handler = ARLHandler(arl)
+    with pytest.raises(SyntaxError):
+        handler.map_data_variables({'temperature': 'temp/c'})
@@ -0,0 +1,44 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from aitomatic.api.async_web_model import AsyncWebModel  # noqa: E402
+from aitomatic.api.cache import PredictionCache  # noqa: E402
+
+
+class EchoModel(AsyncWebModel):
+    def __init__(self, **kwargs):
+        super().__init__('echo', **kwargs)
+        self.chunks = []
+
+    async def apredict_chunk(self, input_data):
+        X = input_data[self.data_key]
+        self.chunks.append(len(X))
+        await asyncio.sleep(0)
+        return {self.output_key: X[['a']]}
+
+
+def test_apredict_chunks_large_input():
+    X = pd.DataFrame({'a': np.arange(2000.0), 'b': np.arange(2000.0)})
+
+    async def _run():
+        model = EchoModel(chunk_size=8, max_concurrency=4)
+        out = await model.apredict({'X': X})
+        await model.aclose()
+        return model, out
+
+    model, out = asyncio.run(_run())
+    assert len(model.chunks) > 1 and model.chunks[0] > 1
+    assert out['predictions']['a'].tolist() == X['a'].tolist()
+
+
+@pytest.mark.parametrize(
+    'kwargs', [{'cache': PredictionCache()}, {'deduplicate': True}]
+)
+def test_unsupported_options_raise(kwargs):
+    with pytest.raises(NotImplementedError):
+        AsyncWebModel('echo', **kwargs)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import requests
+
+from aitomatic.api.build import ModelBuilder
+from aitomatic.api.exceptions import RequestRejected
+
+
+class Response:
+    def __init__(self, content, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(content).encode()
+
+
+class FakeTransport:
+    """
+    answers posts to the model endpoint with the queued responses, or
+    exceptions, in order, and serves the model listing. requests holds the
+    method of every model endpoint request.
+    """
+
+    def __init__(self, *posts):
+        self.posts = list(posts)
+        self.requests = []
+        self.models = []
+
+    def request(self, method, url, **kwargs):
+        if url.endswith('/project'):
+            return Response({'id': 'p1'})
+
+        self.requests.append(method)
+        if method == 'get' and url.endswith('/models'):
+            return Response(self.models)
+
+        post = self.posts.pop(0)
+        if isinstance(post, Exception):
+            raise post
+
+        return post
+
+
+def submit(transport, retries=3):
+    builder = ModelBuilder('P', api_token='token', transport=transport)
+    return builder.submit_model({'model_name': 'm'}, retries, retry_wait=0)
+
+
+@pytest.mark.parametrize('status_code', [400, 401, 404, 413, 415, 422])
+def test_client_errors_are_not_retried(status_code):
+    transport = FakeTransport(Response({}, status_code), Response({'id': 'm1'}))
+    with pytest.raises(RequestRejected):
+        submit(transport)
+
+    assert transport.requests == ['post']
+
+
+@pytest.mark.parametrize(
+    'failure',
+    [
+        Response({}, 500),
+        Response({}, 503),
+        Response({}, 429),
+        Response({}, 408),
+        requests.ConnectionError('reset'),
+        requests.Timeout('timed out'),
+    ],
+)
+def test_transient_errors_are_retried(failure):
+    transport = FakeTransport(failure, Response({'id': 'm1'}))
+    assert submit(transport) == {'id': 'm1'}
+    # the model listing is checked before posting again
+    assert transport.requests == ['post', 'get', 'post']
+
+
+def test_retries_run_out():
+    transport = FakeTransport(Response({}, 502), Response({}, 502))
+    with pytest.raises(ConnectionError):
+        submit(transport, retries=1)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.cache import PredictionCache, hash_rows
+from aitomatic.api.web_model import WebModel
+
+
+class EchoModel(WebModel):
+    def __init__(self, **kwargs):
+        super().__init__('echo', **kwargs)
+        self.sent = 0
+
+    def predict_chunk(self, input_data):
+        X = input_data[self.data_key]
+        self.sent += len(X)
+        if isinstance(X, list):
+            return {self.output_key: [2 * x for x in X]}
+
+        return {self.output_key: pd.DataFrame({'p': 2 * np.asarray(X['a'])})}
+
+
+def test_hash_rows_matches_equal_rows():
+    X = pd.DataFrame({'a': [1.0, 2.0, 1.0], 'b': ['x', 'y', 'x']})
+    schema, rows = hash_rows(X)
+    assert rows[0] == rows[2] != rows[1]
+    assert hash_rows(X.astype({'a': 'float32'}))[0] != schema
+
+
+def test_cache_sends_only_new_rows():
+    model = EchoModel(cache=PredictionCache())
+    X = pd.DataFrame({'a': np.arange(10.0)})
+    model.predict({'X': X.iloc[:6]})
+    out = model.predict({'X': X.iloc[3:]})['predictions']
+    assert model.sent == 10
+    assert out['p'].tolist() == (2 * X['a'].iloc[3:]).tolist()
+    assert out.index.tolist() == list(range(3, 10))
+
+
+def test_cache_skips_lists():
+    model = EchoModel(cache=PredictionCache())
+    assert model.predict({'X': [1, 2, 3]})['predictions'] == [2, 4, 6]
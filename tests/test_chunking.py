@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.chunking import ChunkSizer
+from aitomatic.api.web_model import WebModel
+
+
+def serialize(X):
+    return json.dumps(X)
+
+
+def test_seed_keeps_observed_estimate():
+    sizer = ChunkSizer(1000)
+    assert sizer.seed_bytes_per_row(['ab'] * 10, serialize) == 6
+    sizer.observe(10, 200)
+    # a second call must not replace the estimate corrected by observe
+    assert sizer.seed_bytes_per_row(['ab'] * 10, serialize) == 0.3 * 20 + 0.7 * 6
+    assert sizer.estimate_size(['ab'] * 10, serialize) == sizer.bytes_per_row * 10
+
+
+class EchoModel(WebModel):
+    def __init__(self, **kwargs):
+        super().__init__('echo', **kwargs)
+        self.chunks = []
+
+    def predict_chunk(self, input_data):
+        X = input_data[self.data_key]
+        self.chunks.append(len(X))
+        return {self.output_key: X[['a']]}
+
+
+def test_batch_predict_sizes_first_chunk():
+    X = pd.DataFrame({'a': np.arange(2000.0), 'b': np.arange(2000.0)})
+    model = EchoModel(chunk_size=8)
+    out = model.batch_predict({'X': X})
+    assert model.chunks[0] > 1
+    assert sum(model.chunks) == 2000
+    assert out['predictions']['a'].tolist() == X['a'].tolist()
+
+
+def test_predict_keeps_estimate_between_calls():
+    X = pd.DataFrame({'a': np.arange(2000.0), 'b': np.arange(2000.0)})
+    model = EchoModel(chunk_size=8)
+    model.predict({'X': X})
+    model.chunk_sizer.observe(10, 10000)
+    corrected = model.chunk_sizer.bytes_per_row
+    model.predict({'X': X})
+    assert model.chunk_sizer.bytes_per_row == corrected
+
+
+def test_predict_list():
+    model = EchoModel(chunk_size=1)
+    model.predict_chunk = lambda input_data: {'predictions': input_data['X']}
+    X = list(range(1000))
+    assert model.predict({'X': X})['predictions'] == X
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.web_model import WebModel
+
+
+class EchoModel(WebModel):
+    def __init__(self, **kwargs):
+        super().__init__('echo', **kwargs)
+        self.sent = 0
+
+    def predict_chunk(self, input_data):
+        X = input_data[self.data_key]
+        self.sent += len(X)
+        if isinstance(X, list):
+            return {self.output_key: [2 * x for x in X]}
+
+        return {self.output_key: pd.DataFrame({'p': 2 * np.asarray(X['a'])})}
+
+
+def test_sends_unique_rows():
+    model = EchoModel(deduplicate=True)
+    X = pd.DataFrame({'a': [3.0, 1.0, 3.0, 2.0, 1.0]}, index=list('vwxyz'))
+    out = model.predict({'X': X})['predictions']
+    assert model.sent == 3
+    assert out['p'].tolist() == [6.0, 2.0, 6.0, 4.0, 2.0]
+    assert out.index.tolist() == list('vwxyz')
+
+
+def test_lists_are_sent_whole():
+    model = EchoModel()
+    out = model.batch_predict({'X': [1, 1, 2]}, deduplicate=True)
+    assert out['predictions'] == [2, 2, 4]
+    assert model.sent == 3
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from aitomatic.api.streaming import (
+    ParquetSink,
+    read_csv_chunks,
+    read_parquet_row_groups,
+    write_parquet_stream,
+)
+
+
+def test_append_continues_row_numbers(tmp_path):
+    path = str(tmp_path / 'predictions.parquet')
+    chunks = [pd.DataFrame({'p': np.arange(3.0)}), pd.DataFrame({'p': [5.0, 6.0]})]
+    assert write_parquet_stream(chunks, path) == 5
+
+    with ParquetSink(path, overwrite=False) as sink:
+        sink.write(pd.DataFrame({'p': [7.0, 8.0]}))
+
+    assert sink.rows == 2
+    df = pd.concat(read_parquet_row_groups(path))
+    assert df.index.tolist() == list(range(7))
+    assert df['p'].tolist() == [0.0, 1.0, 2.0, 5.0, 6.0, 7.0, 8.0]
+
+
+def test_overwrite_restarts(tmp_path):
+    path = str(tmp_path / 'predictions.parquet')
+    write_parquet_stream([pd.DataFrame({'p': [1.0, 2.0]})], path)
+    write_parquet_stream([pd.DataFrame({'p': [3.0]})], path)
+    df = pd.concat(read_parquet_row_groups(path))
+    assert df.index.tolist() == [0]
+
+
+def test_csv_chunks(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({'a': range(10)}).to_csv(path, index=False)
+    chunks = list(read_csv_chunks(str(path), chunksize=4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert chunks[-1].index.tolist() == [8, 9]
@@ -0,0 +1,113 @@
+import math
+
+import pytest
+import requests
+
+from aitomatic.api.tuning_scheduler import (
+    SimulatedTuningBackend,
+    TuningBackend,
+    TuningScheduler,
+    set_ml_budget,
+)
+
+CONFIGS = [{'x': i, 'budget': 0} for i in range(27)]
+
+
+def apply_budget(config, budget):
+    return {**config, 'budget': budget}
+
+
+def objective(config):
+    return {'f1': config['x'] / 27 + config['budget'] / 1000}
+
+
+def test_successive_halving_keeps_best():
+    scheduler = TuningScheduler(
+        SimulatedTuningBackend(objective, seed=0), 'f1', apply_budget, max_budget=9
+    )
+    results = scheduler.successive_halving(CONFIGS)
+    assert results.groupby('rung').size().tolist() == [27, 9, 3]
+    assert results['budget'].unique().tolist() == [1, 3, 9]
+    top = results[results['rung'] == 2]['x'].tolist()
+    assert sorted(top) == [24, 25, 26]
+    assert scheduler.get_best()['x'] == 26
+
+
+def test_min_mode_and_failures_are_pruned():
+    backend = SimulatedTuningBackend(objective, failure_rate=0.3, seed=1)
+    scheduler = TuningScheduler(backend, 'f1', apply_budget, mode='min', max_budget=9)
+    results = scheduler.successive_halving(CONFIGS)
+    failed = results[results['status'] == 'error']
+    assert failed['score'].isna().all()
+    later = results[results['rung'] > 0]
+    assert set(later['x']).isdisjoint(set(failed[failed['rung'] == 0]['x']))
+    best = scheduler.get_best()
+    top = results[results['budget'] == best['budget']]
+    assert best['score'] == top['score'].min()
+
+
+def test_hyperband_brackets():
+    scheduler = TuningScheduler(
+        SimulatedTuningBackend(objective, seed=0), 'f1', apply_budget, max_budget=9
+    )
+    results = scheduler.hyperband(CONFIGS, seed=0)
+    assert sorted(results['bracket'].unique()) == [0, 1, 2]
+    assert results.groupby('bracket').size().tolist() == [13, 6, 3]
+    assert scheduler.get_best()['budget'] == 9
+
+
+def test_unreadable_metrics_leave_models_unscored():
+    class Backend(SimulatedTuningBackend):
+        def get_metrics(self, model_name):
+            if model_name.endswith(' 0'):
+                raise requests.Timeout('slow')
+            if model_name.endswith(' 1'):
+                return {}['metrics']
+            return super().get_metrics(model_name)
+
+    scheduler = TuningScheduler(Backend(objective, seed=0), 'f1', apply_budget)
+    model_df = scheduler.run_rung(CONFIGS[:4], 1, 0, 0)
+    assert model_df['score'].isna().tolist() == [True, True, False, False]
+
+
+def test_default_names_differ_from_given_name():
+    backend = SimulatedTuningBackend(objective)
+    assert TuningScheduler(backend, 'f1', apply_budget).name.startswith('tune ')
+    assert TuningScheduler(backend, 'f1', apply_budget, name='run2').name == 'run2'
+
+
+def test_invalid_settings():
+    backend = SimulatedTuningBackend(objective)
+    with pytest.raises(ValueError):
+        TuningScheduler(backend, 'f1', apply_budget, mode='best')
+    with pytest.raises(ValueError):
+        TuningScheduler(backend, 'f1', apply_budget, min_budget=10, max_budget=9)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class SubmitOnly(TuningBackend):
+        def submit(self, configs, base_name):
+            return None
+
+    with pytest.raises(TypeError, match='get_metrics'):
+        SubmitOnly()
+
+
+def test_callable_metric():
+    scheduler = TuningScheduler(
+        SimulatedTuningBackend(objective), lambda m: m.get('loss'), apply_budget
+    )
+    assert math.isnan(scheduler.get_score({'f1': 1}))
+    assert scheduler.get_score({'loss': 2}) == 2.0
+
+
+def test_set_ml_budget():
+    config = {
+        'threshold': 0.5,
+        'ml_models': [{'hyperparams': {'n_estimators': 10}}, {'hyperparams': {}}],
+    }
+    out = set_ml_budget()(config, 27.0)
+    assert out['ml_models'][0]['hyperparams'] == {'n_estimators': 27}
+    assert out['ml_models'][1] == config['ml_models'][1]
+    assert config['ml_models'][0]['hyperparams'] == {'n_estimators': 10}
+    assert set_ml_budget()({'threshold': 0.5}, 3) == {'threshold': 0.5}
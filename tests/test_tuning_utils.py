@@ -0,0 +1,97 @@
+import itertools
+import json
+
+import pytest
+
+from aitomatic.api.tuning_utils import (
+    ParamGrid,
+    generate_train_hyperparam_grid,
+    generate_train_hyperparams,
+    get_size,
+)
+from aitomatic.api.web_model import WebModel
+
+RANGES = {'max_depth': [2, 4, 6], 'eta': [0.1, 0.01], 'n': range(5)}
+
+
+def test_grid_matches_product():
+    grid = ParamGrid(RANGES)
+    expected = [
+        dict(zip(RANGES.keys(), values))
+        for values in itertools.product(*RANGES.values())
+    ]
+    assert list(grid) == expected
+    assert len(grid) == grid.size == 30
+    assert grid[-1] == expected[-1]
+    assert grid[3:6] == expected[3:6]
+    with pytest.raises(IndexError):
+        grid[30]
+
+
+def test_nested_grid_and_transform():
+    inner = ParamGrid([[1, 2], ['a', 'b']])
+    grid = ParamGrid({'x': [0, 1], 'inner': inner}, transform=lambda c: c['inner'])
+    assert list(grid) == [[1, 'a'], [1, 'b'], [2, 'a'], [2, 'b']] * 2
+    assert grid.dims == 3
+
+
+def test_huge_grid_uses_size():
+    grid = ParamGrid([range(10**10)] * 3)
+    assert get_size(grid) == 10**30
+    with pytest.raises(OverflowError, match='size'):
+        len(grid)
+
+    assert len(grid.sample(5, seed=0)) == 5
+    assert get_size([1, 2]) == 2
+
+
+@pytest.mark.parametrize('method', ['random', 'lhs', 'halton'])
+def test_sample_is_distinct_and_seeded(method):
+    grid = ParamGrid(RANGES)
+    indices = grid.sample_indices(12, method, seed=1)
+    assert len(set(indices)) == 12
+    assert all(0 <= i < grid.size for i in indices)
+    assert grid.sample(12, method, seed=1) == [grid[i] for i in indices]
+    assert grid.sample_indices(40, method, seed=1) == list(range(30))
+
+
+def test_lhs_covers_every_value():
+    grid = ParamGrid({'a': range(10), 'b': range(10)})
+    configs = grid.sample(10, 'lhs', seed=0)
+    assert sorted(c['a'] for c in configs) == list(range(10))
+    assert sorted(c['b'] for c in configs) == list(range(10))
+
+
+def test_invalid_sample_method():
+    with pytest.raises(ValueError):
+        ParamGrid(RANGES).sample(3, 'grid')
+
+
+def test_generate_train_hyperparams_returns_lists():
+    params, keys = generate_train_hyperparams(RANGES)
+    assert isinstance(params, list)
+    assert list(keys) == list(RANGES.keys())
+    assert params == list(generate_train_hyperparam_grid(RANGES))
+    # callers slice, concatenate and serialize the result
+    assert (params[:2] + params[-1:])[2] == params[-1]
+    assert json.loads(json.dumps(params[:1], default=int)) == params[:1]
+    assert isinstance(generate_train_hyperparam_grid(RANGES), ParamGrid)
+
+
+def test_generate_ml_model_params_returns_lists():
+    model = WebModel('m')
+    current = [{'type': 'XGBClassifier'}, {'type': 'LogisticRegression'}]
+
+    def tuning():
+        return {'XGBClassifier': {'max_depth': [2, 4]}, 'LogisticRegression': {}}
+
+    ranges = tuning()
+    params = model.generate_ml_model_params(current, ranges)
+    assert isinstance(params, list)
+    assert isinstance(ranges['XGBClassifier']['tuning_ranges'], list)
+    assert [p[0]['hyperparams']['max_depth'] for p in params] == [2, 4]
+    assert [p[1]['type'] for p in params] == ['LogisticRegression'] * 2
+
+    grid = model.generate_ml_model_param_grid(current, tuning())
+    assert isinstance(grid, ParamGrid)
+    assert list(grid) == params